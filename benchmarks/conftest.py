@@ -0,0 +1,48 @@
+"""Shared setup of the benchmarks. Every benchmark runs offline: HTTP requests
+other than to local stubs (see stubs.py) fail, exchange rates are fixed and fees
+come from a static quote.
+
+Results can be saved and compared across bitsv versions with pytest-benchmark:
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+or written to a file with ``--benchmark-json=results.json``. The saved JSON
+records the bitsv version that produced it.
+"""
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+import bitsv
+from bitsv.network import fees, rates
+
+# Satoshi per unit of currency, roughly 1 BSV = 100 USD.
+STUB_RATES = {currency: Decimal(1000000) for currency in rates.EXCHANGE_RATES
+              if currency not in ('satoshi', 'ubsv', 'mbsv', 'bsv')}
+
+
+LOCAL_HOSTS = ('127.0.0.1', 'localhost')
+send_request = requests.sessions.Session.request
+
+
+def refuse_request(session, method, url, *args, **kwargs):
+    if urlsplit(url).hostname not in LOCAL_HOSTS:
+        raise RuntimeError('Benchmarks run offline, stub the network instead.')
+    return send_request(session, method, url, *args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(requests.sessions.Session, 'request', refuse_request)
+    for currency, satoshis in STUB_RATES.items():
+        monkeypatch.setitem(rates.EXCHANGE_RATES, currency, lambda satoshis=satoshis: satoshis)
+    fees.set_fee_provider(fees.StaticFeeProvider(standard=1, data=1))
+    yield
+    fees.set_fee_provider(None)
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    output_json['bitsv_version'] = bitsv.__version__
@@ -0,0 +1,128 @@
+"""Load test of :class:`~bitsv.network.NetworkAPI` against local provider stubs.
+
+Measures throughput, latency percentiles and how requests fail over between
+providers under concurrency, e.g. with Whatsonchain failing 20% of requests:
+
+    python benchmarks/loadtest.py --requests 500 --concurrency 16 --woc-error-rate 0.2
+
+Failed provider calls are retried with the backoff of NetworkAPI (1s, 2s) before
+the next provider is tried, so error rates dominate the tail latency.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bitsv.network import NetworkAPI  # noqa: E402
+from bitsv.network.services import MatterCloud  # noqa: E402
+from stubs import ProviderStub, redirect  # noqa: E402
+
+ADDRESS = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+METHODS = ('get_balance', 'get_transactions', 'get_unspents', 'get_transaction')
+
+LoadTestResult = namedtuple('LoadTestResult', ('succeeded', 'failed', 'duration', 'latencies'))
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_load_test(network_api, method, param, n_requests, concurrency):
+    """Calls ``network_api.<method>(param)`` ``n_requests`` times from
+    ``concurrency`` threads.
+
+    :rtype: :class:`LoadTestResult`
+    """
+    call = getattr(network_api, method)
+
+    def timed_call(_):
+        start = time.perf_counter()
+        try:
+            call(param)
+            ok = True
+        except ConnectionError:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_call, range(n_requests)))
+    duration = time.perf_counter() - start
+
+    succeeded = sum(1 for ok, latency in results if ok)
+    return LoadTestResult(succeeded, len(results) - succeeded, duration, [latency for ok, latency in results])
+
+
+def summarize(result, stubs):
+    return {
+        'requests': result.succeeded + result.failed,
+        'succeeded': result.succeeded,
+        'failed': result.failed,
+        'throughput': (result.succeeded + result.failed) / result.duration,
+        'latency': {
+            'p50': percentile(result.latencies, 50),
+            'p90': percentile(result.latencies, 90),
+            'p99': percentile(result.latencies, 99),
+            'max': max(result.latencies) if result.latencies else None,
+        },
+        # Responses per provider show how the load failed over.
+        'providers': {stub.provider: dict(stub.statuses) for stub in stubs},
+    }
+
+
+def create_network_api(stubs):
+    network_api = NetworkAPI('main')
+    apis = {'whatsonchain': network_api.whatsonchain, 'guarda': network_api.bchsvexplorer,
+            'mattercloud': MatterCloud(api_key='stub', network='main')}
+    network_api.list_of_apis.clear()
+    network_api.list_of_apis.extend(apis[stub.provider] for stub in stubs)
+    return network_api
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--method', choices=METHODS, default='get_balance')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mattercloud', action='store_true', help='Put MatterCloud first in line.')
+    for name in ('woc', 'guarda', 'mattercloud'):
+        parser.add_argument('--{}-latency'.format(name), type=float, default=0.02)
+        parser.add_argument('--{}-jitter'.format(name), type=float, default=0.01)
+        parser.add_argument('--{}-error-rate'.format(name), type=float, default=0.0)
+        parser.add_argument('--{}-rate-limit'.format(name), type=float, default=None)
+    args = parser.parse_args(argv)
+
+    def create_stub(provider, name):
+        return ProviderStub(provider, latency=getattr(args, name + '_latency'),
+                            jitter=getattr(args, name + '_jitter'),
+                            error_rate=getattr(args, name + '_error_rate'),
+                            rate_limit=getattr(args, name + '_rate_limit'))
+
+    stubs = [create_stub('whatsonchain', 'woc'), create_stub('guarda', 'guarda')]
+    if args.mattercloud:
+        stubs.insert(0, create_stub('mattercloud', 'mattercloud'))
+
+    for stub in stubs:
+        stub.start()
+    try:
+        with redirect(*stubs):
+            network_api = create_network_api(stubs)
+            param = '{:064x}'.format(1) if args.method == 'get_transaction' else ADDRESS
+            result = run_load_test(network_api, args.method, param, args.requests, args.concurrency)
+    finally:
+        for stub in stubs:
+            stub.stop()
+
+    print(json.dumps(summarize(result, stubs), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""Local HTTP stand-ins for the providers behind :class:`~bitsv.network.NetworkAPI`.
+
+Each :class:`ProviderStub` answers the endpoints bitsv uses with JSON shaped like
+the real service, after a configurable latency, and fails a configurable share
+of requests with HTTP 500 or beyond a rate limit with HTTP 429. :func:`redirect`
+points the hard-coded provider urls at the stubs.
+"""
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from bitsv.transaction import calc_txid
+
+PROVIDER_URLS = {
+    'whatsonchain': 'https://api.whatsonchain.com',
+    'guarda': 'https://bsvbook.guarda.co',
+    'mattercloud': 'https://api.mattercloud.net',
+}
+N_TRANSACTIONS = 10
+BALANCE = 100000
+CHAIN_HEIGHT = 700000
+
+
+def stub_txid(i):
+    return '{:064x}'.format(i + 1)
+
+
+def whatsonchain_routes():
+    return [
+        ('GET', r'/v1/bsv/\w+/address/\w+/balance', lambda m, q, body: {'confirmed': BALANCE, 'unconfirmed': 0}),
+        ('GET', r'/v1/bsv/\w+/address/\w+/history', lambda m, q, body: [
+            {'tx_hash': stub_txid(i), 'height': CHAIN_HEIGHT - i} for i in range(N_TRANSACTIONS)
+        ]),
+        ('GET', r'/v1/bsv/\w+/address/\w+/unspent', lambda m, q, body: [
+            {'value': BALANCE // N_TRANSACTIONS, 'height': CHAIN_HEIGHT - i, 'tx_hash': stub_txid(i), 'tx_pos': 0}
+            for i in range(N_TRANSACTIONS)
+        ]),
+        ('GET', r'/v1/bsv/\w+/chain/info', lambda m, q, body: {'blocks': CHAIN_HEIGHT}),
+        ('GET', r'/v1/bsv/\w+/tx/hash/(\w+)', lambda m, q, body: {
+            'txid': m.group(1),
+            'vin': [{'txid': stub_txid(0), 'vout': 0}],
+            'vout': [{'value': 0.001, 'n': 0, 'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac'}}],
+        }),
+        ('POST', r'/v1/bsv/\w+/tx/raw', lambda m, q, body: calc_txid(json.loads(body)['txHex'])),
+    ]
+
+
+def guarda_address(m, query, body):
+    details = query.get('details', ['basic'])[0]
+    if details == 'basic':
+        return {'balance': str(BALANCE)}
+    response = {'page': 1, 'totalPages': 1}
+    if details == 'txslight':
+        response['transactions'] = [{'txid': stub_txid(i), 'blockHeight': CHAIN_HEIGHT - i}
+                                    for i in range(N_TRANSACTIONS)]
+    else:
+        response['txids'] = [stub_txid(i) for i in range(N_TRANSACTIONS)]
+    return response
+
+
+def guarda_routes():
+    return [
+        ('GET', r'/api/v2/address/\w+', guarda_address),
+        ('GET', r'/api/v2/utxo/\w+', lambda m, q, body: [
+            {'txid': stub_txid(i), 'vout': 0, 'value': str(BALANCE // N_TRANSACTIONS), 'confirmations': i + 1}
+            for i in range(N_TRANSACTIONS)
+        ]),
+        ('GET', r'/api/v2/sendtx/(\w+)', lambda m, q, body: {'result': calc_txid(m.group(1))}),
+        ('GET', r'/api/v2/tx/(\w+)', lambda m, q, body: {
+            'txid': m.group(1),
+            'vin': [{'txid': stub_txid(0), 'vout': 0}],
+            'vout': [{'hex': '76a914' + '00' * 20 + '88ac', 'value': '0.001'}],
+        }),
+    ]
+
+
+def mattercloud_routes():
+    return [
+        ('GET', r'/api/v3/\w+/addr/\w+', lambda m, q, body: {
+            'balanceSat': BALANCE, 'transactions': [stub_txid(i) for i in range(N_TRANSACTIONS)]
+        }),
+        ('POST', r'/api/v3/\w+/addrs/utxo', lambda m, q, body: [
+            {'satoshis': BALANCE // N_TRANSACTIONS, 'confirmations': i + 1, 'txid': stub_txid(i), 'vout': 0}
+            for i in range(N_TRANSACTIONS)
+        ]),
+        ('POST', r'/api/v3/\w+/tx/send', lambda m, q, body: {'txid': calc_txid(json.loads(body)['rawtx'])}),
+        ('GET', r'/api/v3/\w+/tx/(\w+)', lambda m, q, body: {
+            'txid': m.group(1),
+            'vin': [{'txid': stub_txid(0), 'vout': 0}],
+            'vout': [{'valueSat': 100000, 'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac'}}],
+        }),
+    ]
+
+
+ROUTES = {
+    'whatsonchain': whatsonchain_routes,
+    'guarda': guarda_routes,
+    'mattercloud': mattercloud_routes,
+}
+
+
+class StubServer(socketserver.ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is only available on Python 3.7+.
+    daemon_threads = True
+    # The default backlog of 5 drops connections under load, which then wait
+    # for a TCP retransmit and skew the latencies.
+    request_queue_size = 1024
+
+
+class ProviderStub:
+    """Serves the endpoints of ``provider`` on a random local port.
+
+    :param provider: 'whatsonchain', 'guarda' or 'mattercloud'.
+    :param latency: Seconds to wait before every response.
+    :param jitter: Up to this many seconds are added to ``latency`` at random.
+    :param error_rate: The share of requests answered with HTTP 500.
+    :param rate_limit: Requests per second served before answering HTTP 429.
+    :param seed: Seeds the random errors and jitter.
+    """
+
+    def __init__(self, provider, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, seed=0):
+        self.provider = provider
+        self.routes = [(method, re.compile(pattern + '$'), handler) for method, pattern, handler in ROUTES[provider]()]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.statuses = Counter()
+
+        self._random = random.Random(seed)
+        self._tokens = rate_limit
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = StubServer(('127.0.0.1', 0), self._create_handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _take_token(self):
+        if self.rate_limit is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._last_refill) * self.rate_limit)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def respond(self, method, path, body):
+        """:returns: The status code and JSON body for a request."""
+        with self._lock:
+            delay = self.latency + self._random.random() * self.jitter
+            failed = self._random.random() < self.error_rate
+            limited = not self._take_token()
+        time.sleep(delay)
+
+        if limited:
+            status, response = 429, {'error': 'rate limited'}
+        elif failed:
+            status, response = 500, {'error': 'internal error'}
+        else:
+            url = urlsplit(path)
+            for route_method, pattern, handler in self.routes:
+                match = pattern.match(url.path)
+                if route_method == method and match:
+                    status, response = 200, handler(match, parse_qs(url.query), body)
+                    break
+            else:
+                status, response = 404, {'error': 'not found'}
+
+        with self._lock:
+            self.statuses[status] += 1
+        return status, response
+
+    def _create_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_request(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                status, response = stub.respond(method, self.path, body)
+                data = json.dumps(response).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@contextmanager
+def redirect(*stubs):
+    """Sends the requests bitsv makes to each provider to its stub instead."""
+    prefixes = {PROVIDER_URLS[stub.provider]: stub.url for stub in stubs}
+    send = requests.sessions.Session.request
+
+    def request(session, method, url, *args, **kwargs):
+        for prefix, stub_url in prefixes.items():
+            if url.startswith(prefix):
+                url = stub_url + url[len(prefix):]
+                break
+        return send(session, method, url, *args, **kwargs)
+
+    with mock.patch.object(requests.sessions.Session, 'request', request):
+        yield
@@ -0,0 +1,42 @@
+"""Address and key encoding benchmarks.
+
+    pytest benchmarks/test_format.py --benchmark-json=format.json
+"""
+import os
+
+import pytest
+
+from bitsv.base58 import b58decode_check, b58encode_check
+from bitsv.format import (
+    address_to_public_key_hash, bytes_to_wif, public_key_to_address, wif_to_bytes
+)
+from bitsv.wallet import PrivateKey
+
+WIF = 'L3jsepcttyuJK3HKezD4qqRKGtwc8d2d1Nw6vsoPDX9cMcUxqqMv'
+ADDRESS = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+
+
+@pytest.mark.parametrize('size', [21, 34, 100])
+def test_b58encode_check(benchmark, size):
+    benchmark(b58encode_check, os.urandom(size))
+
+
+def test_b58decode_check(benchmark):
+    benchmark(b58decode_check, ADDRESS)
+
+
+def test_address_to_public_key_hash(benchmark):
+    benchmark(address_to_public_key_hash, ADDRESS)
+
+
+def test_public_key_to_address(benchmark):
+    benchmark(public_key_to_address, PrivateKey(WIF).public_key)
+
+
+def test_wif_round_trip(benchmark):
+    private_key = PrivateKey(WIF)
+
+    def round_trip():
+        return wif_to_bytes(bytes_to_wif(private_key.to_bytes(), compressed=True))
+
+    benchmark(round_trip)
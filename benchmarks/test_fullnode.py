@@ -0,0 +1,87 @@
+"""FullNode input resolution benchmarks against a regtest-style stub, which answers
+from memory after a fixed delay per HTTP round trip:
+
+    pytest benchmarks/test_fullnode.py
+
+A consolidation transaction spends 500 outputs of 5 parents. ``per_input`` resolves
+every input with its own request, as before batching, for comparison.
+"""
+import time
+from decimal import Decimal
+
+import pytest
+
+from bitsv.network.services import FullNode
+from bitsv.network.services.fullnode import ParentCache, bsv_to_satoshi
+
+ROUND_TRIP = 0.0002
+N_PARENTS = 5
+N_INPUTS = 500
+TXID = 'ff' * 32
+
+
+def parent_txid(i):
+    return '{:02x}'.format(i) * 32
+
+
+TRANSACTIONS = {
+    parent_txid(i): {
+        'txid': parent_txid(i),
+        'confirmations': 10,
+        'vin': [],
+        'vout': [{'value': Decimal('0.00001'), 'n': n, 'scriptPubKey': {'hex': '00'}}
+                 for n in range(N_INPUTS // N_PARENTS)],
+    } for i in range(N_PARENTS)
+}
+TRANSACTIONS[TXID] = {
+    'txid': TXID,
+    'vin': [{'txid': parent_txid(i % N_PARENTS), 'vout': i // N_PARENTS} for i in range(N_INPUTS)],
+    'vout': [{'value': Decimal('0.004'), 'n': 0, 'scriptPubKey': {'hex': '00'}}],
+}
+
+
+class RegtestStub:
+    def __init__(self):
+        self.round_trips = 0
+
+    def getrawtransaction(self, txid, verbose):
+        self.round_trips += 1
+        time.sleep(ROUND_TRIP)
+        return TRANSACTIONS[txid]
+
+    def batch_(self, calls):
+        self.round_trips += 1
+        time.sleep(ROUND_TRIP)
+        return [TRANSACTIONS[call[1]] for call in calls]
+
+
+def get_fullnode(parent_cache_size=0):
+    node = FullNode.__new__(FullNode)
+    node.__dict__.update(rpc=RegtestStub(), network='regtest',
+                         parent_cache=ParentCache(parent_cache_size) if parent_cache_size else None)
+    return node
+
+
+def resolve_per_input(node, txid):
+    txjson = node.rpc.getrawtransaction(txid, 1)
+    return [bsv_to_satoshi(node.rpc.getrawtransaction(vin['txid'], 1)['vout'][vin['vout']]['value'])
+            for vin in txjson['vin']]
+
+
+def test_per_input(benchmark):
+    node = get_fullnode()
+    amounts = benchmark.pedantic(resolve_per_input, (node, TXID), rounds=3)
+    assert len(amounts) == N_INPUTS
+    benchmark.extra_info['round_trips'] = node.rpc.round_trips // 3
+
+
+@pytest.mark.parametrize('parent_cache_size', [0, 100], ids=['batched', 'cached'])
+def test_get_transaction(benchmark, parent_cache_size):
+    node = get_fullnode(parent_cache_size)
+    node.get_transaction(TXID)  # warm up the cache, if any
+    node.rpc.round_trips = 0
+
+    tx = benchmark(node.get_transaction, TXID)
+    assert len(tx.inputs) == N_INPUTS
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info['round_trips'] = node.rpc.round_trips / benchmark.stats.stats.rounds
@@ -0,0 +1,43 @@
+"""Time taken by ``import bitsv`` in a fresh interpreter, which short-lived
+signing processes pay on every start.
+
+    pytest benchmarks/test_import.py --benchmark-json=import.json
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only imported once the network is used.
+NETWORK_MODULES = ('requests', 'whatsonchain', 'bitcoinrpc', 'bitsv.network.services')
+
+
+def run(code):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    return subprocess.run([sys.executable, '-c', code], env=env, check=True, stdout=subprocess.PIPE,
+                          universal_newlines=True).stdout
+
+
+def test_baseline(benchmark):
+    benchmark.pedantic(run, ('pass',), rounds=10)
+
+
+@pytest.mark.parametrize('module', ['bitsv', 'bitsv.offline'])
+def test_import(benchmark, module):
+    benchmark.pedantic(run, ('import ' + module,), rounds=10)
+
+
+def test_offline_import_skips_network():
+    loaded = run('import sys, bitsv; print(" ".join(m for m in {!r} if m in sys.modules))'.format(NETWORK_MODULES))
+    assert loaded.split() == []
+
+
+def test_static_fee_provider_skips_network():
+    loaded = run('import sys, bitsv\n'
+                 'from bitsv.network.fees import StaticFeeProvider, get_fee_quote\n'
+                 'bitsv.set_fee_provider(StaticFeeProvider(0.5))\n'
+                 'get_fee_quote()\n'
+                 'print(" ".join(m for m in {!r} if m in sys.modules))'.format(NETWORK_MODULES))
+    assert loaded.split() == []
@@ -0,0 +1,53 @@
+"""NetworkAPI under concurrent load against the local provider stubs of stubs.py.
+The full driver with configurable latency, errors and rate limits is loadtest.py.
+"""
+import pytest
+
+from loadtest import create_network_api, run_load_test, summarize
+from stubs import ProviderStub, redirect
+
+ADDRESS = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+
+
+@pytest.fixture
+def stubs(request):
+    woc_options, guarda_options = getattr(request, 'param', ({}, {}))
+    stubs = [ProviderStub('whatsonchain', **woc_options).start(), ProviderStub('guarda', **guarda_options).start()]
+    with redirect(*stubs):
+        yield stubs
+    for stub in stubs:
+        stub.stop()
+
+
+@pytest.mark.parametrize('method', ['get_balance', 'get_unspents', 'get_transactions'])
+def test_throughput(benchmark, stubs, method):
+    network_api = create_network_api(stubs)
+
+    result = benchmark.pedantic(run_load_test, (network_api, method, ADDRESS, 100, 8), rounds=3)
+    summary = summarize(result, stubs)
+    benchmark.extra_info.update(summary['latency'])
+    benchmark.extra_info['throughput'] = summary['throughput']
+    assert result.failed == 0
+
+
+@pytest.mark.parametrize('stubs', [({'error_rate': 1.0}, {})], indirect=True)
+def test_failover(benchmark, stubs):
+    network_api = create_network_api(stubs)
+
+    result = benchmark.pedantic(run_load_test, (network_api, 'get_balance', ADDRESS, 20, 1), rounds=1)
+    summary = summarize(result, stubs)
+    benchmark.extra_info.update(summary['latency'])
+    # The first request is retried on Whatsonchain, fails over and the rest go to Guarda.
+    assert result.failed == 0
+    assert summary['providers'] == {'whatsonchain': {500: 3}, 'guarda': {200: 20}}
+
+
+@pytest.mark.parametrize('stubs', [({'rate_limit': 5}, {})], indirect=True)
+def test_rate_limit(stubs):
+    network_api = create_network_api(stubs)
+
+    result = run_load_test(network_api, 'get_balance', ADDRESS, 40, 8)
+    assert result.failed == 0
+    # Rate limited requests are retried or fail over, so every request is answered once.
+    assert stubs[0].statuses[429] > 0
+    assert stubs[0].statuses[200] + stubs[1].statuses[200] == 40
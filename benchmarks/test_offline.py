@@ -0,0 +1,41 @@
+"""Offline signing benchmarks: one JSON document per transaction against one
+binary batch. Requires pytest-benchmark."""
+import json
+
+import pytest
+
+from bitsv.network.meta import Unspent
+from bitsv.offline import prepare_transaction_data, serialize_batch
+from bitsv.transaction import sanitize_tx_data
+from bitsv.wallet import PrivateKey
+
+N_TRANSACTIONS = 200
+WIF = 'L3jsepcttyuJK3HKezD4qqRKGtwc8d2d1Nw6vsoPDX9cMcUxqqMv'
+TXID = 'f3ad23dac2a3546167b27a43ac3e370236caf93f75bfcf27c625ec839d397888'
+RECEIVER = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+
+
+@pytest.fixture(scope='module')
+def prepared():
+    key = PrivateKey(WIF)
+    transactions = []
+    for i in range(N_TRANSACTIONS):
+        transactions.append(sanitize_tx_data(
+            [Unspent(20000, 1, TXID, i)], [(RECEIVER, 10000, 'satoshi')], 1, key.address
+        ))
+    return key, transactions
+
+
+def test_sign_json(benchmark, prepared):
+    key, transactions = prepared
+    documents = [json.dumps({'unspents': [u.to_dict() for u in unspents], 'outputs': outputs})
+                 for unspents, outputs in transactions]
+    benchmark(lambda: [key.sign_transaction(document) for document in documents])
+
+
+@pytest.mark.parametrize('max_workers', [None, 4], ids=['one_process', 'four_processes'])
+def test_sign_batch(benchmark, prepared, max_workers):
+    key, transactions = prepared
+    batch = serialize_batch([prepare_transaction_data(unspents, outputs) for unspents, outputs in transactions])
+    benchmark.extra_info['batch_size'] = len(batch)
+    benchmark(key.sign_transactions, batch, max_workers=max_workers)
@@ -0,0 +1,24 @@
+"""Currency conversion benchmarks with fixed exchange rates, see conftest.py.
+
+    pytest benchmarks/test_rates.py --benchmark-json=rates.json
+"""
+import pytest
+
+from bitsv.network.rates import (
+    currency_to_satoshi, currency_to_satoshi_cached, satoshi_to_currency_cached
+)
+
+
+@pytest.mark.parametrize('currency', ['satoshi', 'bsv', 'usd'])
+def test_currency_to_satoshi(benchmark, currency):
+    benchmark(currency_to_satoshi, '1.5', currency)
+
+
+@pytest.mark.parametrize('currency', ['satoshi', 'bsv', 'usd'])
+def test_currency_to_satoshi_cached(benchmark, currency):
+    benchmark(currency_to_satoshi_cached, '1.5', currency)
+
+
+@pytest.mark.parametrize('currency', ['bsv', 'usd', 'jpy'])
+def test_satoshi_to_currency_cached(benchmark, currency):
+    benchmark(satoshi_to_currency_cached, 123456789, currency)
@@ -0,0 +1,60 @@
+"""Signing benchmarks. Requires pytest-benchmark:
+
+    pip install pytest-benchmark
+    pytest benchmarks --benchmark-json=signing.json
+
+Low R grinding signs twice on average, in exchange for one byte less per input.
+The mean signature size of each mode is attached to the results as extra info.
+"""
+import os
+
+import pytest
+
+from bitsv.transaction import create_p2pkh_transaction, sanitize_tx_data
+from bitsv.wallet import PrivateKey
+from bitsv.network.meta import Unspent
+
+N_MESSAGES = 256
+MESSAGES = [os.urandom(32) for _ in range(N_MESSAGES)]
+WIF = 'L3jsepcttyuJK3HKezD4qqRKGtwc8d2d1Nw6vsoPDX9cMcUxqqMv'
+TXID = 'f3ad23dac2a3546167b27a43ac3e370236caf93f75bfcf27c625ec839d397888'
+
+
+@pytest.mark.parametrize('low_r', [False, True], ids=['default', 'low_r'])
+def test_sign(benchmark, low_r):
+    key = PrivateKey(WIF)
+
+    def sign_all():
+        return [key.sign(message, low_r=low_r) for message in MESSAGES]
+
+    signatures = benchmark(sign_all)
+    benchmark.extra_info['mean_signature_size'] = sum(map(len, signatures)) / N_MESSAGES
+
+
+@pytest.mark.parametrize('low_r', [False, True], ids=['default', 'low_r'])
+def test_create_p2pkh_transaction_100_inputs(benchmark, low_r):
+    key = PrivateKey(WIF)
+    unspents = [Unspent(10000, 1, TXID, i) for i in range(100)]
+    unspents, outputs = sanitize_tx_data(
+        unspents, [(key.address, 5000, 'satoshi')], 1, key.address, low_r=low_r
+    )
+
+    tx_hex = benchmark(create_p2pkh_transaction, key, unspents, outputs, low_r=low_r)
+    benchmark.extra_info['tx_size'] = len(tx_hex) // 2
+    benchmark.extra_info['fee'] = sum(u.amount for u in unspents) - sum(o[1] for o in outputs)
+
+
+def test_create_10k_small_transactions(benchmark):
+    """The steady-state workload: many one-input, two-output transactions from one key."""
+    key = PrivateKey(WIF)
+    n = 10000
+    transactions = [([Unspent(10000, 1, TXID, i)], [('1ELReFsTCUY2mfaDTy32qxYiT49z786eFg', 5000),
+                                                    (key.address, 4700)])
+                    for i in range(n)]
+
+    def create_all():
+        return [create_p2pkh_transaction(key, unspents, outputs) for unspents, outputs in transactions]
+
+    benchmark.pedantic(create_all, rounds=3, iterations=1)
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info['transactions_per_second'] = n / benchmark.stats.stats.mean
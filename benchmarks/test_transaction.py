@@ -0,0 +1,98 @@
+"""Transaction building benchmarks over a range of sizes.
+
+    pytest benchmarks/test_transaction.py --benchmark-json=transaction.json
+"""
+import os
+
+import pytest
+
+from bitsv.network.meta import Unspent
+from bitsv.op_return import create_pushdata
+from bitsv.transaction import (
+    calc_txid, construct_output_block, create_p2pkh_transaction, sanitize_tx_data
+)
+from bitsv.utxo import UTXOSet
+from bitsv.wallet import PrivateKey
+
+WIF = 'L3jsepcttyuJK3HKezD4qqRKGtwc8d2d1Nw6vsoPDX9cMcUxqqMv'
+TXID = 'f3ad23dac2a3546167b27a43ac3e370236caf93f75bfcf27c625ec839d397888'
+RECEIVER = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+SIZES = [1, 10, 100]
+PAYLOAD_SIZES = [32, 1000, 99000]
+# 1000 satoshi in each currency at the rates of conftest.py
+AMOUNTS = {'satoshi': 1000, 'usd': '0.001'}
+
+
+def create_unspents(n):
+    return [Unspent(1000000, 1, TXID, i) for i in range(n)]
+
+
+def create_outputs(n, currency='satoshi'):
+    return [(RECEIVER, AMOUNTS[currency], currency) for _ in range(n)]
+
+
+@pytest.mark.parametrize('n_outputs', SIZES)
+@pytest.mark.parametrize('n_inputs', SIZES)
+def test_create_p2pkh_transaction(benchmark, n_inputs, n_outputs):
+    key = PrivateKey(WIF)
+    unspents, outputs = sanitize_tx_data(create_unspents(n_inputs), create_outputs(n_outputs), 1, key.address)
+
+    tx_hex = benchmark(create_p2pkh_transaction, key, unspents, outputs)
+    benchmark.extra_info['tx_size'] = len(tx_hex) // 2
+
+
+@pytest.mark.parametrize('combine', [True, False], ids=['combine', 'select'])
+@pytest.mark.parametrize('n_outputs', SIZES)
+@pytest.mark.parametrize('n_unspents', [10, 1000])
+def test_sanitize_tx_data(benchmark, n_unspents, n_outputs, combine):
+    unspents = create_unspents(n_unspents)
+    outputs = create_outputs(n_outputs)
+    benchmark(sanitize_tx_data, unspents, outputs, 1, RECEIVER, combine=combine)
+
+
+@pytest.mark.parametrize('collection', [list, UTXOSet])
+def test_select_from_dust(benchmark, collection):
+    # A wallet of 200,000 dust outputs paying 100,000 satoshi, spending what it selected.
+    unspents = collection(Unspent(600 + i % 1000, 1, '{:064x}'.format(i), 0) for i in range(200000))
+
+    def select_and_spend():
+        selected, _ = sanitize_tx_data(unspents, create_outputs(1), 1, RECEIVER, combine=False)
+        if collection is UTXOSet:
+            unspents.spend(selected)
+        else:
+            spent = set((unspent.txid, unspent.txindex) for unspent in selected)
+            unspents[:] = [unspent for unspent in unspents if (unspent.txid, unspent.txindex) not in spent]
+
+    benchmark.pedantic(select_and_spend, rounds=20)
+
+
+@pytest.mark.parametrize('currency', ['satoshi', 'usd'])
+def test_sanitize_tx_data_currency(benchmark, currency):
+    benchmark(sanitize_tx_data, create_unspents(10), create_outputs(10, currency), 1, RECEIVER)
+
+
+@pytest.mark.parametrize('payload_size', PAYLOAD_SIZES)
+def test_sanitize_tx_data_message(benchmark, payload_size):
+    message = os.urandom(payload_size)
+    benchmark(sanitize_tx_data, create_unspents(10), create_outputs(1), 1, RECEIVER, message=message)
+
+
+@pytest.mark.parametrize('n_outputs', SIZES)
+def test_construct_output_block(benchmark, n_outputs):
+    outputs = [(RECEIVER, 1000) for _ in range(n_outputs)]
+    benchmark(construct_output_block, outputs)
+
+
+@pytest.mark.parametrize('n_elements', [1, 10, 100])
+@pytest.mark.parametrize('payload_size', PAYLOAD_SIZES)
+def test_create_pushdata(benchmark, payload_size, n_elements):
+    pushdata = [os.urandom(payload_size // n_elements) for _ in range(n_elements)]
+    benchmark(create_pushdata, pushdata)
+
+
+@pytest.mark.parametrize('n_inputs', SIZES)
+def test_calc_txid(benchmark, n_inputs):
+    key = PrivateKey(WIF)
+    unspents, outputs = sanitize_tx_data(create_unspents(n_inputs), create_outputs(2), 1, key.address)
+    tx_hex = create_p2pkh_transaction(key, unspents, outputs)
+    benchmark(calc_txid, tx_hex)
@@ -1,6 +1,19 @@
 from bitsv.format import verify_sig
+from bitsv.network.fees import set_fee_cache_time, set_fee_provider
 from bitsv.network.rates import SUPPORTED_CURRENCIES, set_rate_cache_time
-from bitsv.network.services import set_service_timeout, FullNode
+from bitsv.utils import MODULE_GETATTR
 from bitsv.wallet import Key, PrivateKey, wif_to_key
 
 __version__ = '0.11.5'
+
+
+def __getattr__(name):
+    # Imported on first use so that offline use of bitsv never imports requests.
+    if name in ('set_service_timeout', 'FullNode'):
+        from bitsv.network import services
+        return getattr(services, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+if not MODULE_GETATTR:  # pragma: no cover
+    from bitsv.network.services import set_service_timeout, FullNode
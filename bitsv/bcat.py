@@ -0,0 +1,186 @@
+"""Uploads files that are too large for a single OP_RETURN using the Bcat protocol
+(https://bcat.bico.media/). Every part of the file is stored in its own transaction
+and a final Bcat transaction lists the txids of the parts in order.
+
+All transactions are funded from one fan-out transaction up front, so the parts
+spend independent outputs and can be built, signed and broadcast in parallel.
+"""
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from bitsv.network.meta import Unspent
+from bitsv.op_return import create_pushdata, get_pushdata_size
+from bitsv.transaction import (
+    DUST, LOW_R_SIGNATURE_SIZE, MAX_SIGNATURE_SIZE, MESSAGE_LIMIT, calc_fee, calc_txid,
+    create_p2pkh_transaction, estimate_tx_size
+)
+from bitsv.utils import hex_to_bytes, int_to_varint
+from bitsv.wallet import get_fee_rates
+
+BCAT_PREFIX = b'15DHFxWZJT58f9nhyGnsRBqrgwK4W6h4Up'
+BCAT_PART_PREFIX = b'1ChDHzdd1H4wSjgGMHyndZm6qxEDGjqpJL'
+BCAT_NULL = b'\x00'
+# Leaves room for the part prefix and the OP_PUSHDATA codes within MESSAGE_LIMIT
+BCAT_PART_SIZE = MESSAGE_LIMIT - 100
+DEFAULT_MAX_WORKERS = 8
+
+
+class BcatUpload:
+    """Creates (and optionally broadcasts) the transactions storing ``data`` with Bcat.
+
+    :param private_key: The key funding the upload.
+    :type private_key: :class:`~bitsv.PrivateKey`
+    :param data: The file contents. Memory-mapped files are read part by part.
+    :type data: ``bytes``, ``memoryview`` or ``mmap.mmap``
+    :param mime_type: MIME type of the file.
+    :param filename: Name of the file, or ``None``.
+    :param charset: Character set of the file, or ``None``.
+    :param info: Free text stored in the Bcat transaction.
+    :param fee: Satoshi per byte. Defaults to :func:`~bitsv.network.get_fee_quote`.
+    :param unspents: UTXOs funding the fan-out transaction. Defaults to the key's.
+    :param part_size: Number of bytes of the file stored in each part.
+    :param low_r: Whether to grind signatures to a low R value.
+    """
+
+    def __init__(self, private_key, data, mime_type='application/octet-stream', filename=None,
+                 charset=None, info='bitsv', fee=None, unspents=None, part_size=BCAT_PART_SIZE,
+                 low_r=False):
+        if not data:
+            raise ValueError('Cannot upload an empty file.')
+        if get_pushdata_size(len(BCAT_PART_PREFIX)) + get_pushdata_size(part_size) > MESSAGE_LIMIT:
+            raise ValueError('part_size cannot exceed {} bytes.'.format(BCAT_PART_SIZE))
+
+        self.private_key = private_key
+        self.data = memoryview(data)
+        self.part_size = part_size
+        self.unspents = unspents
+        self.low_r = low_r
+        self.fee, self.data_fee = get_fee_rates(fee)
+        self.n_parts = -(-len(data) // part_size)
+
+        self.header = [
+            BCAT_PREFIX,
+            info.encode('utf-8'),
+            mime_type.encode('utf-8'),
+            charset.encode('utf-8') if charset else BCAT_NULL,
+            filename.encode('utf-8') if filename else BCAT_NULL,
+            BCAT_NULL,  # flag
+        ]
+        bcat_size = sum(get_pushdata_size(len(push)) for push in self.header) + self.n_parts * 33
+        if bcat_size > MESSAGE_LIMIT:
+            raise ValueError('File too large: {} parts cannot be listed in one Bcat '
+                             'transaction.'.format(self.n_parts))
+
+        prefix_size = get_pushdata_size(len(BCAT_PART_PREFIX))
+        self.amounts = [self._get_funding(prefix_size + get_pushdata_size(self.get_part_length(i)))
+                        for i in range(self.n_parts)]
+        self.amounts.append(self._get_funding(bcat_size))
+        self.fan_out = None
+        self.part_unspents = None
+
+    def get_part_length(self, index):
+        return min(self.part_size, len(self.data) - index * self.part_size)
+
+    def _get_funding(self, pushdata_size):
+        """The fee of a transaction spending one P2PKH output to a single OP_RETURN
+        output holding ``pushdata_size`` bytes."""
+        script_size = 2 + pushdata_size  # OP_FALSE OP_RETURN + pushdata
+        op_return_size = 8 + len(int_to_varint(script_size)) + script_size
+        tx_size = estimate_tx_size(
+            1, 0, self.private_key.is_compressed(), op_return_size, 1,
+            LOW_R_SIGNATURE_SIZE if self.low_r else MAX_SIGNATURE_SIZE
+        )
+        return max(calc_fee(tx_size, self.fee, script_size, self.data_fee), DUST)
+
+    def create_fan_out(self):
+        """Creates the transaction paying one output to the key for each part and one
+        for the Bcat transaction.
+
+        :returns: The signed transaction as hex.
+        :rtype: ``str``
+        """
+        address = self.private_key.address
+        self.fan_out = self.private_key.create_transaction(
+            [(address, amount, 'satoshi') for amount in self.amounts],
+            fee=self.fee, unspents=self.unspents, low_r=self.low_r
+        )
+        txid = calc_txid(self.fan_out)
+        self.part_unspents = [Unspent(amount, 0, txid, index) for index, amount in enumerate(self.amounts)]
+        return self.fan_out
+
+    def _create_op_return(self, unspent, pushdata):
+        return create_p2pkh_transaction(
+            self.private_key, [unspent], [(pushdata, 0)], custom_pushdata=True, low_r=self.low_r
+        )
+
+    def create_part(self, index):
+        """:returns: The signed transaction storing part ``index`` as hex.
+        :rtype: ``str``
+        """
+        start = index * self.part_size
+        chunk = self.data[start:start + self.part_size].tobytes()
+        return self._create_op_return(self.part_unspents[index], create_pushdata([BCAT_PART_PREFIX, chunk]))
+
+    def create_bcat(self, part_txids):
+        """:returns: The signed Bcat transaction listing ``part_txids`` as hex.
+        :rtype: ``str``
+        """
+        pushdata = create_pushdata(self.header + [hex_to_bytes(txid) for txid in part_txids])
+        return self._create_op_return(self.part_unspents[-1], pushdata)
+
+    def create_transactions(self, max_workers=DEFAULT_MAX_WORKERS):
+        """Builds every transaction without broadcasting, signing parts in parallel.
+
+        :returns: The fan-out transaction, the parts in order and the Bcat transaction.
+        :rtype: ``list`` of ``str``
+        """
+        fan_out = self.create_fan_out()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            parts = list(executor.map(self.create_part, range(self.n_parts)))
+        return [fan_out] + parts + [self.create_bcat([calc_txid(part) for part in parts])]
+
+    def upload(self, max_workers=DEFAULT_MAX_WORKERS):
+        """Broadcasts the fan-out transaction, then builds and broadcasts at most
+        ``max_workers`` parts at a time and finally the Bcat transaction. Only one
+        part is held in memory per worker.
+
+        :raises ConnectionError: If all API services fail.
+        :returns: The txid of the Bcat transaction, which identifies the file.
+        :rtype: ``str``
+        """
+        network_api = self.private_key.network_api
+
+        if self.unspents is None:
+            self.unspents = self.private_key.get_unspents()
+
+        network_api.broadcast_tx(self.create_fan_out())
+
+        def upload_part(index):
+            part = self.create_part(index)
+            network_api.broadcast_tx(part)
+            return calc_txid(part)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            part_txids = list(executor.map(upload_part, range(self.n_parts)))
+
+        bcat = self.create_bcat(part_txids)
+        network_api.broadcast_tx(bcat)
+        return calc_txid(bcat)
+
+
+def upload_file(private_key, path, mime_type='application/octet-stream', max_workers=DEFAULT_MAX_WORKERS,
+                **kwargs):
+    """Uploads the file at ``path`` with Bcat. The file is memory-mapped rather than
+    read into memory. Takes the same keyword arguments as :class:`BcatUpload`.
+
+    :returns: The txid of the Bcat transaction, which identifies the file.
+    :rtype: ``str``
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        kwargs.setdefault('filename', os.path.basename(path))
+        upload = BcatUpload(private_key, data, mime_type=mime_type, **kwargs)
+        try:
+            return upload.upload(max_workers=max_workers)
+        finally:
+            upload.data.release()
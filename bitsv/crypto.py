@@ -1,6 +1,11 @@
 from hashlib import new, sha256 as _sha256
 
 from coincurve import PrivateKey as ECPrivateKey, PublicKey as ECPublicKey
+# coincurve has no public way to pass extra entropy to the RFC6979 nonce function:
+# sign(custom_nonce=...) takes cffi objects of its own (private) ffi instance. The
+# module has been stable across releases and setup.py pins coincurve below the
+# next major version, which has to be checked before raising the bound.
+from coincurve._libsecp256k1 import ffi
 
 
 def sha256(bytestr):
@@ -20,3 +25,21 @@ def ripemd160_sha256(bytestr):
 
 
 hash160 = ripemd160_sha256
+
+
+def has_low_r(signature):
+    """A DER signature has a low R value when R fits in 32 bytes without a padding byte."""
+    return signature[3] <= 32
+
+
+def sign_low_r(private_key, data):
+    """Signs ``data`` with an ``ECPrivateKey``, grinding the RFC6979 extra entropy
+    until R is low so the DER signature is at most 70 bytes. The counter is written
+    the same way as Bitcoin Core's wallet so signatures are reproducible."""
+    signature = private_key.sign(data)
+    counter = 0
+    while not has_low_r(signature):
+        counter += 1
+        extra_entropy = ffi.new('unsigned char[32]', counter.to_bytes(32, byteorder='little'))
+        signature = private_key.sign(data, custom_nonce=(ffi.NULL, extra_entropy))
+    return signature
@@ -1,2 +1,10 @@
 class InsufficientFunds(Exception):
     pass
+
+
+class UnconfirmedChainTooLong(Exception):
+    pass
+
+
+class InvalidWebhookSecret(Exception):
+    pass
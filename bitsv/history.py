@@ -0,0 +1,204 @@
+"""A local, persistent index of the transaction history of addresses.
+
+Each :func:`HistoryIndex.sync` only asks the network for transactions from the
+last synced block height on, and repeated scans of the same history are answered
+from a sqlite database. Only services with a server side height filter (of the
+defaults, BSVBook/Guarda) then skip downloading the older txids; WhatsOnChain and
+MatterCloud still send the full history, see
+:func:`~bitsv.network.NetworkAPI.iter_transactions`.
+"""
+import sqlite3
+import threading
+
+from bitsv.transaction import get_p2pkh_script
+from bitsv.utils import bytes_to_hex
+
+# Blocks below the synced height that are synced again, in case of a reorg.
+REORG_DEPTH = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    address TEXT NOT NULL,
+    txid TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    received INTEGER,
+    PRIMARY KEY (address, txid)
+);
+CREATE INDEX IF NOT EXISTS transactions_height ON transactions (address, height);
+CREATE TABLE IF NOT EXISTS addresses (
+    address TEXT PRIMARY KEY,
+    synced_height INTEGER NOT NULL
+);
+"""
+
+
+class HistoryIndex:
+    """Stores the txids and block heights of the transactions of addresses.
+
+    Unconfirmed transactions are stored with a height of 0 and replaced on every
+    sync, so they get their height once confirmed.
+
+    :param path: The sqlite database file. Defaults to an in-memory database.
+    :type path: ``str``
+    :param network_api: The API used by :func:`sync` and :func:`get_received`,
+                        e.g. :attr:`~bitsv.PrivateKey.network_api`.
+    :type network_api: :class:`~bitsv.network.NetworkAPI`
+    """
+
+    def __init__(self, path=':memory:', network_api=None):
+        self.network_api = network_api
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_synced_height(self, address):
+        """:returns: The block height the history of ``address`` is complete up to,
+                     or ``None`` if it was never synced.
+        :rtype: ``int``
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT synced_height FROM addresses WHERE address = ?', (address,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def add_transactions(self, address, entries, since=None):
+        """Stores ``(txid, height)`` pairs, replacing the unconfirmed transactions
+        of ``address``. Use :func:`sync` to fetch them from the network instead.
+
+        :param since: The block height ``entries`` start from. Confirmed
+                      transactions stored from this height on that are missing
+                      from ``entries``, e.g. after a reorg, are removed.
+        :type since: ``int``
+        :returns: The number of txids that were not in the index.
+        :rtype: ``int``
+        """
+        entries = list(entries)
+        with self._lock, self._connection:
+            connection = self._connection
+            known = set(txid for txid, in connection.execute(
+                'SELECT txid FROM transactions WHERE address = ?', (address,)
+            ))
+            connection.execute('DELETE FROM transactions WHERE address = ? AND height = 0', (address,))
+
+            new = set()
+            synced_height = 0
+            for txid, height in entries:
+                # INSERT OR IGNORE and UPDATE instead of an UPSERT, which needs SQLite 3.24.
+                connection.execute(
+                    'INSERT OR IGNORE INTO transactions (address, txid, height) VALUES (?, ?, ?)',
+                    (address, txid, height)
+                )
+                connection.execute(
+                    'UPDATE transactions SET height = ? WHERE address = ? AND txid = ?',
+                    (height, address, txid)
+                )
+                if txid not in known:
+                    new.add(txid)
+                synced_height = max(synced_height, height)
+
+            connection.execute(
+                'INSERT OR IGNORE INTO addresses (address, synced_height) VALUES (?, ?)',
+                (address, synced_height)
+            )
+            if since is None:
+                connection.execute(
+                    'UPDATE addresses SET synced_height = MAX(synced_height, ?) WHERE address = ?',
+                    (synced_height, address)
+                )
+            else:
+                txids = set(txid for txid, height in entries)
+                dropped = [(address, txid) for txid, in connection.execute(
+                    'SELECT txid FROM transactions WHERE address = ? AND height >= ?', (address, max(since, 1))
+                ) if txid not in txids]
+                connection.executemany('DELETE FROM transactions WHERE address = ? AND txid = ?', dropped)
+                # The synced height moves back if the top blocks were reorganized away.
+                connection.execute(
+                    'UPDATE addresses SET synced_height = (SELECT IFNULL(MAX(height), 0) FROM transactions '
+                    'WHERE address = ?) WHERE address = ?',
+                    (address, address)
+                )
+        return len(new)
+
+    def _require_network_api(self):
+        if self.network_api is None:
+            raise ValueError('HistoryIndex needs a network_api to fetch from the network.')
+
+    def sync(self, address):
+        """Fetches the transactions of ``address`` from the last synced height on
+        (less :data:`REORG_DEPTH` blocks) and stores them. Services without a
+        server side height filter still send the full history.
+
+        :raises ValueError: If the index has no ``network_api``.
+        :raises ConnectionError: If all API services fail to send the first page
+                                 of the history.
+        :returns: The number of new txids.
+        :rtype: ``int``
+        """
+        self._require_network_api()
+        synced_height = self.get_synced_height(address)
+        since = None if synced_height is None else max(synced_height - REORG_DEPTH, 0)
+        # Fetched before the lock is taken, so that readers are not blocked by the network.
+        entries = list(self.network_api.iter_transactions(address, since=since, heights=True))
+        return self.add_transactions(address, entries, since=since)
+
+    def get_transactions(self, address, since=None):
+        """Gets txids from the index without contacting the network.
+
+        :param since: Only transactions from this block height on, and unconfirmed ones.
+        :type since: ``int``
+        :returns: The txids, oldest first and unconfirmed last.
+        :rtype: ``list`` of ``str``
+        """
+        query = 'SELECT txid FROM transactions WHERE address = ?'
+        params = (address,)
+        if since is not None:
+            query += ' AND (height >= ? OR height = 0)'
+            params += (since,)
+        query += ' ORDER BY height = 0, height, txid'
+        with self._lock:
+            return [txid for txid, in self._connection.execute(query, params)]
+
+    def get_received(self, address, start_height, end_height=None):
+        """The amount paid to ``address`` by transactions confirmed in blocks
+        ``start_height`` to ``end_height`` (inclusive). The amount of each
+        transaction is looked up once and then kept in the index.
+
+        :param end_height: Defaults to the synced height.
+        :type end_height: ``int``
+        :raises ValueError: If the index has no ``network_api``.
+        :raises ConnectionError: If all API services fail.
+        :rtype: ``int``
+        """
+        self._require_network_api()
+        if end_height is None:
+            end_height = self.get_synced_height(address) or 0
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT txid, received FROM transactions WHERE address = ? AND height BETWEEN ? AND ?',
+                (address, max(start_height, 1), end_height)
+            ).fetchall()
+
+        script = bytes_to_hex(get_p2pkh_script(address))
+        total = 0
+        for txid, received in rows:
+            if received is None:
+                tx = self.network_api.get_transaction(txid)
+                received = sum(output.amount for output in tx.outputs if output.scriptpubkey == script)
+                with self._lock, self._connection:
+                    self._connection.execute(
+                        'UPDATE transactions SET received = ? WHERE address = ? AND txid = ?',
+                        (received, address, txid)
+                    )
+            total += received
+        return total
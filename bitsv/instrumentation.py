@@ -0,0 +1,169 @@
+"""Hooks reporting where time goes inside bitsv, e.g. to a metrics system.
+
+Instrumentation is off by default: every hot path only checks whether
+:data:`INSTRUMENTATION` is set. Install an :class:`Instrumentation` with
+:func:`set_instrumentation` to receive:
+
+- the duration and outcome of every provider call made by
+  :class:`~bitsv.network.NetworkAPI`, per provider and method,
+- the time taken to sign each transaction input,
+- the time taken to serialize each signed transaction,
+- the hits and misses of the exchange rate cache.
+
+:class:`PrometheusInstrumentation` (``pip install prometheus_client``) and
+:class:`OpenTelemetryInstrumentation` (``pip install opentelemetry-api``)
+export them as metrics. Their libraries are only imported when an adapter is
+created.
+"""
+
+# Outcomes of a provider call. A failed call is retried with the same provider
+# before the next provider is tried.
+OUTCOME_SUCCESS = 'success'
+OUTCOME_RETRY = 'retry'
+OUTCOME_FAILURE = 'failure'
+
+INSTRUMENTATION = None
+
+
+def set_instrumentation(instrumentation):
+    """Sets the hooks called from the hot paths of bitsv. ``None`` disables them.
+
+    :param instrumentation: E.g. a :class:`PrometheusInstrumentation`.
+    :type instrumentation: :class:`Instrumentation`
+    """
+    global INSTRUMENTATION
+    INSTRUMENTATION = instrumentation
+
+
+def get_instrumentation():
+    """:returns: The installed hooks, or ``None``.
+    :rtype: :class:`Instrumentation`
+    """
+    return INSTRUMENTATION
+
+
+class Instrumentation:
+    """Hooks that do nothing. Subclass it and override the ones of interest."""
+
+    def provider_call(self, provider, method, outcome, seconds):
+        """Called after every attempt of ``NetworkAPI`` to call a provider.
+
+        :param provider: The class of the service, e.g. 'WhatsonchainNormalised'.
+        :type provider: ``str``
+        :param method: E.g. 'get_balance'.
+        :type method: ``str``
+        :param outcome: :data:`OUTCOME_SUCCESS`, :data:`OUTCOME_RETRY` if the
+                        attempt failed and was retried, or :data:`OUTCOME_FAILURE`.
+        :type outcome: ``str``
+        :type seconds: ``float``
+        """
+
+    def input_signed(self, seconds):
+        """Called after signing a transaction input.
+
+        :type seconds: ``float``
+        """
+
+    def transaction_serialized(self, seconds, size):
+        """Called after serializing a signed transaction.
+
+        :param size: The size of the transaction in bytes.
+        :type size: ``int``
+        :type seconds: ``float``
+        """
+
+    def rate_cache(self, currency, hit):
+        """Called on every lookup of the cached exchange rates.
+
+        :type currency: ``str``
+        :param hit: Whether the cached rate was used instead of being fetched.
+        :type hit: ``bool``
+        """
+
+
+class PrometheusInstrumentation(Instrumentation):
+    """Exports the hooks as Prometheus metrics.
+
+    :param registry: Defaults to the global registry of ``prometheus_client``.
+    :param namespace: The prefix of the metric names.
+    :type namespace: ``str``
+    """
+
+    def __init__(self, registry=None, namespace='bitsv'):
+        try:
+            import prometheus_client
+        except ImportError:  # pragma: no cover
+            raise ImportError('PrometheusInstrumentation requires prometheus_client: '
+                              'pip install prometheus_client')
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+
+        self.provider_calls = prometheus_client.Histogram(
+            'provider_call_seconds', 'Duration of the calls to API providers.',
+            ('provider', 'method', 'outcome'), namespace=namespace, registry=registry
+        )
+        self.signing = prometheus_client.Histogram(
+            'input_signing_seconds', 'Duration of signing a transaction input.',
+            namespace=namespace, registry=registry
+        )
+        self.serialization = prometheus_client.Histogram(
+            'serialization_seconds', 'Duration of serializing a signed transaction.',
+            namespace=namespace, registry=registry
+        )
+        self.rate_lookups = prometheus_client.Counter(
+            'rate_cache_lookups', 'Lookups of the cached exchange rates.',
+            ('currency', 'result'), namespace=namespace, registry=registry
+        )
+
+    def provider_call(self, provider, method, outcome, seconds):
+        self.provider_calls.labels(provider, method, outcome).observe(seconds)
+
+    def input_signed(self, seconds):
+        self.signing.observe(seconds)
+
+    def transaction_serialized(self, seconds, size):
+        self.serialization.observe(seconds)
+
+    def rate_cache(self, currency, hit):
+        self.rate_lookups.labels(currency, 'hit' if hit else 'miss').inc()
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """Exports the hooks as OpenTelemetry metrics.
+
+    :param meter: Defaults to the meter 'bitsv' of the global meter provider.
+    """
+
+    def __init__(self, meter=None):
+        try:
+            from opentelemetry import metrics as opentelemetry_metrics
+        except ImportError:  # pragma: no cover
+            raise ImportError('OpenTelemetryInstrumentation requires opentelemetry-api: '
+                              'pip install opentelemetry-api')
+        if meter is None:
+            meter = opentelemetry_metrics.get_meter('bitsv')
+
+        self.provider_calls = meter.create_histogram(
+            'bitsv.provider.call.duration', unit='s', description='Duration of the calls to API providers.'
+        )
+        self.signing = meter.create_histogram(
+            'bitsv.input.signing.duration', unit='s', description='Duration of signing a transaction input.'
+        )
+        self.serialization = meter.create_histogram(
+            'bitsv.serialization.duration', unit='s', description='Duration of serializing a signed transaction.'
+        )
+        self.rate_lookups = meter.create_counter(
+            'bitsv.rate_cache.lookups', description='Lookups of the cached exchange rates.'
+        )
+
+    def provider_call(self, provider, method, outcome, seconds):
+        self.provider_calls.record(seconds, {'provider': provider, 'method': method, 'outcome': outcome})
+
+    def input_signed(self, seconds):
+        self.signing.record(seconds)
+
+    def transaction_serialized(self, seconds, size):
+        self.serialization.record(seconds)
+
+    def rate_cache(self, currency, hit):
+        self.rate_lookups.add(1, {'currency': currency, 'result': 'hit' if hit else 'miss'})
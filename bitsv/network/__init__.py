@@ -1,6 +1,19 @@
-from .fees import get_fee
+from .fees import get_fee, get_fee_quote, set_fee_provider
 from .rates import (
     currency_to_satoshi, currency_to_satoshi_cached,
     satoshi_to_currency, satoshi_to_currency_cached
 )
-from .services import NetworkAPI, FullNode
+from bitsv.utils import MODULE_GETATTR
+
+
+def __getattr__(name):
+    # The services import requests and the provider clients, so they are only
+    # imported once used.
+    if name in ('NetworkAPI', 'FullNode'):
+        from . import services
+        return getattr(services, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+if not MODULE_GETATTR:  # pragma: no cover
+    from .services import NetworkAPI, FullNode
@@ -1,16 +1,30 @@
+import json
+import logging
+from time import time
+
 # Bitcoin SV has very low fees. 1 sat / byte is basically guaranteed
 # to be included in the next block. Default is therefore set to DEFAULT_FEE_MEDIUM
 DEFAULT_FEE_FAST = 2
 DEFAULT_FEE_MEDIUM = 1
 DEFAULT_FEE_SLOW = 0.5
 
-# FIXME: Need to add in a fees API. Issue #1
-# URL = 'https://bitcoincashfees.earn.com/api/v1/fees/recommended'
+DEFAULT_FEE_CACHE_TIME = 60 * 10
+# Seconds before a failed fee quote request is tried again.
+FEE_RETRY_TIME = 30
+DEFAULT_TIMEOUT = 30
 
 FEE_SPEED_FAST = 'fast'
 FEE_SPEED_MEDIUM = 'medium'
 FEE_SPEED_SLOW = 'slow'
 
+FEE_TYPE_STANDARD = 'standard'
+FEE_TYPE_DATA = 'data'
+
+
+def set_fee_cache_time(seconds):
+    global DEFAULT_FEE_CACHE_TIME
+    DEFAULT_FEE_CACHE_TIME = seconds
+
 
 # FIXME: Not sure if this is better, bools are better, or creating its
 # own type is better.
@@ -29,3 +43,126 @@ def get_fee(speed=FEE_SPEED_MEDIUM):
         return DEFAULT_FEE_SLOW
     else:
         raise ValueError('Invalid speed argument.')
+
+
+class FeeQuote:
+    """Satoshi per byte rates quoted by a miner. ``data`` applies to the script
+    bytes of data-carrier (OP_RETURN) outputs and ``standard`` to everything else."""
+    __slots__ = ('standard', 'data')
+
+    def __init__(self, standard, data=None):
+        self.standard = standard
+        self.data = standard if data is None else data
+
+    def __eq__(self, other):
+        return self.standard == other.standard and self.data == other.data
+
+    def __repr__(self):
+        return 'FeeQuote(standard={}, data={})'.format(repr(self.standard), repr(self.data))
+
+
+class StaticFeeProvider:
+    """Always quotes the same rates. Useful offline or as a stand-in for a miner."""
+
+    def __init__(self, standard=DEFAULT_FEE_MEDIUM, data=None):
+        self.quote = FeeQuote(standard, data)
+
+    def get_fee_quote(self):
+        return self.quote
+
+
+class MAPIFeeProvider:
+    """Fetches fee quotes from a Merchant API (mAPI) ``feeQuote`` endpoint.
+
+    :param url: Base url of the merchant API, e.g. 'https://merchantapi.taal.com'
+    :type url: ``str``
+    :param token: Optional bearer token for authenticated quotes.
+    :type token: ``str``
+    """
+
+    def __init__(self, url, token=None):
+        self.url = url.rstrip('/') + '/mapi/feeQuote'
+        self.headers = {'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = 'Bearer {}'.format(token)
+
+    def get_fee_quote(self):
+        """:raises ConnectionError: If the merchant API cannot be reached.
+        :raises ValueError: If the quote is invalid.
+        :rtype: :class:`FeeQuote`
+        """
+        import requests
+
+        try:
+            r = requests.get(self.url, headers=self.headers, timeout=DEFAULT_TIMEOUT)
+            r.raise_for_status()
+            response = r.json()
+        except requests.exceptions.RequestException as e:
+            raise ConnectionError('Fee quote request failed: {}'.format(e))
+        payload = json.loads(response['payload'])
+
+        rates = {}
+        for fee in payload['fees']:
+            mining_fee = fee['miningFee']
+            if mining_fee['bytes'] <= 0:
+                raise ValueError('Invalid fee quote: {} bytes.'.format(mining_fee['bytes']))
+            rates[fee['feeType']] = mining_fee['satoshis'] / mining_fee['bytes']
+
+        return FeeQuote(rates[FEE_TYPE_STANDARD], rates.get(FEE_TYPE_DATA))
+
+
+class CachedFeeQuote:
+    __slots__ = ('quote', 'last_update', 'retry_after')
+
+    def __init__(self, quote, last_update, retry_after=0):
+        self.quote = quote
+        self.last_update = last_update
+        self.retry_after = retry_after
+
+
+FEE_PROVIDER = None
+cached_fee_quote = CachedFeeQuote(None, 0)
+
+
+def set_fee_provider(provider):
+    """Sets the source of fee quotes used when no fee is passed to a transaction.
+    ``None`` restores the static :func:`get_fee` default.
+
+    :param provider: An object with a ``get_fee_quote()`` method returning a
+                     :class:`FeeQuote`, e.g. :class:`MAPIFeeProvider`.
+    """
+    global FEE_PROVIDER
+    FEE_PROVIDER = provider
+    cached_fee_quote.quote = None
+    cached_fee_quote.retry_after = 0
+
+
+def get_fee_quote():
+    """Gets the standard and data fee rates from the configured fee provider.
+    Quotes are cached for 10 minutes by default. See :ref:`cache times`. If the
+    provider cannot be reached the last quote (or the static default) is used
+    and the provider is asked again after ``FEE_RETRY_TIME`` seconds.
+
+    :rtype: :class:`FeeQuote`
+    """
+    if FEE_PROVIDER is None:
+        return FeeQuote(get_fee())
+
+    now = time()
+
+    expired = cached_fee_quote.quote is None or now - cached_fee_quote.last_update > DEFAULT_FEE_CACHE_TIME
+
+    if expired and now >= cached_fee_quote.retry_after:
+        try:
+            cached_fee_quote.quote = FEE_PROVIDER.get_fee_quote()
+            cached_fee_quote.last_update = now
+        # OSError includes ConnectionError and the exceptions of requests, which
+        # is not imported here as a StaticFeeProvider needs no network.
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning('Fee quote unavailable, exception: {}'.format(e))
+            cached_fee_quote.retry_after = now + FEE_RETRY_TIME
+
+    if cached_fee_quote.quote is None:
+        return FeeQuote(get_fee())
+
+    return cached_fee_quote.quote
@@ -1,11 +1,23 @@
+from collections import namedtuple
+
+from bitsv.utils import bytes_to_hex, hex_to_bytes
+
 TX_TRUST_LOW = 1
 TX_TRUST_MEDIUM = 6
 TX_TRUST_HIGH = 30
 
+# The outcome of broadcasting one transaction of a batch, ``error`` is None on success
+BroadcastResult = namedtuple('BroadcastResult', ('txid', 'error'))
+
 
 class Unspent:
-    """Represents an unspent transaction output (UTXO)."""
-    __slots__ = ('amount', 'confirmations', 'txid', 'txindex')
+    """Represents an unspent transaction output (UTXO).
+
+    ``txid`` is either hex or the 32 bytes of the txid in the internal byte
+    order used inside transactions, see :attr:`txid_bytes`. The other form is
+    computed on first use and kept.
+    """
+    __slots__ = ('amount', 'confirmations', '_txid', '_txid_bytes', 'txindex')
 
     def __init__(self, amount, confirmations, txid, txindex):
         self.amount = amount
@@ -13,17 +25,46 @@ class Unspent:
         self.txid = txid
         self.txindex = txindex
 
+    @property
+    def txid(self):
+        if self._txid is None:
+            self._txid = bytes_to_hex(self._txid_bytes[::-1])
+        return self._txid
+
+    @txid.setter
+    def txid(self, txid):
+        if isinstance(txid, bytes):
+            self._txid, self._txid_bytes = None, txid
+        else:
+            self._txid, self._txid_bytes = txid, None
+
+    @property
+    def txid_bytes(self):
+        """The txid in internal byte order, as spent by transaction inputs."""
+        if self._txid_bytes is None:
+            self._txid_bytes = hex_to_bytes(self._txid)[::-1]
+        return self._txid_bytes
+
     def to_dict(self):
-        return {attr: getattr(self, attr) for attr in Unspent.__slots__}
+        return {
+            'amount': self.amount,
+            'confirmations': self.confirmations,
+            'txid': self.txid,
+            'txindex': self.txindex
+        }
 
     @classmethod
     def from_dict(cls, d):
-        return Unspent(**{attr: d[attr] for attr in Unspent.__slots__})
+        return cls(d['amount'], d['confirmations'], d['txid'], d['txindex'])
 
     def __eq__(self, other):
+        if self._txid is not None and other._txid is not None:
+            same_txid = self._txid == other._txid
+        else:
+            same_txid = self.txid_bytes == other.txid_bytes
         return (self.amount == other.amount and
                 self.confirmations == other.confirmations and
-                self.txid == other.txid and
+                same_txid and
                 self.txindex == other.txindex)
 
     def __repr__(self):
@@ -3,8 +3,7 @@ from decimal import ROUND_DOWN
 from functools import wraps
 from time import time
 
-import requests
-
+from bitsv import instrumentation
 from bitsv.utils import Decimal
 from bitsv.constants import SATOSHI, uBSV, mBSV, BSV
 
@@ -124,6 +123,8 @@ class CryptoCompareRates:
     @classmethod
     def currency_to_satoshi(cls, currency):
         upper_currency = currency.upper()
+        import requests
+
         r = requests.get(cls.SINGLE_RATE + upper_currency)
         r.raise_for_status()
         rate = r.json()[upper_currency]
@@ -229,6 +230,8 @@ class Bitfinex(CryptoCompareRates):
         satoshis_per_usd = cls.usd_to_satoshi()
 
         # Get fx rate / usd rate
+        import requests
+
         r = requests.get(cls.EXCHANGERATEAPI_ENDPOINT)
         r.raise_for_status()
         fx_rate = r.json()['rates'][USD_PAIRS[currency]]
@@ -241,6 +244,8 @@ class Bitfinex(CryptoCompareRates):
     @classmethod
     def usd_to_satoshi(cls):  # pragma: no cover
         # Special case - Uses Bitfinex to get the USD rate
+        import requests
+
         r = requests.get(cls.BITFINEX_BSVUSD_ENDPOINT)
         r.raise_for_status()
         usdbsv = r.json()['mid']
@@ -249,13 +254,23 @@ class Bitfinex(CryptoCompareRates):
         return rate
 
 
+class RequestErrors:
+    """The errors of requests after which the next rate API is tried. They are
+    looked up on first use, as importing requests is slow."""
+
+    def __get__(self, instance, owner):
+        import requests
+
+        return (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+                requests.exceptions.HTTPError)
+
+
 class RatesAPI:
     """Each method converts exactly 1 unit of the currency to the equivalent
     number of satoshi.
     """
-    IGNORED_ERRORS = (requests.exceptions.ConnectionError,
-                      requests.exceptions.Timeout,
-                      requests.exceptions.HTTPError)
+    IGNORED_ERRORS = RequestErrors()
 
     USD_RATES = [Bitfinex, CryptoCompareRates]
     EUR_RATES = [Bitfinex, CryptoCompareRates]
@@ -575,10 +590,15 @@ def currency_to_satoshi_local_cache(f):
 
         cached_rate = cached_rates[currency]
 
-        if not cached_rate.satoshis or now - cached_rate.last_update > DEFAULT_CACHE_TIME:
+        hit = cached_rate.satoshis and now - cached_rate.last_update <= DEFAULT_CACHE_TIME
+        if not hit:
             cached_rate.satoshis = EXCHANGE_RATES[currency]()
             cached_rate.last_update = now
 
+        hooks = instrumentation.INSTRUMENTATION
+        if hooks is not None:
+            hooks.rate_cache(currency, bool(hit))
+
         return int(cached_rate.satoshis * Decimal(amount))
 
     return wrapper
@@ -1,8 +1,10 @@
 import requests
 from decimal import Decimal
+from functools import partial
 
 from bitsv.network import currency_to_satoshi
 from bitsv.network.meta import Unspent
+from bitsv.network.services.pagination import PAGE_SIZE, TransactionPager
 
 # left here as a reminder to normalize get_transaction()
 from bitsv.network.transaction import Transaction, TxInput, TxOutput
@@ -20,6 +22,7 @@ class BSVBookGuardaAPI:
     - get_address_info
     - get_balance
     - get_transactions
+    - iter_transactions
     - get_transaction
     - get_unspent
     - broadcast_tx
@@ -28,7 +31,7 @@ class BSVBookGuardaAPI:
     MAIN_ADDRESS_API = MAIN_ENDPOINT + 'api/v2/address/{}'
     MAIN_ADDRESS_BALANCE = MAIN_ADDRESS_API + '?details=basic'
     MAIN_ADDRESS_TX_IDS = MAIN_ADDRESS_API + '?details=txids'
-    MAIN_TX_PULL_API = MAIN_ADDRESS_API + '?details=txids' + '?page={}'
+    MAIN_TX_PULL_API = MAIN_ADDRESS_API + '?details={}&page={}&pageSize={}'
     MAIN_UNSPENT_API = MAIN_ENDPOINT + 'api/v2/utxo/{}'
     MAIN_TX_PUSH_API = MAIN_ENDPOINT + 'api/v2/sendtx/{}'
     MAIN_TX_API = MAIN_ENDPOINT + 'api/v2/tx/{}'
@@ -47,22 +50,37 @@ class BSVBookGuardaAPI:
 
     @classmethod
     def get_transactions(cls, address):
-        """Always pages through all results - which will be very slow if the address is reused a
-        lot - heavy address reuse that goes into the thousands is outside the scope of bitsv at
-        this time"""
-        page = 1  # 1 page = 1000 txids
-        all_txids = []
-        while True:
-            r = requests.get(cls.MAIN_TX_PULL_API.format(address, page), timeout=DEFAULT_TIMEOUT)
-            r.raise_for_status()  # pragma: no cover
-            response = r.json(parse_float=Decimal)
-            for txid in response.get('txids'):
-                all_txids.append(txid)
-            if page == response['totalPages']:
-                break
-            page += 1
-
-        return all_txids
+        """Always pages through all results - use :func:`iter_transactions` to process
+        the txids of heavily reused addresses as the pages arrive"""
+        return list(cls.iter_transactions(address))
+
+    @classmethod
+    def get_history_page(cls, address, since, heights, page):
+        url = cls.MAIN_TX_PULL_API.format(address, 'txslight' if heights else 'txids', page, PAGE_SIZE)
+        if since is not None:
+            url += '&from={}'.format(since)
+        r = requests.get(url, timeout=DEFAULT_TIMEOUT)
+        r.raise_for_status()  # pragma: no cover
+        response = r.json(parse_float=Decimal)
+        if heights:
+            entries = [(tx['txid'], max(tx.get('blockHeight', 0), 0))
+                       for tx in response.get('transactions', [])]
+        else:
+            entries = [(txid, None) for txid in response.get('txids', [])]
+        return entries, page + 1 if page < response.get('totalPages', 1) else None
+
+    @classmethod
+    def iter_transactions(cls, address, since=None, cursor=None, heights=False):
+        """Iterates over the txids of an address while the next page (of 1000 txids)
+        is fetched in the background.
+
+        :param since: Only transactions from this block height on.
+        :param cursor: :attr:`~bitsv.network.services.pagination.TransactionPager.cursor`
+                       of an interrupted iteration to resume from.
+        :param heights: Whether to yield ``(txid, height)`` pairs instead.
+        :rtype: :class:`~bitsv.network.services.pagination.TransactionPager`
+        """
+        return TransactionPager(partial(cls.get_history_page, address, since, heights), 1, cursor, heights)
 
     @classmethod
     def get_transaction(cls, txid):
@@ -1,19 +1,208 @@
+import http.client
 import platform
 import os
+import threading
+import time
+from collections import OrderedDict, deque
 from functools import wraps
-from bitcoinrpc.authproxy import AuthServiceProxy
+from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException
 from bitsv.constants import BSV
-from bitsv.network.meta import Unspent
+from bitsv.network.meta import BroadcastResult, Unspent
 from bitsv.network.transaction import Transaction, TxInput, TxOutput
+from bitsv.transaction import get_batch_dependencies, get_dependency_order
 from .standardrpcmethods import standard_methods
 
 BSV_TO_SAT_MULTIPLIER = BSV
+DEFAULT_MAX_CONNECTIONS = 8
+# Idle connections older than this are checked with a `ping` before reuse.
+HEALTH_CHECK_INTERVAL = 30
+# Errors after which a connection is discarded rather than reused.
+CONNECTION_ERRORS = (OSError, http.client.HTTPException)
+# (rpchost, rpcport) -> chain reported by getblockchaininfo, shared by all FullNodes
+CHAIN_CACHE = {}
+
+
+def clear_chain_cache():
+    CHAIN_CACHE.clear()
+
+
+def is_auth_error(e):
+    """Whether a JSONRPCException is the HTTP 401 of rejected credentials."""
+    error = e.error if isinstance(e.error, dict) else {}
+    return error.get('code') == -342 and '401' in error.get('message', '')
+
+
+def bsv_to_satoshi(value):
+    return int((value * BSV_TO_SAT_MULTIPLIER).normalize())
+
+
+class RPCConnectionPool:
+    """A thread-safe pool of at most ``max_connections`` connections to one node.
+    Connections are opened on demand, checked with ``ping`` if they have been idle
+    for longer than ``HEALTH_CHECK_INTERVAL`` and discarded after connection errors.
+
+    :param uri: The RPC URI including credentials.
+    :type uri: ``str``
+    :param max_connections: The number of connections used at the same time.
+    :type max_connections: ``int``
+    """
+
+    def __init__(self, uri, max_connections=DEFAULT_MAX_CONNECTIONS):
+        self.uri = uri
+        self.max_connections = max_connections
+        self._idle = deque()  # (connection, last used)
+        self._open = 0
+        # Bumped by clear(), so that connections checked out before are not reused.
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    def connect(self):
+        return AuthServiceProxy(self.uri)
+
+    def _connect(self):
+        connection = self.connect()
+        connection._pool_generation = self._generation
+        return connection
+
+    def checkout(self, timeout=None):
+        """Takes an idle connection, opens a new one or waits for one to be checked in.
+
+        :param timeout: Seconds to wait. Waits indefinitely by default.
+        :raises TimeoutError: If no connection became available within ``timeout``.
+        """
+        with self._condition:
+            while True:
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._open < self.max_connections:
+                    self._open += 1
+                    connection, last_used = None, None
+                    break
+                if not self._condition.wait(timeout):
+                    raise TimeoutError('No RPC connection became available within {} '
+                                       'seconds.'.format(timeout))
+
+        try:
+            if connection is None:
+                return self._connect()
+            if time.monotonic() - last_used > HEALTH_CHECK_INTERVAL:
+                try:
+                    connection.ping()
+                except CONNECTION_ERRORS:
+                    connection = self._connect()
+            return connection
+        except BaseException:
+            self._discard()
+            raise
+
+    def checkin(self, connection, healthy=True):
+        """Returns a connection. Unhealthy connections and those opened before the
+        last :func:`clear` are closed instead of reused."""
+        with self._condition:
+            if not healthy or connection._pool_generation != self._generation:
+                self._open -= 1
+                self._condition.notify()
+                return
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def _discard(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def clear(self):
+        """Closes all idle connections, e.g. after the credentials changed.
+        Connections in use are closed when they are checked in."""
+        with self._condition:
+            self._generation += 1
+            self._open -= len(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+
+    def call(self, method, *args):
+        """Calls an RPC method on a pooled connection. A call that fails with a
+        connection error is retried once on another connection."""
+        for attempt in range(2):
+            connection = self.checkout()
+            try:
+                result = getattr(connection, method)(*args)
+            except CONNECTION_ERRORS:
+                self.checkin(connection, healthy=False)
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                self.checkin(connection)
+                raise
+            self.checkin(connection)
+            return result
+
+
+class PooledRPC:
+    """Routes RPC method calls, like ``AuthServiceProxy``, to the ``call`` method of
+    an :class:`RPCConnectionPool` or a :class:`FullNode`."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def __getattr__(self, method):
+        if method.startswith('__'):
+            raise AttributeError(method)
+
+        def call(*args):
+            return self.pool.call(method, *args)
+        return call
+
+
+class ParentCache:
+    """A thread-safe LRU cache of the output amounts (in satoshi) of confirmed
+    transactions, keyed by txid.
+
+    :param maxsize: The number of transactions to keep.
+    :type maxsize: ``int``
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._amounts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._amounts)
+
+    def get(self, txid):
+        with self._lock:
+            amounts = self._amounts.get(txid)
+            if amounts is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._amounts.move_to_end(txid)
+            return amounts
+
+    def put(self, txid, amounts):
+        with self._lock:
+            self._amounts[txid] = amounts
+            self._amounts.move_to_end(txid)
+            while len(self._amounts) > self.maxsize:
+                self._amounts.popitem(last=False)
+
 
 bitsv_methods = [
+    'batch',
+    'call',
+    'check_network',
+    'connect',
+    'load_cookie',
     'get_balance',
     'get_transaction',
     'get_unspents',
     'broadcast_tx',
+    'broadcast_many',
     'rpc_connect',
     'rpc_reconnect'
 ]
@@ -21,7 +210,8 @@ bitsv_methods = [
 
 class FullNode:
 
-    def __init__(self, conf_dir=None, rpcuser=None, rpcpassword=None, rpcport=None, rpchost='127.0.0.1', network="main"):
+    def __init__(self, conf_dir=None, rpcuser=None, rpcpassword=None, rpcport=None, rpchost='127.0.0.1', network="main",
+                 parent_cache_size=0, max_connections=DEFAULT_MAX_CONNECTIONS, lazy=False, verify_network=True):
         if rpcport is None:
             rpcport = {'main':8332,'test':18332,'stn':9332, 'regtest':18332}[network]
         if conf_dir is None:
@@ -39,28 +229,86 @@ class FullNode:
         elif network == 'stn':
             conf_dir = os.path.join(conf_dir, 'stn')
 
-        if rpcuser is None:
-            cookie = os.path.join(conf_dir, '.cookie')
-            with open(cookie) as f:
-                rpcuserpass = f.read()
-
         # Use cookie if no rpcuser specified
         if rpcuser:
+            self.cookie = None
             uri = "http://{}:{}@{}:{}".format(rpcuser, rpcpassword, rpchost, rpcport)
         else:
-            uri = "http://{}@{}:{}".format(rpcuserpass, rpchost, rpcport)
+            self.cookie = os.path.join(conf_dir, '.cookie')
+            uri = None
 
         self.network = network
         self.conf_dir = conf_dir
         self.uri = uri
-        self.rpc = AuthServiceProxy(self.uri)
+        # Shared by all threads, each call checks out its own connection.
+        self.pool = RPCConnectionPool(uri, max_connections)
+        self.rpc = PooledRPC(self)
         self.rpcport = rpcport
         self.rpchost = rpchost
         self.network = network
+        # Unconfirmed parents are never cached as they can be double spent.
+        self.parent_cache = ParentCache(parent_cache_size) if parent_cache_size else None
+        self.verify_network = verify_network
+        self.connected = False
+        self._connect_lock = threading.Lock()
 
-        rpcnet = self.rpc.getblockchaininfo()['chain']
-        if rpcnet != network:
-            raise ValueError("rpc server is on '%s' network, you passed '%s'" % (rpcnet, network))
+        # A lazy node reads the cookie and verifies the network on its first call instead.
+        if not lazy:
+            self.connect()
+
+    def connect(self):
+        """Reads the cookie file, if used, and checks that the node is on the
+        expected network. Lazy nodes do this on their first call.
+
+        :raises ValueError: If the node is on a different network.
+        """
+        with self._connect_lock:
+            if self.connected:
+                return
+            if self.cookie is not None:
+                self.load_cookie()
+            if self.verify_network:
+                self.check_network()
+            self.connected = True
+
+    def load_cookie(self):
+        """(Re)reads the cookie file, which the node rewrites on every start."""
+        with open(self.cookie) as f:
+            rpcuserpass = f.read().strip()
+        self.uri = "http://{}@{}:{}".format(rpcuserpass, self.rpchost, self.rpcport)
+        self.pool.uri = self.uri
+        self.pool.clear()
+
+    def check_network(self):
+        """Checks the chain of the node, which is cached for all instances
+        connecting to the same host and port.
+
+        :raises ValueError: If the node is on a different network.
+        """
+        key = (self.rpchost, self.rpcport)
+        rpcnet = CHAIN_CACHE.get(key)
+        if rpcnet is None:
+            rpcnet = self._call('getblockchaininfo')['chain']
+            CHAIN_CACHE[key] = rpcnet
+        if rpcnet != self.network:
+            raise ValueError("rpc server is on '%s' network, you passed '%s'" % (rpcnet, self.network))
+
+    def call(self, method, *args):
+        """Calls an RPC method on a pooled connection, connecting first if needed.
+        If a cookie is used and the node rejects it, the cookie is read again and
+        the call is retried once."""
+        if not self.connected:
+            self.connect()
+        return self._call(method, *args)
+
+    def _call(self, method, *args):
+        try:
+            return self.pool.call(method, *args)
+        except JSONRPCException as e:
+            if self.cookie is None or not is_auth_error(e):
+                raise
+        self.load_cookie()
+        return self.pool.call(method, *args)
 
     def __getattr__(self, rpc_method):
         return RPCMethod(rpc_method, self)
@@ -73,10 +321,12 @@ class FullNode:
         return fulllist
 
     def rpc_connect(self):
+        if not self.connected:
+            self.connect()
         return AuthServiceProxy(self.uri)
 
     def rpc_reconnect(self):
-        self.rpc = AuthServiceProxy(self.uri)
+        self.pool.clear()
 
     class Decorators:
 
@@ -96,50 +346,66 @@ class FullNode:
     def get_balance(self, address):
         return sum(unspent.amount for unspent in self.get_unspents(address))
 
+    @Decorators.handle_broken_pipe
+    def batch(self, calls):
+        """Sends several RPC calls in one JSON-RPC batch request.
+
+        :param calls: The calls in the form ``(method, *params)``, e.g.
+                      ``[('getblockcount',), ('getrawtransaction', txid, 1)]``.
+        :type calls: ``list`` of ``tuple``
+        :raises JSONRPCException: If any of the calls fails.
+        :returns: The result of each call, in order.
+        :rtype: ``list``
+        """
+        if not calls:
+            return []
+        return self.rpc.batch_([list(call) for call in calls])
+
     @Decorators.handle_broken_pipe
     def get_transaction(self, txid):
-        rawtx = self.rpc.getrawtransaction(txid)
-        txjson = self.rpc.decoderawtransaction(rawtx)
-        inputs = []
-        outputs = []
-        amount_in = 0
-        amount_out = 0
+        """Gets a transaction with the amount of each input. Every parent transaction
+        is fetched once, all in a single batch request, unless it is in the
+        ``parent_cache`` (enabled with ``parent_cache_size``).
+
+        :rtype: :class:`~bitsv.network.transaction.Transaction`
+        """
+        txjson = self.rpc.getrawtransaction(txid, 1)
+
         for vin in txjson['vin']:
             if vin.get('coinbase'):
                 raise NotImplementedError("Handling of coinbase transaction inputs not implemented")
+
+        parent_amounts = {}
+        missing = []
+        for parent_txid in {vin['txid'] for vin in txjson['vin']}:
+            amounts = self.parent_cache.get(parent_txid) if self.parent_cache is not None else None
+            if amounts is None:
+                missing.append(parent_txid)
             else:
-                src = self.rpc.getrawtransaction(vin['txid'], True)
-                src = self.rpc.decoderawtransaction(src['hex'])
-                src = src['vout'][vin['vout']]
-                addr = None
-                if 'addresses' in src['scriptPubKey']:
-                    addr = src['scriptPubKey']['addresses'][0]
-                amount = int((src['value'] * BSV_TO_SAT_MULTIPLIER).normalize())
-                amount_in += amount
-                part = TxInput(addr, amount)
-                inputs += [part]
-
-        for vout in txjson['vout']:
-            addr = None
-            if 'addresses' in vout['scriptPubKey']:
-                addr = vout['scriptPubKey']['addresses'][0]
-            amount = int((vout['value'] * BSV_TO_SAT_MULTIPLIER).normalize())
-            amount_out += amount
-            part = TxOutput(addr, amount, asm=vout['scriptPubKey']['asm'])
-            outputs += [part]
-
-        tx = Transaction(txjson['txid'], amount_in, amount_out)
-        for part in inputs:
-            tx.add_input(part)
-        for part in outputs:
-            tx.add_output(part)
-        return tx
+                parent_amounts[parent_txid] = amounts
+
+        parents = self.batch([('getrawtransaction', parent_txid, 1) for parent_txid in missing])
+        for parent_txid, parent in zip(missing, parents):
+            amounts = [bsv_to_satoshi(vout['value']) for vout in parent['vout']]
+            parent_amounts[parent_txid] = amounts
+            if self.parent_cache is not None and parent.get('confirmations', 0) > 0:
+                self.parent_cache.put(parent_txid, amounts)
+
+        inputs = [
+            TxInput(vin['txid'], vin['vout'], amount=parent_amounts[vin['txid']][vin['vout']])
+            for vin in txjson['vin']
+        ]
+        outputs = [
+            TxOutput(vout['scriptPubKey']['hex'], bsv_to_satoshi(vout['value']))
+            for vout in txjson['vout']
+        ]
+        return Transaction(txjson['txid'], inputs, outputs)
 
     @Decorators.handle_broken_pipe
     def get_unspents(self, address):
         unspents = self.rpc.listunspent(0, 9999999, [address], True)
         return [Unspent(
-            amount=int((tx['amount'] * BSV_TO_SAT_MULTIPLIER).normalize()),
+            amount=bsv_to_satoshi(tx['amount']),
             confirmations=tx['confirmations'],
             txid=tx['txid'],
             txindex=tx['vout']
@@ -149,6 +415,26 @@ class FullNode:
     def broadcast_tx(self, tx_hex):
         return self.rpc.sendrawtransaction(tx_hex, True)
 
+    @Decorators.handle_broken_pipe
+    def broadcast_many(self, tx_hexes):
+        """Submits a batch of transactions with a single ``sendrawtransactions`` call,
+        ordered so that parents precede the transactions spending them.
+
+        :returns: The result of each transaction in the order of ``tx_hexes``.
+        :rtype: ``list`` of :class:`~bitsv.network.meta.BroadcastResult`
+        """
+        txids, parents = get_batch_dependencies(tx_hexes)
+        response = self.rpc.sendrawtransactions([
+            {'hex': tx_hexes[index], 'allowhighfees': True} for index in get_dependency_order(parents)
+        ])
+
+        errors = {}
+        for txid in response.get('evicted', []):
+            errors[txid] = 'Evicted from the mempool.'
+        for invalid in response.get('invalid', []):
+            errors[invalid['txid']] = '{}: {}'.format(invalid.get('reject_code'), invalid.get('reject_reason'))
+        return [BroadcastResult(txid, errors.get(txid)) for txid in txids]
+
 
 class RPCMethod:
     def __init__(self, rpc_method, host):
@@ -162,10 +448,5 @@ class RPCMethod:
             raise AttributeError("No such method: {} exists".format(rpc_method))
 
     def __call__(self, *args):
-        try:
-            result = getattr(self._host.rpc, self._rpc_method)(*args)
-            return result
-        except BrokenPipeError:  # TODO add logging
-            self._host.rpc = self._host.rpc_connect()  # reconnect and try again
-            result = getattr(self._host.rpc, self._rpc_method)(*args)
-            return result
+        # The connection pool reconnects after a broken pipe.
+        return getattr(self._host.rpc, self._rpc_method)(*args)
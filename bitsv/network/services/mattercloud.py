@@ -1,11 +1,14 @@
 import json
+from functools import partial
 
 import requests
 
 from bitsv.network.meta import Unspent
+from bitsv.network.services.pagination import PAGE_SIZE, TransactionPager
 from bitsv.network.transaction import Transaction, TxInput, TxOutput
 
 MATTERCLOUD_API_KEY_VARNAME = 'MATTERCLOUD_API_KEY'
+WEBHOOK_ADDRESS_BATCH_SIZE = 1000
 
 
 def woc_tx_to_transaction(response):
@@ -23,6 +26,20 @@ def woc_tx_to_transaction(response):
     return tx
 
 
+def mattercloud_tx_to_transaction(response):
+    tx_inputs = []
+    for vin in response['vin']:
+        tx_input = TxInput(vin['txid'], vin['vout'])
+        tx_inputs.append(tx_input)
+
+    tx_outputs = []
+    for vout in response['vout']:
+        tx_output = TxOutput(scriptpubkey=vout['scriptPubKey']['hex'], amount=vout['valueSat'])
+        tx_outputs.append(tx_output)
+    tx = Transaction(response['txid'], tx_inputs, tx_outputs)
+    return tx
+
+
 class MatterCloud:
     """
     Implements version 3 of the MatterCloud API
@@ -105,6 +122,25 @@ class MatterCloud:
         r.raise_for_status()
         return r.json()['transactions']
 
+    def get_history_page(self, address, since, from_index):
+        response = self.get_transactions_detailed(address, from_index, from_index + PAGE_SIZE)
+        entries = [(tx['txid'], max(tx.get('blockheight', 0) or 0, 0)) for tx in response['items']]
+        if since is not None:
+            entries = [entry for entry in entries if entry[1] >= since or entry[1] == 0]
+        to_index = response['to']
+        return entries, to_index if response['items'] and to_index < response['totalItems'] else None
+
+    def iter_transactions(self, address, since=None, cursor=None, heights=False):
+        """
+        Iterate over the txids of an address while the next page is fetched in the background
+
+        :param address: Address to get transactions for
+        :param since: Only transactions from this block height on (and unconfirmed ones)
+        :param cursor: Cursor of an interrupted iteration to resume from
+        :param heights: Yield (txid, height) pairs instead of txids
+        """
+        return TransactionPager(partial(self.get_history_page, address, since), 0, cursor, heights)
+
     def get_transactions_detailed(
         self,
         address,
@@ -164,19 +200,7 @@ class MatterCloud:
             headers=self.headers,
         )
         r.raise_for_status()
-        response = r.json()
-
-        tx_inputs = []
-        for vin in response['vin']:
-            tx_input = TxInput(vin['txid'], vin['vout'])
-            tx_inputs.append(tx_input)
-
-        tx_outputs = []
-        for vout in response['vout']:
-            tx_output = TxOutput(scriptpubkey=vout['scriptPubKey']['hex'], amount=vout['valueSat'])
-            tx_outputs.append(tx_output)
-        tx = Transaction(response['txid'], tx_inputs, tx_outputs)
-        return tx
+        return mattercloud_tx_to_transaction(r.json())
 
     def raw_get_transaction(self, transaction_id):
         """raw version of get_transaction(). Gives un-altered return value of API
@@ -396,6 +420,28 @@ class MatterCloud:
         r.raise_for_status()
         return r.json()
 
+    def update_webhook_monitored_addresses_bulk(self, addresses, batch_size=WEBHOOK_ADDRESS_BATCH_SIZE):
+        """
+        Update monitored addresses and xpubs with one request per ``batch_size``
+        addresses instead of one per address
+
+        :param addresses: Addresses or xpub keys to track and monitor
+        :param batch_size: Number of addresses sent per request. Default: 1000.
+        :returns: The response of each request
+        """
+        addresses = list(addresses)
+        responses = []
+        with requests.Session() as session:
+            for i in range(0, len(addresses), batch_size):
+                r = session.put(
+                    'https://api.mattercloud.net/api/v3/{}/webhook/monitored_addrs'.format(self.network),
+                    data=json.dumps({'addr': ','.join(addresses[i:i + batch_size])}),
+                    headers=self.authorized_headers,
+                )
+                r.raise_for_status()
+                responses.append(r.json())
+        return responses
+
 
 class MatterCloudMainNet(MatterCloud):
     """
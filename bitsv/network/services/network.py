@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from functools import wraps
 
 import requests
@@ -6,13 +7,18 @@ import time
 import collections
 import logging
 
+from bitsv import instrumentation
+from bitsv.network.meta import BroadcastResult
+from bitsv.transaction import get_batch_dependencies
 from .whatsonchain import WhatsonchainNormalised
 
 from .mattercloud import MatterCloud, MATTERCLOUD_API_KEY_VARNAME
 from .bsvbookguarda import BSVBookGuardaAPI
+from .pagination import TransactionPager
 
 DEFAULT_TIMEOUT = 30
 DEFAULT_RETRY = 3
+DEFAULT_BROADCAST_WORKERS = 8
 IGNORED_ERRORS = (ConnectionError,
                   requests.exceptions.ConnectionError,
                   requests.exceptions.Timeout,
@@ -100,14 +106,53 @@ class NetworkAPI:
     def retry_wrapper_call(self, api_call, param):
         return api_call(param)
 
-    def invoke_api_call(self, call_list, param):
-        """Tries to invoke all api, raise exception if all fail."""
+    def instrumented_call(self, hooks, api_call, param):
+        """Calls :func:`retry_wrapper_call` reporting every attempt to ``hooks``."""
+        instance = getattr(api_call, '__self__', None)
+        qualname = getattr(api_call, '__qualname__', None)
+        if qualname:
+            provider, _, method = qualname.rpartition('.')
+        else:
+            # E.g. functools.partial or another callable object.
+            provider, method = '', getattr(api_call, '__name__', repr(api_call))
+        if instance is not None:
+            # The qualname names the class defining the method, which may be a base
+            # class. Bound classmethods have the class itself as __self__.
+            provider = instance.__name__ if isinstance(instance, type) else type(instance).__name__
+        attempts = []
+
+        def timed_call(param):
+            start = time.perf_counter()
+            try:
+                return api_call(param)
+            finally:
+                attempts.append(time.perf_counter() - start)
+
+        outcome = instrumentation.OUTCOME_FAILURE
+        try:
+            result = self.retry_wrapper_call(timed_call, param)
+            outcome = instrumentation.OUTCOME_SUCCESS
+            return result
+        finally:
+            # All attempts but the last one failed and were retried.
+            for seconds in attempts[:-1]:
+                hooks.provider_call(provider, method, instrumentation.OUTCOME_RETRY, seconds)
+            if attempts:
+                hooks.provider_call(provider, method, outcome, attempts[-1])
+
+    def invoke_api_call(self, call_list, param, rotate=True):
+        """Tries to invoke all api, raise exception if all fail. Unless ``rotate``
+        is false, a failing api is moved to the end of ``list_of_apis``."""
+        hooks = instrumentation.INSTRUMENTATION
         for api_call in call_list:
             try:
+                if hooks is not None:
+                    return self.instrumented_call(hooks, api_call, param)
                 return self.retry_wrapper_call(api_call, param)
             except IGNORED_ERRORS as e:
                 # TODO: Write a log here to notify the system has changed the default service.
-                self.list_of_apis.rotate(-1)
+                if rotate:
+                    self.list_of_apis.rotate(-1)
                 if call_list[-1] == api_call:   # All api iterated.
                     raise ConnectionError('All APIs are unreachable, exception:' + str(e))
 
@@ -133,6 +178,40 @@ class NetworkAPI:
         call_list = [api.get_transactions for api in self.list_of_apis]
         return self.invoke_api_call(call_list, address)
 
+    def iter_transactions(self, address, since=None, cursor=None, heights=False):
+        """Iterates over the IDs of the transactions related to an address as the
+        pages arrive, fetching the next page in the background.
+
+        The first page is fetched straight away, moving on to the next service
+        if it fails. The iteration then uses that service throughout, so a
+        ``cursor`` can only be resumed while the same service is first in line,
+        and errors on later pages are raised as they are.
+
+        WhatsOnChain and MatterCloud have no server side ``since`` filter: they
+        send the full history, which is then filtered here.
+
+        :param address: The address in question.
+        :type address: ``str``
+        :param since: Only transactions from this block height on, and unconfirmed ones.
+        :type since: ``int``
+        :param cursor: :attr:`~bitsv.network.services.pagination.TransactionPager.cursor`
+                       of an interrupted iteration to resume from.
+        :param heights: Whether to yield ``(txid, height)`` pairs instead of txids.
+                        Unconfirmed transactions have a height of 0.
+        :type heights: ``bool``
+        :raises ConnectionError: If all API services fail to send the first page.
+        :rtype: :class:`~bitsv.network.services.pagination.TransactionPager`
+        """
+        for api in list(self.list_of_apis):
+            pager = api.iter_transactions(address, since=since, cursor=cursor, heights=heights)
+            try:
+                self.retry_wrapper_call(TransactionPager.fetch_first, pager)
+                return pager
+            except IGNORED_ERRORS as e:
+                self.list_of_apis.rotate(-1)
+                error = e
+        raise ConnectionError('All APIs are unreachable, exception:' + str(error))
+
     def get_transaction(self, txid):
         """Gets the full transaction details.
 
@@ -165,3 +244,61 @@ class NetworkAPI:
         call_list = [api.send_transaction for api in self.list_of_apis]
         tx_id = self.invoke_api_call(call_list, tx_hex)
         return tx_id
+
+    def broadcast_many(self, tx_hexes, max_workers=DEFAULT_BROADCAST_WORKERS):
+        """Broadcasts a batch of transactions. A transaction spending an output of
+        another one in the batch is only broadcast once its parent succeeded, all
+        others are broadcast in parallel.
+
+        :param tx_hexes: Signed transactions in hex form, in any order.
+        :type tx_hexes: ``list`` of ``str``
+        :param max_workers: The number of transactions broadcast at the same time.
+        :type max_workers: ``int``
+        :returns: The result of each transaction in the order of ``tx_hexes``.
+        :rtype: ``list`` of :class:`~bitsv.network.meta.BroadcastResult`
+        """
+        txids, parents = get_batch_dependencies(tx_hexes)
+        children = [[] for _ in tx_hexes]
+        for index, tx_parents in enumerate(parents):
+            for parent in tx_parents:
+                children[parent].append(index)
+        waiting = [len(tx_parents) for tx_parents in parents]
+        results = [None] * len(tx_hexes)
+        # The workers share a copy of the providers and leave list_of_apis alone,
+        # which is not safe to rotate from several threads.
+        call_list = [api.send_transaction for api in self.list_of_apis]
+
+        def broadcast(index):
+            return self.invoke_api_call(call_list, tx_hexes[index], rotate=False)
+
+        def fail_descendants(index):
+            stack = [index]
+            while stack:
+                parent = stack.pop()
+                for child in children[parent]:
+                    if results[child] is None:
+                        results[child] = BroadcastResult(
+                            txids[child], 'Parent {} was not broadcast.'.format(txids[parent]))
+                        stack.append(child)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(broadcast, index): index
+                       for index, count in enumerate(waiting) if count == 0}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        results[index] = BroadcastResult(txids[index], str(e))
+                        fail_descendants(index)
+                        continue
+
+                    results[index] = BroadcastResult(txids[index], None)
+                    for child in children[index]:
+                        waiting[child] -= 1
+                        if waiting[child] == 0 and results[child] is None:
+                            pending[executor.submit(broadcast, child)] = child
+
+        return results
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = 1000
+
+
+class TransactionPager:
+    """Iterates over the transaction history of an address page by page.
+
+    The next page is fetched in a background thread while the current one is
+    consumed, so at most two pages are held in memory. :attr:`cursor` is updated
+    as txids are yielded and can be passed back to resume an interrupted
+    iteration with the same service.
+
+    :param get_page: Called with the cursor of a page. Returns the ``(txid, height)``
+                     pairs of the page, with a height of 0 for unconfirmed
+                     transactions, and the cursor of the next page or ``None``.
+    :param first_page: The cursor of the first page.
+    :param cursor: A :attr:`cursor` of an earlier iteration to resume from.
+    :type cursor: ``tuple``
+    :param heights: Whether to yield ``(txid, height)`` pairs instead of txids.
+    :type heights: ``bool``
+    """
+
+    def __init__(self, get_page, first_page, cursor=None, heights=False):
+        self.get_page = get_page
+        self.cursor = (first_page, 0) if cursor is None else tuple(cursor)
+        self.heights = heights
+        self._first = None
+
+    def fetch_first(self):
+        """Fetches the page of :attr:`cursor` right away instead of when the
+        iteration starts, so that an unreachable service fails here."""
+        self._first = self.get_page(self.cursor[0])
+
+    def __iter__(self):
+        page, offset = self.cursor
+        first, self._first = self._first, None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if first is None:
+                future = executor.submit(self.get_page, page)
+            while True:
+                if first is None:
+                    entries, next_page = future.result()
+                else:
+                    entries, next_page = first
+                    first = None
+                if next_page is not None:
+                    future = executor.submit(self.get_page, next_page)
+
+                for i in range(offset, len(entries)):
+                    self.cursor = (page, i + 1)
+                    yield entries[i] if self.heights else entries[i][0]
+
+                if next_page is None:
+                    return
+                page, offset = next_page, 0
+                self.cursor = (page, 0)
@@ -0,0 +1,180 @@
+"""Receives the payment webhooks of MatterCloud.
+
+Configure the endpoint with :func:`~bitsv.network.services.MatterCloud.update_webhook_config`
+and register the addresses with :func:`MatterCloudWebhook.register`. MatterCloud
+then posts every transaction involving a monitored address as JSON, in the
+format of its ``tx/{txid}`` endpoint, together with the configured ``secret``.
+The secret is accepted in the body or as a ``secret`` query parameter.
+
+:class:`MatterCloudWebhook` is both a WSGI application and, through
+:func:`MatterCloudWebhook.asgi`, an ASGI application, so it can be mounted in
+an existing web app or served on its own::
+
+    from wsgiref.simple_server import make_server
+    make_server('', 8080, webhook).serve_forever()
+"""
+import hmac
+import json
+import logging
+from urllib.parse import parse_qs
+
+from bitsv.exceptions import InvalidWebhookSecret
+from bitsv.format import address_to_public_key_hash
+from bitsv.network.meta import Unspent
+from bitsv.network.services.mattercloud import mattercloud_tx_to_transaction
+from bitsv.network.services.zmqsubscriber import get_p2pkh_hash160
+from bitsv.utils import hex_to_bytes
+from bitsv.utxo import UnspentCache
+
+STATUS_TEXT = {
+    200: '200 OK',
+    400: '400 Bad Request',
+    403: '403 Forbidden',
+    405: '405 Method Not Allowed',
+}
+
+
+class MatterCloudWebhook:
+    """Keeps an :class:`~bitsv.utxo.UnspentCache` of the watched addresses up to
+    date from the webhooks of MatterCloud.
+
+    Outputs paying a watched address are added to the cache and inputs spending a
+    cached UTXO remove it, so :func:`~bitsv.utxo.UnspentCache.get_balance` stays
+    current as well.
+
+    :param secret: The secret set with
+                   :func:`~bitsv.network.services.MatterCloud.update_webhook_config`.
+    :type secret: ``str``
+    :param watch: Addresses to watch.
+    :param cache: Defaults to a new :class:`~bitsv.utxo.UnspentCache`.
+    :param on_transaction: Called with the :class:`~bitsv.network.transaction.Transaction`
+                           and the list of new :class:`~bitsv.network.meta.Unspent`
+                           for every accepted webhook, e.g. to invalidate other caches.
+    """
+
+    def __init__(self, secret, watch=(), cache=None, on_transaction=None):
+        if not secret:
+            raise ValueError('A webhook secret is required.')
+        self.secret = secret.encode('utf-8')
+        self.watched = {}  # hash160 -> address
+        self.cache = UnspentCache() if cache is None else cache
+        self.on_transaction = on_transaction
+        self.watch(watch)
+
+    def watch(self, addresses):
+        """Starts matching outputs paying ``addresses``.
+
+        :type addresses: ``list`` of ``str``
+        """
+        for address in addresses:
+            self.watched[address_to_public_key_hash(address)] = address
+
+    def register(self, api, batch_size=None):
+        """Registers every watched address with MatterCloud in bulk.
+
+        :type api: :class:`~bitsv.network.services.MatterCloud`
+        """
+        kwargs = {} if batch_size is None else {'batch_size': batch_size}
+        return api.update_webhook_monitored_addresses_bulk(list(self.watched.values()), **kwargs)
+
+    def check_secret(self, secret):
+        """:raises InvalidWebhookSecret: If ``secret`` does not match."""
+        if not isinstance(secret, str) or not hmac.compare_digest(secret.encode('utf-8'), self.secret):
+            raise InvalidWebhookSecret('The webhook secret does not match.')
+
+    def handle_payload(self, payload):
+        """Updates the cache with a webhook payload whose secret was checked.
+
+        :param payload: The decoded JSON body.
+        :type payload: ``dict``
+        :returns: The new UTXOs paying watched addresses.
+        :rtype: ``list`` of :class:`~bitsv.network.meta.Unspent`
+        """
+        response = payload.get('tx', payload)
+        tx = mattercloud_tx_to_transaction(response)
+        confirmations = response.get('confirmations', 0)
+
+        for txin in tx.inputs:
+            self.cache.spend(txin.txid, txin.index)
+
+        unspents = []
+        for index, output in enumerate(tx.outputs):
+            hash160 = get_p2pkh_hash160(hex_to_bytes(output.scriptpubkey))
+            if hash160 in self.watched:
+                unspent = Unspent(output.amount, confirmations, tx.txid, index)
+                self.cache.add(hash160, unspent)
+                unspents.append(unspent)
+
+        if self.on_transaction is not None:
+            self.on_transaction(tx, unspents)
+        return unspents
+
+    def handle_request(self, method, query_string, body):
+        """Handles one HTTP request independently of the server interface.
+
+        :returns: The HTTP status code and the JSON response body.
+        :rtype: ``tuple`` of ``int`` and ``bytes``
+        """
+        if method != 'POST':
+            return 405, b'{"error": "method not allowed"}'
+        try:
+            # json.loads only accepts bytes from Python 3.6 on.
+            payload = json.loads(body.decode('utf-8'))
+            if not isinstance(payload, dict):
+                raise ValueError('The payload is not an object.')
+        except (UnicodeDecodeError, ValueError):
+            return 400, b'{"error": "invalid json"}'
+
+        query = parse_qs(query_string)
+        try:
+            self.check_secret(payload.get('secret', query.get('secret', [None])[0]))
+        except InvalidWebhookSecret:
+            return 403, b'{"error": "invalid secret"}'
+
+        try:
+            self.handle_payload(payload)
+        except (KeyError, TypeError, ValueError):
+            logging.exception('Failed to handle MatterCloud webhook')
+            return 400, b'{"error": "invalid transaction"}'
+        return 200, b'{"status": "ok"}'
+
+    def __call__(self, environ, start_response):
+        """The WSGI application."""
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        body = environ['wsgi.input'].read(length) if length > 0 else b''
+        status, response = self.handle_request(
+            environ.get('REQUEST_METHOD', 'GET'), environ.get('QUERY_STRING', ''), body
+        )
+        start_response(STATUS_TEXT[status], [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(response))),
+        ])
+        return [response]
+
+    async def asgi(self, scope, receive, send):
+        """The ASGI application."""
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        status, response = self.handle_request(
+            scope['method'], scope.get('query_string', b'').decode('latin-1'), body
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(response)).encode('latin-1')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': response})
@@ -1,9 +1,11 @@
+from functools import partial
 from typing import List
 
 from whatsonchain.api import Whatsonchain
 
 from bitsv.constants import BSV
 from bitsv.network.meta import Unspent
+from bitsv.network.services.pagination import TransactionPager
 from bitsv.network.transaction import TxInput, TxOutput, Transaction
 
 
@@ -48,6 +50,16 @@ class WhatsonchainNormalised(Whatsonchain):
         hist = self.get_history(address)
         return [tx['tx_hash'] for tx in hist]
 
+    def get_history_page(self, address: str, since, page):
+        # The history is not paginated, it arrives as a single page.
+        entries = [(tx['tx_hash'], max(tx['height'], 0)) for tx in self.get_history(address)]
+        if since is not None:
+            entries = [entry for entry in entries if entry[1] >= since or entry[1] == 0]
+        return entries, None
+
+    def iter_transactions(self, address: str, since=None, cursor=None, heights=False) -> TransactionPager:
+        return TransactionPager(partial(self.get_history_page, address, since), 0, cursor, heights)
+
     def get_transaction(self, txid: str) -> Transaction:
         response = self.get_transaction_by_hash(txid)
         return woc_tx_to_transaction(response)
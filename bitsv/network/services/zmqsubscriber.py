@@ -0,0 +1,171 @@
+"""Push notifications from a node's ZMQ interface. Requires pyzmq:
+
+    pip install pyzmq
+
+Start the node with ``zmqpubrawtx`` (and optionally ``zmqpubhashblock``), e.g.
+``-zmqpubrawtx=tcp://127.0.0.1:28332 -zmqpubhashblock=tcp://127.0.0.1:28332``.
+"""
+import logging
+import threading
+
+from bitsv.format import address_to_public_key_hash
+from bitsv.network.meta import Unspent
+from bitsv.transaction import (
+    OP_CHECKSIG, OP_DUP, OP_EQUALVERIFY, OP_HASH160, OP_PUSH_20, calc_txid, deserialize_tx
+)
+from bitsv.utils import bytes_to_hex
+from bitsv.utxo import UnspentCache
+
+try:
+    import zmq
+except ImportError:  # pragma: no cover
+    zmq = None
+
+TOPIC_RAWTX = b'rawtx'
+TOPIC_HASHBLOCK = b'hashblock'
+P2PKH_PREFIX = OP_DUP + OP_HASH160 + OP_PUSH_20
+P2PKH_SUFFIX = OP_EQUALVERIFY + OP_CHECKSIG
+POLL_TIMEOUT = 100  # milliseconds between checks whether to stop
+
+
+def require_zmq():
+    if zmq is None:
+        raise ImportError('ZMQSubscriber requires pyzmq: pip install pyzmq')
+
+
+def get_p2pkh_hash160(script):
+    """Returns the hash160 paid by a P2PKH output script, or ``None``."""
+    if len(script) == 25 and script[:3] == P2PKH_PREFIX and script[23:] == P2PKH_SUFFIX:
+        return script[3:23]
+    return None
+
+
+class ZMQSubscriber:
+    """Keeps an :class:`~bitsv.utxo.UnspentCache` of the watched addresses up to
+    date from the raw transactions and block hashes published by a node.
+
+    Outputs paying a watched hash160 are added to the cache as unconfirmed and
+    inputs spending a cached UTXO remove it. With a ``node`` the transactions of
+    every new block are fetched to update confirmations.
+
+    :param address: The ZMQ endpoint of ``zmqpubrawtx``.
+    :type address: ``str``
+    :param hashblock_address: The endpoint of ``zmqpubhashblock``. Defaults to ``address``.
+    :type hashblock_address: ``str``
+    :param watch: Addresses (``str``) or hash160s (``bytes``) to watch.
+    :param cache: Defaults to a new :class:`~bitsv.utxo.UnspentCache`.
+    :param node: Used to look up the transactions of new blocks.
+    :type node: :class:`~bitsv.network.FullNode`
+    :param on_transaction: Called with the txid and the list of new
+                           :class:`~bitsv.network.meta.Unspent` for every
+                           transaction paying a watched hash160.
+    :param on_block: Called with the hash of every new block.
+    """
+
+    def __init__(self, address, hashblock_address=None, watch=(), cache=None, node=None,
+                 on_transaction=None, on_block=None):
+        self.addresses = {address, hashblock_address or address}
+        self.watched = set()
+        self.cache = UnspentCache() if cache is None else cache
+        self.node = node
+        self.on_transaction = on_transaction
+        self.on_block = on_block
+        for item in watch:
+            self.watch(item)
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, address):
+        """Starts matching outputs paying ``address``.
+
+        :param address: An address or its hash160.
+        :type address: ``str`` or ``bytes``
+        """
+        self.watched.add(address_to_public_key_hash(address) if isinstance(address, str) else bytes(address))
+
+    def handle_rawtx(self, rawtx):
+        """Updates the cache with a raw transaction.
+
+        :returns: The new UTXOs paying watched hash160s.
+        :rtype: ``list`` of :class:`~bitsv.network.meta.Unspent`
+        """
+        tx = deserialize_tx(rawtx)
+        txid = calc_txid(bytes_to_hex(rawtx))
+
+        for txin in tx.inputs:
+            self.cache.spend(bytes_to_hex(txin.txid[::-1]), int.from_bytes(txin.txindex, 'little'))
+
+        unspents = []
+        for index, output in enumerate(tx.outputs):
+            hash160 = get_p2pkh_hash160(output.script)
+            if hash160 in self.watched:
+                unspent = Unspent(output.amount, 0, txid, index)
+                self.cache.add(hash160, unspent)
+                unspents.append(unspent)
+
+        if unspents and self.on_transaction is not None:
+            self.on_transaction(txid, unspents)
+        return unspents
+
+    def handle_hashblock(self, block_hash):
+        """Updates confirmations for a new block, if a ``node`` was given.
+
+        :param block_hash: The block hash as published, in RPC byte order.
+        :type block_hash: ``bytes``
+        """
+        block_hash = bytes_to_hex(block_hash)
+        if self.node is not None:
+            self.cache.add_block(self.node.getblock(block_hash, 1)['tx'])
+        if self.on_block is not None:
+            self.on_block(block_hash)
+
+    def handle_message(self, frames):
+        """Dispatches a multipart message ``[topic, body, sequence]``."""
+        topic, body = frames[0], frames[1]
+        if topic == TOPIC_RAWTX:
+            return self.handle_rawtx(body)
+        elif topic == TOPIC_HASHBLOCK:
+            return self.handle_hashblock(body)
+
+    def run(self):
+        """Receives and handles messages until :func:`stop` is called. Malformed
+        messages are logged and skipped."""
+        require_zmq()
+        socket = zmq.Context.instance().socket(zmq.SUB)
+        try:
+            socket.setsockopt(zmq.SUBSCRIBE, TOPIC_RAWTX)
+            socket.setsockopt(zmq.SUBSCRIBE, TOPIC_HASHBLOCK)
+            for address in self.addresses:
+                socket.connect(address)
+
+            while not self._stop.is_set():
+                if not socket.poll(POLL_TIMEOUT):
+                    continue
+                frames = socket.recv_multipart()
+                try:
+                    self.handle_message(frames)
+                except Exception:
+                    logging.exception('Failed to handle ZMQ message %r', frames[0])
+        finally:
+            socket.close(linger=0)
+
+    def start(self):
+        """Runs :func:`run` in a background thread."""
+        require_zmq()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -22,9 +22,10 @@ class TxInput:
     Representation of a single input
     """
 
-    def __init__(self, txid, index):
+    def __init__(self, txid, index, amount=None):
         self.txid = txid
         self.index = index
+        self.amount = amount  # satoshis of the spent output, if known
 
     def __repr__(self):
         return "Input(txid={}, index={})".format(self.txid, self.index)
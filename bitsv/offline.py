@@ -0,0 +1,92 @@
+"""A compact binary format carrying many unsigned transactions to an offline signer.
+
+Every transaction is stored with its inputs (outpoint and amount) and its
+serialized outputs, so the signer neither parses JSON nor decodes addresses::
+
+    magic 'BSVB' | version | varint count | transaction ...
+
+    transaction: flags | varint n_inputs | (txid[32] index[4] amount[8]) ...
+                 | varint n_outputs | varint len(outputs) | outputs
+
+Txids are in internal byte order and integers are little-endian. Bit 0 of the
+flags asks for low R signatures.
+"""
+from collections import namedtuple
+
+from bitsv.transaction import TxIn, construct_output_block
+from bitsv.utils import int_to_varint, varint_to_int
+
+BATCH_MAGIC = b'BSVB'
+BATCH_VERSION = b'\x01'
+FLAG_LOW_R = 0x01
+INPUT_SIZE = 32 + 4 + 8
+
+PreparedTransaction = namedtuple('PreparedTransaction', ('inputs', 'output_count', 'output_block', 'low_r'))
+
+
+def prepare_transaction_data(unspents, outputs, custom_pushdata=False, low_r=False):
+    """Converts the result of :func:`~bitsv.transaction.sanitize_tx_data` into
+    a :class:`PreparedTransaction`.
+
+    :rtype: :class:`PreparedTransaction`
+    """
+    inputs = [
+        TxIn(b'', 0, unspent.txid_bytes, unspent.txindex.to_bytes(4, byteorder='little'),
+             unspent.amount.to_bytes(8, byteorder='little'))
+        for unspent in unspents
+    ]
+    return PreparedTransaction(inputs, len(outputs), construct_output_block(outputs, custom_pushdata), low_r)
+
+
+def serialize_batch(transactions):
+    """:param transactions: The transactions to sign.
+    :type transactions: ``list`` of :class:`PreparedTransaction`
+    :rtype: ``bytes``
+    """
+    parts = [BATCH_MAGIC, BATCH_VERSION, int_to_varint(len(transactions))]
+    for tx in transactions:
+        parts.append(bytes((FLAG_LOW_R if tx.low_r else 0,)))
+        parts.append(int_to_varint(len(tx.inputs)))
+        parts.extend(txin.txid + txin.txindex + txin.amount for txin in tx.inputs)
+        parts.append(int_to_varint(tx.output_count))
+        parts.append(int_to_varint(len(tx.output_block)))
+        parts.append(tx.output_block)
+    return b''.join(parts)
+
+
+def deserialize_batch(data):
+    """:param data: Output of :func:`serialize_batch`.
+    :type data: ``bytes``
+    :raises ValueError: If ``data`` is not a valid batch.
+    :rtype: ``list`` of :class:`PreparedTransaction`
+    """
+    data = memoryview(data)
+    if bytes(data[:4]) != BATCH_MAGIC or bytes(data[4:5]) != BATCH_VERSION:
+        raise ValueError('Not a transaction batch of version {}.'.format(BATCH_VERSION[0]))
+
+    try:
+        count, offset = varint_to_int(data, 5)
+        transactions = []
+        for _ in range(count):
+            flags = data[offset]
+            n_inputs, offset = varint_to_int(data, offset + 1)
+            if offset + n_inputs * INPUT_SIZE > len(data):
+                raise IndexError
+            inputs = []
+            for _ in range(n_inputs):
+                inputs.append(TxIn(b'', 0, bytes(data[offset:offset + 32]), bytes(data[offset + 32:offset + 36]),
+                                   bytes(data[offset + 36:offset + INPUT_SIZE])))
+                offset += INPUT_SIZE
+            output_count, offset = varint_to_int(data, offset)
+            size, offset = varint_to_int(data, offset)
+            output_block = bytes(data[offset:offset + size])
+            offset += size
+            if len(output_block) != size:
+                raise IndexError
+            transactions.append(PreparedTransaction(inputs, output_count, output_block, bool(flags & FLAG_LOW_R)))
+    except IndexError:
+        raise ValueError('The transaction batch is truncated.')
+
+    if offset != len(data):
+        raise ValueError('The transaction batch has {} trailing bytes.'.format(len(data) - offset))
+    return transactions
@@ -17,10 +17,92 @@ def get_op_pushdata_code(data):
         return OP_PUSHDATA4 + length_data.to_bytes(4, byteorder='little')  # OP_PUSHDATA4 format
 
 
+def get_pushdata_size(length):
+    """Size of a single push of ``length`` bytes including its op code."""
+    if length < 0x4c:
+        return 1 + length
+    elif length <= 0xff:
+        return 2 + length
+    elif length <= 0xffff:
+        return 3 + length
+    else:
+        return 5 + length
+
+
+class PushdataBuilder:
+    """Collects pushdata elements for an OP_RETURN and serializes them in one pass.
+
+    Elements may be ``bytes``, ``str`` (utf-8 unless ``encoding='hex'``) or legacy
+    ``(data, encoding)`` tuples, added one at a time or from any iterable, including
+    generators. The total size in bytes is kept in :attr:`size` as elements are
+    added, so an oversized payload is rejected before anything is serialized.
+
+    >>> builder = PushdataBuilder(bytes.fromhex('6d01'))
+    >>> builder.add('New_Name')
+    >>> key.create_op_return_tx(builder)
+
+    :param pushdata: Initial elements, or iterables of elements.
+    :param limit: Maximum size in bytes of the serialized pushdata.
+    :type limit: ``int``
+    """
+
+    def __init__(self, *pushdata, limit=MESSAGE_LIMIT):
+        self.limit = limit
+        self.elements = []
+        self.size = 0
+        for data in pushdata:
+            if isinstance(data, (bytes, bytearray, memoryview, str, tuple)) or not hasattr(data, '__iter__'):
+                self.add(data)
+            else:
+                self.extend(data)
+
+    def add(self, data, encoding='utf-8'):
+        if isinstance(data, tuple):
+            data, encoding = data[0], data[1] if len(data) > 1 else 'bytes'
+
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data)
+        elif not isinstance(data, str):
+            raise TypeError('pushdata must be of type: bytes or str')
+        elif encoding == 'hex':
+            if len(data) % 2 != 0:
+                raise ValueError(
+                    "hex encoded pushdata must have length = a multiple of two. May need to add a leading zero")
+            data = bytes.fromhex(data)
+        elif encoding == 'bytes':
+            raise TypeError('must be of type: bytes')
+        else:
+            data = data.encode(encoding)
+
+        size = self.size + get_pushdata_size(len(data))
+        if size > self.limit:
+            raise ValueError(
+                "Total bytes in OP_RETURN cannot exceed {} bytes at present - apologies".format(self.limit))
+
+        self.elements.append(data)
+        self.size = size
+
+    def add_hex(self, hexed):
+        self.add(hexed, encoding='hex')
+
+    def extend(self, pushdata, encoding='utf-8'):
+        for data in pushdata:
+            self.add(data, encoding=encoding)
+
+    def to_bytes(self):
+        """:rtype: ``bytes``"""
+        # bytes.join allocates the result once at its final size and copies each
+        # element into it, unlike repeated concatenation.
+        return b''.join(
+            part for data in self.elements for part in (get_op_pushdata_code(data), data)
+        )
+
+
 def create_pushdata(list_of_pushdata):
     '''
     Adds the correct 'op_pushdata' op_codes for each pushdata element to include in op_return as one bytestream.
-    :param list_of_pushdata: Can be either a list of bytes (new syntax) or a list of tuples (old syntax for deprecation)
+    :param list_of_pushdata: Can be either a list of bytes (new syntax), a list of tuples (old syntax for
+                             deprecation) or a :class:`PushdataBuilder`
     :param list_of_pushdata: ``list`` of ``bytes``
     :return: bytes
 
@@ -30,49 +112,14 @@ def create_pushdata(list_of_pushdata):
     ('deadbeef', 'hex'),
     (b'')]
     '''
+    if isinstance(list_of_pushdata, PushdataBuilder):
+        return list_of_pushdata.to_bytes()
 
     assert isinstance(list_of_pushdata, list), "list_of_pushdata must be of type: list"
     assert isinstance(list_of_pushdata[0], bytes) or isinstance(list_of_pushdata[0], tuple), \
         "must provide either a) a list of bytes or b) a list of tuples"
 
-    # New syntax -  simple list of bytes
-    if isinstance(list_of_pushdata[0], bytes):
-        pushdata = b''
-        for data in list_of_pushdata:
-            pushdata += get_op_pushdata_code(data) + data
-        return pushdata
-
-    # Old syntax - list of tuples
-    elif isinstance(list_of_pushdata[0], tuple):
-
-        pushdata = b''
-
-        for i in range(len(list_of_pushdata)):
-
-            encoding = list_of_pushdata[i][1]
-            if encoding == 'utf-8':
-                assert isinstance(list_of_pushdata[i][0], str), "must be of type: string"
-                pushdata += get_op_pushdata_code(list_of_pushdata[i][0]) + list_of_pushdata[i][0].encode('utf-8')
-
-            elif encoding == 'hex':
-                if len(list_of_pushdata[i][0]) % 2 != 0:
-                    raise ValueError(
-                        "hex encoded pushdata must have length = a multiple of two. May need to add a leading zero")
-
-                elif len(list_of_pushdata[i][0]) % 2 == 0:
-                    assert isinstance(list_of_pushdata[i][0], str), "must be of type: string"
-                    hex_as_bytes = bytes.fromhex(list_of_pushdata[i][0])
-                    pushdata += get_op_pushdata_code(hex_as_bytes) + hex_as_bytes
-
-            elif encoding == 'bytes':
-                assert isinstance(list_of_pushdata[i][0], bytes), "must be of type: bytes"
-                pushdata += get_op_pushdata_code(list_of_pushdata[i][0]) + list_of_pushdata[i][0]
-
-        # Size limit now 100kb on SV - aka "the unfuckening of OP_RETURN"
-        # Courtesy Steve Shadders and SV miners 24th Jan 2019
-        # https://www.yours.org/content/the-unfuckening-of-op_return-b10d2c4b52da
-        if len(pushdata) > MESSAGE_LIMIT:
-            raise ValueError(
-                "Total bytes in OP_RETURN cannot exceed 100kb at present - apologies")
-
-        return pushdata
+    # Size limit now 100kb on SV - aka "the unfuckening of OP_RETURN"
+    # Courtesy Steve Shadders and SV miners 24th Jan 2019
+    # https://www.yours.org/content/the-unfuckening-of-op_return-b10d2c4b52da
+    return PushdataBuilder(*list_of_pushdata).to_bytes()
@@ -1,13 +1,17 @@
 import logging
 from collections import namedtuple, deque
+from functools import lru_cache
+from time import perf_counter
 
-from bitsv.crypto import double_sha256, sha256
+from bitsv import instrumentation
+from bitsv.crypto import double_sha256, ripemd160_sha256, sha256
 from bitsv.exceptions import InsufficientFunds
-from bitsv.format import address_to_public_key_hash
+from bitsv.format import address_to_public_key_hash, verify_sig
 from bitsv.network.rates import currency_to_satoshi_cached
 from bitsv.utils import (
-    bytes_to_hex, chunk_data, hex_to_bytes, int_to_varint
+    Decimal, bytes_to_hex, chunk_data, hex_to_bytes, int_to_varint, varint_to_int
 )
+from bitsv.utxo import UTXOSet
 import math
 
 VERSION_1 = 0x01.to_bytes(4, byteorder='little')
@@ -41,6 +45,15 @@ OP_PUSHDATA4 = b'\x4e'
 
 MESSAGE_LIMIT = 100000  # The real limiting factor seems to be total transaction size
 
+# libsecp256k1 always produces low-S signatures so the DER encoding is at most 71 bytes
+# (6 bytes of DER overhead + 33 byte R + 32 byte S). One more byte for the sighash type.
+MAX_SIGNATURE_SIZE = 72
+# With a ground low R value (see :func:`bitsv.crypto.sign_low_r`) R also fits in 32 bytes.
+LOW_R_SIGNATURE_SIZE = 71
+# 8 byte amount + 1 byte script length + 25 byte P2PKH script
+P2PKH_OUTPUT_SIZE = 34
+P2PKH_SCRIPT_CACHE_SIZE = 1024
+
 
 class TxIn:
     __slots__ = ('script', 'script_len', 'txid', 'txindex', 'amount')
@@ -70,59 +83,199 @@ class TxIn:
 
 
 Output = namedtuple('Output', ('address', 'amount', 'currency'))
+TxOut = namedtuple('TxOut', ('amount', 'script'))
+Tx = namedtuple('Tx', ('version', 'inputs', 'outputs', 'lock_time'))
 
 
 def calc_txid(tx_hex):
     return bytes_to_hex(double_sha256(hex_to_bytes(tx_hex))[::-1])
 
 
-def estimate_tx_fee(n_in, n_out, satoshis, compressed, op_return_size=0):
+def deserialize_tx(tx_hex):
+    """Parses a serialized transaction. Inputs are :class:`TxIn` in the form used by
+    :func:`construct_input_block` (the previous txid in internal byte order and the
+    amount, which is not serialized, as ``None``). Output amounts are in satoshi.
+
+    :param tx_hex: The transaction as hex or bytes.
+    :raises ValueError: If the transaction is truncated or has trailing bytes.
+    :rtype: :class:`Tx`
+    """
+    tx = hex_to_bytes(tx_hex) if isinstance(tx_hex, str) else bytes(tx_hex)
+
+    try:
+        version = int.from_bytes(tx[:4], 'little')
+        n_in, offset = varint_to_int(tx, 4)
+        inputs = []
+        for _ in range(n_in):
+            txid = tx[offset:offset + 32]
+            txindex = tx[offset + 32:offset + 36]
+            script_len, start = varint_to_int(tx, offset + 36)
+            end = start + script_len
+            inputs.append(TxIn(tx[start:end], tx[offset + 36:start], txid, txindex, None))
+            offset = end + 4  # sequence
+
+        n_out, offset = varint_to_int(tx, offset)
+        outputs = []
+        for _ in range(n_out):
+            amount = int.from_bytes(tx[offset:offset + 8], 'little')
+            script_len, start = varint_to_int(tx, offset + 8)
+            offset = start + script_len
+            outputs.append(TxOut(amount, tx[start:offset]))
+    except (IndexError, KeyError):
+        raise ValueError('Transaction is truncated.')
+
+    if len(tx) != offset + 4:
+        raise ValueError('Transaction has {} bytes, expected {}.'.format(len(tx), offset + 4))
+
+    return Tx(version, inputs, outputs, int.from_bytes(tx[offset:], 'little'))
+
+
+def get_parent_txids(tx_hex):
+    """Returns the txids of the transactions whose outputs ``tx_hex`` spends.
+
+    :rtype: ``set`` of ``str``
+    """
+    return {bytes_to_hex(txin.txid[::-1]) for txin in deserialize_tx(tx_hex).inputs}
 
-    if not satoshis:
-        return 0
 
-    estimated_size = (
-        4 +  # version
-        n_in * (148 if compressed else 180)
+def get_batch_dependencies(tx_hexes):
+    """Finds which transactions of a batch spend outputs of other transactions in
+    the same batch. Transactions that cannot be parsed are treated as having no
+    parents.
+
+    :param tx_hexes: The transactions as hex.
+    :type tx_hexes: ``list`` of ``str``
+    :returns: The txid of each transaction and the set of indices of its parents.
+    :rtype: ``tuple`` of (``list`` of ``str``, ``list`` of ``set``)
+    """
+    txids = [calc_txid(tx_hex) for tx_hex in tx_hexes]
+    indices = {txid: index for index, txid in enumerate(txids)}
+    parents = []
+    for tx_hex in tx_hexes:
+        try:
+            parent_txids = get_parent_txids(tx_hex)
+        except ValueError:
+            parent_txids = ()
+        parents.append({indices[txid] for txid in parent_txids if txid in indices})
+    return txids, parents
+
+
+def get_dependency_order(parents):
+    """Orders a batch so that parents precede the transactions spending them, keeping
+    the original order otherwise.
+
+    :param parents: The parents of each transaction, see :func:`get_batch_dependencies`.
+    :type parents: ``list`` of ``set``
+    :rtype: ``list`` of ``int``
+    """
+    order = []
+    visited = [False] * len(parents)
+    for root in range(len(parents)):
+        stack = [(root, False)]
+        while stack:
+            index, expanded = stack.pop()
+            if expanded:
+                order.append(index)
+            elif not visited[index]:
+                visited[index] = True
+                stack.append((index, True))
+                stack.extend((parent, False) for parent in sorted(parents[index], reverse=True)
+                             if not visited[parent])
+    return order
+
+
+def calc_tx_size(tx_hex):
+    """Returns the exact size in bytes of a serialized transaction, for reconciling
+    the fee actually paid against the rate that was requested."""
+    return len(tx_hex) // 2
+
+
+def get_input_size(compressed=True, signature_size=MAX_SIGNATURE_SIZE):
+    """Size in bytes of a signed P2PKH input. ``signature_size`` includes the sighash
+    byte and defaults to the worst case so that estimates never underpay."""
+    script_size = (
+        1 + signature_size  # push + DER signature + sighash byte
+        + 1 + (33 if compressed else 65)  # push + public key
+    )
+    return (
+        32  # txid
+        + 4  # output index
+        + len(int_to_varint(script_size))
+        + script_size
+        + 4  # sequence
+    )
+
+
+def estimate_tx_size(n_in, n_out, compressed=True, op_return_size=0, n_op_return=0,
+                     signature_size=MAX_SIGNATURE_SIZE):
+    """Size in bytes of a P2PKH transaction with ``n_in`` inputs, ``n_out`` P2PKH outputs
+    and ``n_op_return`` data-carrier outputs totalling ``op_return_size`` bytes (as given
+    by :func:`get_op_return_size`). The only estimated part is the signature length, for
+    which ``signature_size`` is assumed for every input."""
+    return (
+        4  # version
         + len(int_to_varint(n_in))
-        + n_out * 34  # excluding op_return outputs, dealt with separately
-        + len(int_to_varint(n_out))
+        + n_in * get_input_size(compressed, signature_size)
+        + len(int_to_varint(n_out + n_op_return))
+        + n_out * P2PKH_OUTPUT_SIZE
         + op_return_size  # grand total size of op_return outputs(s) and related field(s)
         + 4  # time lock
     )
 
-    estimated_fee = math.ceil(estimated_size * satoshis)
 
-    logging.debug('Estimated fee: {} satoshis for {} bytes'.format(estimated_fee, estimated_size))
+def estimate_tx_fee(n_in, n_out, satoshis, compressed, op_return_size=0, n_op_return=0,
+                    signature_size=MAX_SIGNATURE_SIZE):
+
+    if not satoshis:
+        return 0
+
+    estimated_size = estimate_tx_size(n_in, n_out, compressed, op_return_size, n_op_return,
+                                      signature_size)
+
+    return calc_fee(estimated_size, satoshis)
 
-    return estimated_fee
+
+def calc_fee(tx_size, satoshis, data_size=0, data_satoshis=None):
+    """Fee in satoshis for a transaction of ``tx_size`` bytes, ``data_size`` of which are
+    data-carrier script bytes charged at ``data_satoshis`` per byte (defaults to
+    ``satoshis``). Decimal arithmetic avoids rounding 0.1 sat/byte rates up a satoshi."""
+    if data_satoshis is None:
+        data_satoshis = satoshis
+
+    fee = math.ceil(
+        Decimal(tx_size - data_size) * Decimal(satoshis) + Decimal(data_size) * Decimal(data_satoshis)
+    )
+
+    logging.debug('Estimated fee: {} satoshis for {} bytes'.format(fee, tx_size))
+
+    return fee
 
 
 def get_op_return_size(message, custom_pushdata=False):
-    # calculate op_return size for each individual message
+    """Size in bytes of the data-carrier output that :func:`construct_output_block`
+    creates for ``message``, including its amount and script length fields."""
+    script_size = len(get_op_return_script(message, custom_pushdata=custom_pushdata))
+    return (
+        8  # int64_t amount 0x00000000
+        + len(int_to_varint(script_size))
+        + script_size
+    )
+
+
+def get_op_return_script(message, custom_pushdata=False):
     if custom_pushdata is False:
-        op_return_size = (
-            8  # int64_t amount 0x00000000
-            + len(OP_FALSE + OP_RETURN)  # 2 bytes
-            + len(get_op_pushdata_code(message))  # 1 byte if <75 bytes, 2 bytes if OP_PUSHDATA1...
-            + len(message)  # Max 220 bytes at present
-        )
+        return OP_FALSE + OP_RETURN + get_op_pushdata_code(message) + message
 
-    if custom_pushdata is True:
-        op_return_size = (
-            8  # int64_t amount 0x00000000
-            + len(OP_FALSE + OP_RETURN)  # 2 bytes
-            + len(message)  # Unsure if Max size will be >220 bytes due to extra OP_PUSHDATA codes...
-        )
+    # manual control over number of bytes in each batch of pushdata
+    if type(message) != bytes:
+        raise TypeError("custom pushdata must be of type: bytes")
 
-    # "Var_Int" that preceeds OP_RETURN - 0xdf is max value with current 220 byte limit (so only adds 1 byte)
-    op_return_size += len(int_to_varint(op_return_size))
-    return op_return_size
+    return OP_FALSE + OP_RETURN + message
 
 
 def get_op_pushdata_code(dest):
     length_data = len(dest)
-    if length_data <= 0x4c:  # (https://en.bitcoin.it/wiki/Script)
+    if length_data < 0x4c:  # (https://en.bitcoin.it/wiki/Script)
         return length_data.to_bytes(1, byteorder='little')
     elif length_data <= 0xff:
         return OP_PUSHDATA1 + length_data.to_bytes(1, byteorder='little')  # OP_PUSHDATA1 format
@@ -133,13 +286,18 @@ def get_op_pushdata_code(dest):
 
 
 def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=None, compressed=True,
-                     custom_pushdata=False):
+                     custom_pushdata=False, low_r=False, data_fee=None):
     """
     sanitize_tx_data()
 
-    fee is in satoshis per byte.
+    fee is in satoshis per byte. data_fee, if given, is the rate for the script bytes of
+    OP_RETURN outputs (see :class:`~bitsv.network.fees.FeeQuote`). low_r must match the
+    signing mode later passed to :func:`create_p2pkh_transaction` so that the fee is not
+    under or overpaid.
     """
 
+    signature_size = LOW_R_SIGNATURE_SIZE if low_r else MAX_SIGNATURE_SIZE
+
     outputs = deque(outputs)
 
     for i, output in enumerate(outputs):
@@ -152,6 +310,7 @@ def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=Non
     # Temporary storage so all outputs precede messages.
     messages = deque()
     total_op_return_size = 0
+    data_size = 0
 
     if message and (custom_pushdata is False):
         try:
@@ -164,6 +323,7 @@ def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=Non
         for message in message_chunks:
             messages.appendleft((message, 0))
             total_op_return_size += get_op_return_size(message, custom_pushdata=False)
+            data_size += len(get_op_return_script(message, custom_pushdata=False))
 
     elif message and (custom_pushdata is True):
         if len(message) >= MESSAGE_LIMIT:
@@ -171,6 +331,7 @@ def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=Non
         else:
             messages.append((message, 0))
             total_op_return_size += get_op_return_size(message, custom_pushdata=True)
+            data_size += len(get_op_return_script(message, custom_pushdata=True))
 
     # Include return address in fee estimate.
     total_in = 0
@@ -179,26 +340,38 @@ def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=Non
 
     if combine:
         # calculated_fee is in total satoshis.
-        calculated_fee = estimate_tx_fee(len(unspents), num_outputs, fee, compressed, total_op_return_size)
+        calculated_fee = calc_fee(
+            estimate_tx_size(len(unspents), num_outputs, compressed, total_op_return_size,
+                             len(messages), signature_size),
+            fee, data_size, data_fee
+        )
         total_out = sum_outputs + calculated_fee
-        unspents = unspents.copy()
+        unspents = list(unspents)
         total_in += sum(unspent.amount for unspent in unspents)
 
     else:
-        unspents = sorted(unspents, key=lambda x: x.amount)
+        # A UTXOSet is kept sorted, so only the UTXOs selected are looked at.
+        if isinstance(unspents, UTXOSet):
+            candidates = unspents.iter_by_amount()
+        else:
+            candidates = sorted(unspents, key=lambda x: x.amount)
 
-        index = 0
+        selected = []
 
-        for index, unspent in enumerate(unspents):
+        for unspent in candidates:
+            selected.append(unspent)
             total_in += unspent.amount
-            calculated_fee = estimate_tx_fee(len(unspents[:index + 1]), num_outputs, fee,
-                                             compressed, total_op_return_size)
+            calculated_fee = calc_fee(
+                estimate_tx_size(len(selected), num_outputs, compressed, total_op_return_size,
+                                 len(messages), signature_size),
+                fee, data_size, data_fee
+            )
             total_out = sum_outputs + calculated_fee
 
             if total_in >= total_out:
                 break
 
-        unspents[:] = unspents[:index + 1]
+        unspents = selected
 
     remaining = total_in - total_out
 
@@ -216,6 +389,15 @@ def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=Non
     return unspents, list(outputs)
 
 
+@lru_cache(maxsize=P2PKH_SCRIPT_CACHE_SIZE)
+def get_p2pkh_script(address):
+    """The output script paying ``address``. Cached, as the same few addresses
+    (e.g. the change address) are paid over and over."""
+    return (OP_DUP + OP_HASH160 + OP_PUSH_20 +
+            address_to_public_key_hash(address) +
+            OP_EQUALVERIFY + OP_CHECKSIG)
+
+
 def construct_output_block(outputs, custom_pushdata=False):
 
     output_block = b''
@@ -225,27 +407,15 @@ def construct_output_block(outputs, custom_pushdata=False):
 
         # Real recipient
         if amount:
-            script = (OP_DUP + OP_HASH160 + OP_PUSH_20 +
-                      address_to_public_key_hash(dest) +
-                      OP_EQUALVERIFY + OP_CHECKSIG)
+            script = get_p2pkh_script(dest)
 
             output_block += amount.to_bytes(8, byteorder='little')
 
         # Blockchain storage
         else:
-            if custom_pushdata is False:
-                script = OP_FALSE + OP_RETURN + get_op_pushdata_code(dest) + dest
-
-                output_block += b'\x00\x00\x00\x00\x00\x00\x00\x00'
-
-            elif custom_pushdata is True:
-                # manual control over number of bytes in each batch of pushdata
-                if type(dest) != bytes:
-                    raise TypeError("custom pushdata must be of type: bytes")
-                else:
-                    script = (OP_FALSE + OP_RETURN + dest)
+            script = get_op_return_script(dest, custom_pushdata=custom_pushdata)
 
-                output_block += b'\x00\x00\x00\x00\x00\x00\x00\x00'
+            output_block += b'\x00\x00\x00\x00\x00\x00\x00\x00'
 
         # Script length in wiki is "Var_int" but there's a note of "modern BitcoinQT" using a more compact "CVarInt"
         output_block += int_to_varint(len(script))
@@ -271,72 +441,255 @@ def construct_input_block(inputs):
     return input_block
 
 
-def create_p2pkh_transaction(private_key, unspents, outputs, custom_pushdata=False):
-
-    public_key = private_key.public_key
-    public_key_len = len(public_key).to_bytes(1, byteorder='little')
-
-    scriptCode = private_key.scriptcode
-    scriptCode_len = int_to_varint(len(scriptCode))
-
-    version = VERSION_1
-    lock_time = LOCK_TIME
-    # sequence = SEQUENCE
-    hash_type = HASH_TYPE
-    input_count = int_to_varint(len(unspents))
-    output_count = int_to_varint(len(outputs))
+class UnsignedTransaction:
+    """A P2PKH transaction whose inputs can be signed one at a time, by several
+    keys and in several processes, before it is finalized.
 
-    output_block = construct_output_block(outputs, custom_pushdata=custom_pushdata)
+    The parts of the signature hash shared by all inputs are computed once, so
+    signing an input only hashes its own outpoint, scriptCode and amount.
 
-    # Optimize for speed, not memory, by pre-computing values.
-    inputs = []
-    for unspent in unspents:
-        txid = hex_to_bytes(unspent.txid)[::-1]
-        txindex = unspent.txindex.to_bytes(4, byteorder='little')
-        amount = unspent.amount.to_bytes(8, byteorder='little')
-
-        inputs.append(TxIn('', 0, txid, txindex, amount))
-
-    hashPrevouts = double_sha256(b''.join([i.txid+i.txindex for i in inputs]))
-    hashSequence = double_sha256(b''.join([SEQUENCE for i in inputs]))
-    hashOutputs = double_sha256(output_block)
+    :param inputs: The inputs with ``txid``, ``txindex`` and ``amount`` as bytes.
+    :type inputs: ``list`` of :class:`TxIn`
+    :param output_count: The number of outputs in ``output_block``.
+    :type output_count: ``int``
+    :param output_block: The serialized outputs, see :func:`construct_output_block`.
+    :type output_block: ``bytes``
+    """
 
-    # scriptCode_len is part of the script.
-    for i, txin in enumerate(inputs):
-        to_be_hashed = (
-            version +
-            hashPrevouts +
-            hashSequence +
+    MAGIC = b'BSVU'
+    FORMAT_VERSION = b'\x01'
+
+    def __init__(self, inputs, output_count, output_block, version=VERSION_1, lock_time=LOCK_TIME):
+        self.inputs = inputs
+        self.output_count = output_count
+        self.output_block = output_block
+        self.version = version
+        self.lock_time = lock_time
+        self.scripts = [None] * len(inputs)
+
+        hashPrevouts = double_sha256(b''.join([i.txid + i.txindex for i in inputs]))
+        hashSequence = double_sha256(SEQUENCE * len(inputs))
+        hashOutputs = double_sha256(output_block)
+        self.sighash_prefix = version + hashPrevouts + hashSequence
+        self.sighash_suffix = SEQUENCE + hashOutputs + lock_time + HASH_TYPE
+
+    @classmethod
+    def from_unspents(cls, unspents, outputs, custom_pushdata=False):
+        """:param unspents: The UTXOs to spend.
+        :type unspents: ``list`` of :class:`~bitsv.network.meta.Unspent`
+        :param outputs: The outputs as returned by :func:`sanitize_tx_data`.
+        :rtype: :class:`UnsignedTransaction`
+        """
+        inputs = [
+            TxIn(b'', 0, unspent.txid_bytes, unspent.txindex.to_bytes(4, byteorder='little'),
+                 unspent.amount.to_bytes(8, byteorder='little'))
+            for unspent in unspents
+        ]
+        return cls(inputs, len(outputs), construct_output_block(outputs, custom_pushdata=custom_pushdata))
+
+    def sighash(self, index, scriptcode):
+        """The BIP-143 preimage hash of input ``index``, which the key signs.
+
+        :param scriptcode: The P2PKH script of the key spending the input.
+        :type scriptcode: ``bytes``
+        :rtype: ``bytes``
+        """
+        return self._sighash(index, int_to_varint(len(scriptcode)) + scriptcode)
+
+    def _sighash(self, index, scriptcode_with_len):
+        txin = self.inputs[index]
+        return sha256(
+            self.sighash_prefix +
             txin.txid +
             txin.txindex +
-            scriptCode_len +
-            scriptCode +
+            scriptcode_with_len +
             txin.amount +
-            SEQUENCE +
-            hashOutputs +
-            lock_time +
-            hash_type
+            self.sighash_suffix
         )
-        hashed = sha256(to_be_hashed)  # BIP-143: Used for Bitcoin SV
-
-        # signature = private_key.sign(hashed) + b'\x01'
-        signature = private_key.sign(hashed) + b'\x41'
 
-        script_sig = (
-            len(signature).to_bytes(1, byteorder='little') +
-            signature +
-            public_key_len +
-            public_key
+    def add_signature(self, index, signature, public_key):
+        """Adds a signature made elsewhere, e.g. by another process, to input ``index``.
+
+        :param signature: The DER signature of :func:`sighash`, without the hash type.
+        :type signature: ``bytes``
+        :param public_key: The public key of the signer.
+        :type public_key: ``bytes``
+        :raises ValueError: If the signature is invalid.
+        """
+        self.verify_signature(index, signature, public_key)
+        self.set_script(index, signature, len(public_key).to_bytes(1, byteorder='little') + public_key)
+
+    def verify_signature(self, index, signature, public_key):
+        """:raises ValueError: If ``signature`` is not a valid signature of input
+                               ``index`` by ``public_key``.
+        """
+        scriptcode = (OP_DUP + OP_HASH160 + OP_PUSH_20 + ripemd160_sha256(public_key) +
+                      OP_EQUALVERIFY + OP_CHECKSIG)
+        try:
+            valid = verify_sig(signature, self.sighash(index, scriptcode), public_key)
+        except ValueError:  # Not a DER signature or public key
+            valid = False
+        if not valid:
+            raise ValueError('The signature of input {} is invalid.'.format(index))
+
+    def verify_script(self, index, script):
+        """:raises ValueError: If ``script`` is not a P2PKH unlocking script with a
+                               valid signature of input ``index``.
+        """
+        try:
+            signature_end = 1 + script[0]
+            signature, hash_type = script[1:signature_end - 1], script[signature_end - 1]
+            public_key = script[signature_end + 1:]
+            if hash_type != HASH_TYPE[0] or script[signature_end] != len(public_key):
+                raise ValueError
+        except (IndexError, ValueError):
+            raise ValueError('The script of input {} is malformed.'.format(index))
+        self.verify_signature(index, signature, public_key)
+
+    def set_script(self, index, signature, public_key_push):
+        signature += b'\x41'
+        self.scripts[index] = len(signature).to_bytes(1, byteorder='little') + signature + public_key_push
+
+    def sign(self, private_key, indices=None, low_r=False):
+        """Signs the inputs ``indices`` (by default all unsigned inputs) with ``private_key``.
+
+        :type private_key: :class:`~bitsv.PrivateKey`
+        :type indices: ``list`` of ``int``
+        :param low_r: Whether to grind signatures to a low R value.
+        :type low_r: ``bool``
+        """
+        public_key_push = private_key.public_key_push
+        scriptcode = private_key.scriptcode
+        scriptcode_with_len = int_to_varint(len(scriptcode)) + scriptcode
+        if indices is None:
+            indices = self.get_unsigned()
+        hooks = instrumentation.INSTRUMENTATION
+        for index in indices:
+            if hooks is not None:
+                start = perf_counter()
+            signature = private_key.sign(self._sighash(index, scriptcode_with_len), low_r=low_r)
+            self.set_script(index, signature, public_key_push)
+            if hooks is not None:
+                hooks.input_signed(perf_counter() - start)
+
+    def combine(self, other):
+        """Copies the signatures of ``other``, a copy of this transaction signed elsewhere.
+
+        :raises ValueError: If ``other`` is a different transaction or one of its
+                            signatures is invalid. No signature is copied then.
+        """
+        if (other.output_block != self.output_block or other.version != self.version or
+                other.lock_time != self.lock_time or
+                [(i.txid, i.txindex, i.amount) for i in other.inputs] !=
+                [(i.txid, i.txindex, i.amount) for i in self.inputs]):
+            raise ValueError('Cannot combine the signatures of a different transaction.')
+        scripts = [(index, script) for index, script in enumerate(other.scripts)
+                   if script is not None and script != self.scripts[index]]
+        for index, script in scripts:
+            self.verify_script(index, script)
+        for index, script in scripts:
+            self.scripts[index] = script
+
+    def get_unsigned(self):
+        """:returns: The indices of the inputs without a signature.
+        :rtype: ``list`` of ``int``
+        """
+        return [index for index, script in enumerate(self.scripts) if script is None]
+
+    def to_bytes(self):
+        """Serializes the transaction with the signatures added so far, see :func:`from_bytes`.
+
+        :rtype: ``bytes``
+        """
+        parts = [self.MAGIC, self.FORMAT_VERSION, self.version, self.lock_time, int_to_varint(len(self.inputs))]
+        for txin, script in zip(self.inputs, self.scripts):
+            script = script or b''
+            parts.append(txin.txid + txin.txindex + txin.amount + int_to_varint(len(script)) + script)
+        parts.append(int_to_varint(self.output_count))
+        parts.append(int_to_varint(len(self.output_block)))
+        parts.append(self.output_block)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """:param data: Output of :func:`to_bytes`.
+        :type data: ``bytes``
+        :raises ValueError: If ``data`` is not a valid unsigned transaction.
+        :rtype: :class:`UnsignedTransaction`
+        """
+        if data[:4] != cls.MAGIC or data[4:5] != cls.FORMAT_VERSION:
+            raise ValueError('Not an unsigned transaction of version {}.'.format(cls.FORMAT_VERSION[0]))
+        try:
+            version, lock_time = data[5:9], data[9:13]
+            n_inputs, offset = varint_to_int(data, 13)
+            inputs, scripts = [], []
+            for _ in range(n_inputs):
+                inputs.append(TxIn(b'', 0, data[offset:offset + 32], data[offset + 32:offset + 36],
+                                   data[offset + 36:offset + 44]))
+                script_len, offset = varint_to_int(data, offset + 44)
+                scripts.append(data[offset:offset + script_len] or None)
+                offset += script_len
+            output_count, offset = varint_to_int(data, offset)
+            size, offset = varint_to_int(data, offset)
+            output_block = data[offset:offset + size]
+            offset += size
+        except IndexError:
+            raise ValueError('The unsigned transaction is truncated.')
+        if offset != len(data):
+            raise ValueError('The unsigned transaction is malformed.')
+
+        tx = cls(inputs, output_count, output_block, version, lock_time)
+        tx.scripts = scripts
+        return tx
+
+    def to_hex(self):
+        """Finalizes the transaction.
+
+        :raises ValueError: If an input is not signed yet.
+        :returns: The signed transaction as hex.
+        :rtype: ``str``
+        """
+        unsigned = self.get_unsigned()
+        if unsigned:
+            raise ValueError('Inputs {} are not signed.'.format(unsigned))
+
+        hooks = instrumentation.INSTRUMENTATION
+        if hooks is not None:
+            start = perf_counter()
+        tx = (
+            self.version +
+            int_to_varint(len(self.inputs)) +
+            b''.join(txin.txid + txin.txindex + int_to_varint(len(script)) + script + SEQUENCE
+                     for txin, script in zip(self.inputs, self.scripts)) +
+            int_to_varint(self.output_count) +
+            self.output_block +
+            self.lock_time
         )
+        tx_hex = bytes_to_hex(tx)
+        if hooks is not None:
+            hooks.transaction_serialized(perf_counter() - start, len(tx))
+        return tx_hex
 
-        inputs[i].script = script_sig
-        inputs[i].script_len = int_to_varint(len(script_sig))
 
-    return bytes_to_hex(
-        version +
-        input_count +
-        construct_input_block(inputs) +
-        output_count +
-        output_block +
-        lock_time
-    )
+def create_p2pkh_transaction(private_key, unspents, outputs, custom_pushdata=False, low_r=False):
+
+    tx = UnsignedTransaction.from_unspents(unspents, outputs, custom_pushdata=custom_pushdata)
+    tx.sign(private_key, low_r=low_r)
+    return tx.to_hex()
+
+
+def sign_p2pkh_transaction(private_key, inputs, output_count, output_block, low_r=False):
+    """Signs every input with ``private_key`` and serializes the transaction.
+
+    :param inputs: The inputs with ``txid``, ``txindex`` and ``amount`` as bytes.
+    :type inputs: ``list`` of :class:`TxIn`
+    :param output_count: The number of outputs in ``output_block``.
+    :type output_count: ``int``
+    :param output_block: The serialized outputs, see :func:`construct_output_block`.
+    :type output_block: ``bytes``
+    :returns: The signed transaction as hex.
+    :rtype: ``str``
+    """
+    tx = UnsignedTransaction(inputs, output_count, output_block)
+    tx.sign(private_key, low_r=low_r)
+    return tx.to_hex()
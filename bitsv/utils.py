@@ -1,7 +1,13 @@
 import decimal
+import sys
 from binascii import hexlify
 import string
 
+# Modules that import optional parts of bitsv on first use do so from a module
+# __getattr__ (PEP 562), which Python ignores before 3.7. Without it they import
+# those parts eagerly instead.
+MODULE_GETATTR = sys.version_info >= (3, 7)
+
 
 class Decimal(decimal.Decimal):
     def __new__(cls, value):
@@ -58,6 +64,20 @@ def int_to_varint(val):
         return b'\xff'+val.to_bytes(8, 'little')
 
 
+def varint_to_int(data, offset=0):
+    """Reads the varint starting at ``offset`` of ``data``.
+
+    :returns: The value and the offset of the first byte after the varint.
+    :rtype: ``tuple`` of (``int``, ``int``)
+    """
+    prefix = data[offset]
+    if prefix < 0xfd:
+        return prefix, offset + 1
+    size = {0xfd: 2, 0xfe: 4, 0xff: 8}[prefix]
+    end = offset + 1 + size
+    return int.from_bytes(data[offset + 1:end], 'little'), end
+
+
 def is_valid_hex(s):
     """Can only detect if something definitely is *not* hex (could still return true by
     coincidence).
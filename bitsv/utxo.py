@@ -0,0 +1,447 @@
+"""Helpers for spending many UTXOs of one key at the same time.
+
+Each transaction from a key normally spends the change of the previous one, so
+sends have to wait for each other. An :class:`UnspentPool` splits the key's
+funds into many equal UTXOs up front (see :func:`~bitsv.PrivateKey.split_utxos`)
+and hands each worker its own, so transactions can be built and broadcast in
+parallel. An :class:`UnspentCache` tracks the UTXOs of addresses locally, and a
+:class:`UTXOSet` holds the UTXOs of a key compactly.
+"""
+import threading
+from array import array
+from collections import deque
+
+from bitsv.exceptions import InsufficientFunds
+from bitsv.network.meta import Unspent
+from bitsv.utils import bytes_to_hex, hex_to_bytes
+
+DEFAULT_POOL_SIZE = 50
+
+
+class UnspentPool:
+    """Keeps ``size`` UTXOs of ``amount_each`` satoshi ready to spend.
+
+    :func:`acquire` hands out every UTXO at most once, so concurrent workers
+    never spend the same coin. When the number of ready UTXOs drops to
+    ``refill_threshold`` the pool splits its reserve into new ones in a
+    background thread.
+
+    :param private_key: The key owning the UTXOs.
+    :type private_key: :class:`~bitsv.PrivateKey`
+    :param amount_each: The amount of each UTXO in satoshi.
+    :type amount_each: ``int``
+    :param size: The number of UTXOs to keep ready.
+    :type size: ``int``
+    :param unspents: The reserve that refills are funded from. Defaults to the
+                     key's UTXOs from :func:`~bitsv.PrivateKey.get_unspents`.
+    :type unspents: ``list`` of :class:`~bitsv.network.meta.Unspent`
+    :param refill_threshold: Defaults to a quarter of ``size``.
+    :type refill_threshold: ``int``
+    :param fee: The number of satoshi per byte of the split transactions.
+    :param low_r: Whether to grind signatures to a low R value.
+    """
+
+    def __init__(self, private_key, amount_each, size=DEFAULT_POOL_SIZE, unspents=None,
+                 refill_threshold=None, fee=None, low_r=False):
+        self.private_key = private_key
+        self.amount_each = amount_each
+        self.size = size
+        self.refill_threshold = size // 4 if refill_threshold is None else refill_threshold
+        self.fee = fee
+        self.low_r = low_r
+
+        if unspents is None:
+            unspents = private_key.get_unspents()
+        self.reserve = list(unspents)
+        self.ready = deque()
+        self.refill_error = None
+
+        self._refilling = False
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.ready)
+
+    def add(self, unspent):
+        """Adds ``unspent``, for example the change of a transaction spending a
+        UTXO of the pool, to the reserve used for refills."""
+        with self._condition:
+            self.reserve.append(unspent)
+
+    def release(self, unspent):
+        """Returns an acquired UTXO that was not spent."""
+        with self._condition:
+            self.ready.appendleft(unspent)
+            self._condition.notify()
+
+    def acquire(self, timeout=None):
+        """Takes a UTXO out of the pool, waiting for a refill if none is ready.
+
+        :param timeout: Seconds to wait for each refill. Waits indefinitely by default.
+        :type timeout: ``float``
+        :raises InsufficientFunds: If the pool is empty and the reserve cannot refill it.
+        :raises TimeoutError: If no UTXO became ready within ``timeout``.
+        :rtype: :class:`~bitsv.network.meta.Unspent`
+        """
+        with self._condition:
+            if len(self.ready) <= self.refill_threshold and self.reserve and not self._refilling:
+                self._start_refill()
+
+            started = False
+            while not self.ready:
+                if not self._refilling:
+                    if started and self.refill_error is not None:
+                        raise self.refill_error
+                    if not self.reserve:
+                        raise InsufficientFunds('The pool is empty and its reserve is spent.')
+                    self._start_refill()
+                    started = True
+                if not self._condition.wait(timeout):
+                    raise TimeoutError('No UTXO became ready within {} seconds.'.format(timeout))
+
+            return self.ready.popleft()
+
+    def refill(self):
+        """Splits the reserve into as many UTXOs as the pool is missing and
+        broadcasts the transaction. The change goes back to the reserve. Waits
+        instead if a refill is already running.
+
+        :raises InsufficientFunds: If the reserve cannot fund a single UTXO.
+        :raises ConnectionError: If all API services fail.
+        """
+        with self._condition:
+            if self._refilling:
+                while self._refilling:
+                    self._condition.wait()
+                return
+            self._refilling = True
+        self._refill()
+
+    def _start_refill(self):
+        # Must be called with the lock held.
+        self._refilling = True
+        threading.Thread(target=self._refill_in_background, daemon=True).start()
+
+    def _refill_in_background(self):
+        try:
+            self._refill()
+        except Exception:
+            pass  # Stored in refill_error and raised by acquire.
+
+    def _refill(self):
+        with self._condition:
+            n = self.size - len(self.ready)
+            if n < 1:
+                self._refilling = False
+                self._condition.notify_all()
+                return
+            reserve, self.reserve = self.reserve, []
+
+        try:
+            # Split what the reserve can afford if it cannot fill the whole pool.
+            n = min(n, sum(unspent.amount for unspent in reserve) // self.amount_each)
+            if n < 1:
+                raise InsufficientFunds('The reserve of the pool cannot fund a UTXO of {} '
+                                        'satoshi.'.format(self.amount_each))
+            try:
+                tx_hex, unspents, change = self.private_key.split_utxos(
+                    n, self.amount_each, fee=self.fee, unspents=reserve, low_r=self.low_r
+                )
+            except InsufficientFunds:
+                # The fee did not fit, one UTXO less will.
+                if n == 1:
+                    raise
+                tx_hex, unspents, change = self.private_key.split_utxos(
+                    n - 1, self.amount_each, fee=self.fee, unspents=reserve, low_r=self.low_r
+                )
+            self.private_key.network_api.broadcast_tx(tx_hex)
+        except Exception as e:
+            with self._condition:
+                self.reserve.extend(reserve)
+                self.refill_error = e
+                self._refilling = False
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            if change is not None:
+                self.reserve.append(change)
+            self.ready.extend(unspents)
+            self.refill_error = None
+            self._refilling = False
+            self._condition.notify_all()
+
+
+class UnspentCache:
+    """A thread-safe local view of the UTXOs of watched hash160s, kept up to date
+    from transactions and blocks as they arrive instead of by polling, see
+    :class:`~bitsv.network.services.zmqsubscriber.ZMQSubscriber`."""
+
+    def __init__(self):
+        self._unspents = {}  # hash160 -> {(txid, txindex): Unspent}
+        self._owners = {}  # (txid, txindex) -> hash160
+        self._lock = threading.Lock()
+
+    def __contains__(self, outpoint):
+        return outpoint in self._owners
+
+    def set_unspents(self, hash160, unspents):
+        """Replaces the UTXOs of ``hash160``, e.g. with a fresh
+        :func:`~bitsv.network.NetworkAPI.get_unspents` result on startup."""
+        with self._lock:
+            for outpoint in self._unspents.pop(hash160, {}):
+                del self._owners[outpoint]
+            self._unspents[hash160] = {}
+            for unspent in unspents:
+                self._add(hash160, unspent)
+
+    def add(self, hash160, unspent):
+        with self._lock:
+            self._add(hash160, unspent)
+
+    def _add(self, hash160, unspent):
+        outpoint = (unspent.txid, unspent.txindex)
+        self._unspents.setdefault(hash160, {})[outpoint] = unspent
+        self._owners[outpoint] = hash160
+
+    def spend(self, txid, txindex):
+        """Removes the UTXO ``txid:txindex`` if it is in the cache.
+
+        :returns: The removed UTXO or ``None``.
+        """
+        with self._lock:
+            hash160 = self._owners.pop((txid, txindex), None)
+            if hash160 is None:
+                return None
+            return self._unspents[hash160].pop((txid, txindex))
+
+    def add_block(self, txids):
+        """Adds a confirmation to every confirmed UTXO and confirms the unconfirmed
+        ones created by ``txids``, the transactions of the new block."""
+        txids = set(txids)
+        with self._lock:
+            for unspents in self._unspents.values():
+                for unspent in unspents.values():
+                    if unspent.confirmations:
+                        unspent.confirmations += 1
+                    elif unspent.txid in txids:
+                        unspent.confirmations = 1
+
+    def get_unspents(self, hash160):
+        """:rtype: ``list`` of :class:`~bitsv.network.meta.Unspent`"""
+        with self._lock:
+            return list(self._unspents.get(hash160, {}).values())
+
+    def get_balance(self, hash160):
+        """:rtype: ``int``"""
+        with self._lock:
+            return sum(unspent.amount for unspent in self._unspents.get(hash160, {}).values())
+
+
+def to_txid_bytes(txid):
+    return txid if isinstance(txid, bytes) else hex_to_bytes(txid)[::-1]
+
+
+class UTXOSet:
+    """A compact collection of UTXOs for keys holding very many of them, usable
+    wherever a ``list`` of :class:`~bitsv.network.meta.Unspent` is, e.g. as
+    :attr:`~bitsv.PrivateKey.unspents`.
+
+    Amounts, confirmations and output indexes are kept in arrays, with an index
+    of the outpoints for constant time lookup and removal, a running
+    :attr:`total` and a view sorted by amount that is updated as UTXOs come and
+    go, so coin selection does not sort all of them for every transaction.
+    Txids are held as bytes, shared by all outputs of a transaction, and
+    iterating creates the :class:`~bitsv.network.meta.Unspent` objects on the
+    fly. Unlike :class:`UnspentCache` it is not thread-safe.
+
+    :param unspents: The initial UTXOs.
+    :type unspents: ``list`` of :class:`~bitsv.network.meta.Unspent`
+    """
+
+    def __init__(self, unspents=()):
+        self._clear()
+        self.update(unspents)
+
+    def _clear(self):
+        self._amounts = array('Q')
+        self._confirmations = array('q')
+        self._txindexes = array('I')
+        self._txids = []  # txid_bytes, None for free slots
+        # txid_bytes -> slot, or txid_bytes -> {txindex: slot} if several outputs
+        # of the transaction are unspent. Cheaper than indexing (txid, txindex) tuples.
+        self._index = {}
+        self._free = []
+        self._by_amount = array('I')  # slots sorted by (amount, slot)
+        self._count = 0
+        self.total = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for slot, txid in enumerate(self._txids):
+            if txid is not None:
+                yield self._unspent(slot)
+
+    def __contains__(self, outpoint):
+        txid, txindex = outpoint
+        return self._find(to_txid_bytes(txid), txindex) is not None
+
+    def __repr__(self):
+        return 'UTXOSet({} UTXOs, total={})'.format(len(self), self.total)
+
+    def _unspent(self, slot):
+        return Unspent(self._amounts[slot], self._confirmations[slot], self._txids[slot], self._txindexes[slot])
+
+    def _find(self, txid, txindex):
+        entry = self._index.get(txid)
+        if entry is None:
+            return None
+        if isinstance(entry, dict):
+            return entry.get(txindex)
+        return entry if self._txindexes[entry] == txindex else None
+
+    def _position(self, slot):
+        # Binary search of ``slot`` in the (amount, slot) order of _by_amount.
+        amounts, order = self._amounts, self._by_amount
+        amount = amounts[slot]
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            other = order[middle]
+            other_amount = amounts[other]
+            if other_amount < amount or (other_amount == amount and other < slot):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _store(self, unspent, sorted_view):
+        txid, txindex = unspent.txid_bytes, unspent.txindex
+        existing = self._find(txid, txindex)
+        if existing is not None:
+            self._remove(existing, sorted_view)
+
+        # Other outputs of the transaction share their txid.
+        entry = self._index.get(txid)
+        if entry is not None:
+            txid = self._txids[next(iter(entry.values())) if isinstance(entry, dict) else entry]
+
+        if self._free:
+            slot = self._free.pop()
+            self._amounts[slot] = unspent.amount
+            self._confirmations[slot] = unspent.confirmations
+            self._txindexes[slot] = txindex
+            self._txids[slot] = txid
+        else:
+            slot = len(self._txids)
+            self._amounts.append(unspent.amount)
+            self._confirmations.append(unspent.confirmations)
+            self._txindexes.append(txindex)
+            self._txids.append(txid)
+
+        if entry is None:
+            self._index[txid] = slot
+        elif isinstance(entry, dict):
+            entry[txindex] = slot
+        else:
+            self._index[txid] = {self._txindexes[entry]: entry, txindex: slot}
+        self._count += 1
+        self.total += unspent.amount
+        return slot
+
+    def _remove(self, slot, sorted_view):
+        if sorted_view:
+            del self._by_amount[self._position(slot)]
+        txid = self._txids[slot]
+        entry = self._index[txid]
+        if isinstance(entry, dict):
+            del entry[self._txindexes[slot]]
+            if len(entry) == 1:
+                self._index[txid], = entry.values()
+        else:
+            del self._index[txid]
+        self._txids[slot] = None
+        self._free.append(slot)
+        self._count -= 1
+        self.total -= self._amounts[slot]
+
+    def _live_slots(self):
+        return [slot for slot, txid in enumerate(self._txids) if txid is not None]
+
+    def add(self, unspent):
+        """Adds ``unspent``, replacing a UTXO with the same outpoint."""
+        slot = self._store(unspent, sorted_view=True)
+        self._by_amount.insert(self._position(slot), slot)
+
+    def update(self, unspents):
+        """Adds many UTXOs at once, sorting them into the view in one pass."""
+        for unspent in unspents:
+            self._store(unspent, sorted_view=False)
+        amounts = self._amounts
+        self._by_amount = array('I', sorted(self._live_slots(), key=lambda slot: (amounts[slot], slot)))
+
+    def replace(self, unspents):
+        """Replaces all UTXOs, e.g. with a fresh
+        :func:`~bitsv.network.NetworkAPI.get_unspents` result."""
+        self._clear()
+        self.update(unspents)
+
+    def get(self, txid, txindex):
+        """:param txid: The txid as hex or as :attr:`~bitsv.network.meta.Unspent.txid_bytes`.
+        :returns: The UTXO ``txid:txindex`` or ``None``.
+        :rtype: :class:`~bitsv.network.meta.Unspent`
+        """
+        slot = self._find(to_txid_bytes(txid), txindex)
+        return None if slot is None else self._unspent(slot)
+
+    def discard(self, txid, txindex):
+        """Removes the UTXO ``txid:txindex`` if it is in the set.
+
+        :returns: Whether it was in the set.
+        :rtype: ``bool``
+        """
+        slot = self._find(to_txid_bytes(txid), txindex)
+        if slot is None:
+            return False
+        self._remove(slot, sorted_view=True)
+        return True
+
+    def spend(self, unspents):
+        """Removes the UTXOs spent by a transaction, e.g. those returned by
+        :func:`~bitsv.transaction.sanitize_tx_data`. Unknown ones are ignored.
+
+        :type unspents: ``list`` of :class:`~bitsv.network.meta.Unspent`
+        """
+        for unspent in unspents:
+            self.discard(unspent.txid_bytes, unspent.txindex)
+
+    def iter_by_amount(self, reverse=False):
+        """Iterates over the UTXOs from the smallest amount to the largest.
+
+        :param reverse: Whether to start from the largest instead.
+        :type reverse: ``bool``
+        """
+        order = reversed(self._by_amount) if reverse else self._by_amount
+        for slot in order:
+            yield self._unspent(slot)
+
+    def to_dict(self):
+        """:returns: The UTXOs as columns of JSON serializable lists, see :func:`from_dict`.
+        :rtype: ``dict``
+        """
+        slots = self._live_slots()
+        return {
+            'amount': [self._amounts[slot] for slot in slots],
+            'confirmations': [self._confirmations[slot] for slot in slots],
+            'txid': [bytes_to_hex(self._txids[slot][::-1]) for slot in slots],
+            'txindex': [self._txindexes[slot] for slot in slots],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """:param d: Output of :func:`to_dict`.
+        :rtype: :class:`UTXOSet`
+        """
+        return cls(Unspent(*values) for values in zip(d['amount'], d['confirmations'], d['txid'], d['txindex']))
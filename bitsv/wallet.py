@@ -1,23 +1,93 @@
 import json
 
-from bitsv.crypto import ECPrivateKey
+from bitsv.crypto import ECPrivateKey, ripemd160_sha256, sign_low_r
 from bitsv.curve import Point
+from bitsv.exceptions import InsufficientFunds, UnconfirmedChainTooLong
 from bitsv.format import (
-    bytes_to_wif, public_key_to_address, public_key_to_coords, wif_to_bytes,
-    address_to_public_key_hash
+    bytes_to_wif, public_key_to_address, public_key_to_coords, wif_to_bytes
 )
-from bitsv.network import NetworkAPI, get_fee, satoshi_to_currency_cached, fees
+from bitsv.network.fees import get_fee_quote
+from bitsv.network.rates import satoshi_to_currency_cached
 from bitsv.network.meta import Unspent
+from bitsv.offline import deserialize_batch, prepare_transaction_data, serialize_batch
 from bitsv.transaction import (
-    calc_txid, create_p2pkh_transaction, sanitize_tx_data,
+    DUST, calc_txid, create_p2pkh_transaction, sanitize_tx_data, sign_p2pkh_transaction,
     OP_CHECKSIG, OP_DUP, OP_EQUALVERIFY, OP_HASH160, OP_PUSH_20
     )
+from bitsv.utils import MODULE_GETATTR
+from bitsv.utxo import UTXOSet
 from bitsv import op_return
 
-# Instantiate Main, Test and STN NetworkAPI instances for use by all PrivateKey[Test]'s
-network_api_main = NetworkAPI('main')
-network_api_test = NetworkAPI('test')
-network_api_stn = NetworkAPI('stn')
+# The NetworkAPI instances shared by all keys of a network, created on first use
+# so that offline use of keys never imports the network services.
+NETWORK_APIS = {}
+
+# Default -limitancestorcount of Bitcoin SV nodes, counting the transaction itself
+ANCESTOR_LIMIT = 1000
+
+
+def get_network_api(network):
+    """:returns: The :class:`~bitsv.network.NetworkAPI` of ``network`` shared by all keys.
+    :rtype: :class:`~bitsv.network.NetworkAPI`
+    """
+    network_api = NETWORK_APIS.get(network)
+    if network_api is None:
+        from bitsv.network.services import NetworkAPI
+        network_api = NETWORK_APIS.setdefault(network, NetworkAPI(network))
+    return network_api
+
+
+def __getattr__(name):
+    # network_api_main, network_api_test and network_api_stn were module globals.
+    if name in ('network_api_main', 'network_api_test', 'network_api_stn'):
+        return get_network_api(name[len('network_api_'):])
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+if not MODULE_GETATTR:  # pragma: no cover
+    network_api_main = get_network_api('main')
+    network_api_test = get_network_api('test')
+    network_api_stn = get_network_api('stn')
+
+
+def get_fee_rates(fee=None):
+    """Returns the standard and data satoshi per byte rates for ``fee``. Without a
+    ``fee`` the rates of :func:`~bitsv.network.get_fee_quote` are used."""
+    if fee:
+        return fee, None
+    quote = get_fee_quote()
+    return quote.standard, quote.data
+
+
+def get_change_unspent(tx_hex, outputs, n_outputs, address):
+    """Returns the change of a transaction as an unconfirmed
+    :class:`~bitsv.network.meta.Unspent`, or ``None`` if it has no change paid
+    to ``address``.
+
+    :param outputs: The outputs returned by :func:`~bitsv.transaction.sanitize_tx_data`,
+                    which always adds the change last.
+    :param n_outputs: The number of outputs passed to ``sanitize_tx_data``.
+    :param address: The address of the key that can spend the change.
+    :type address: ``str``
+    """
+    n_messages = sum(1 for _, amount in outputs if not amount)
+    if len(outputs) <= n_outputs + n_messages or outputs[-1][0] != address:
+        return None
+    return Unspent(outputs[-1][1], 0, calc_txid(tx_hex), len(outputs) - 1)
+
+
+def sign_prepared_transactions(private_key, transactions):
+    """Signs a list of :class:`~bitsv.offline.PreparedTransaction`.
+
+    :rtype: ``list`` of ``str``
+    """
+    return [sign_p2pkh_transaction(private_key, tx.inputs, tx.output_count, tx.output_block, low_r=tx.low_r)
+            for tx in transactions]
+
+
+def sign_prepared_transactions_with_wif(wif, network, transactions):
+    # Keys are passed to worker processes as WIF.
+    return sign_prepared_transactions(PrivateKey(wif, network=network), transactions)
 
 
 def wif_to_key(wif, network=None):
@@ -97,15 +167,21 @@ class BaseKey:
             self._public_point = Point(*public_key_to_coords(self._public_key))
         return self._public_point
 
-    def sign(self, data):
+    def sign(self, data, low_r=False):
         """Signs some data which can be verified later by others using
         the public key.
 
         :param data: The message to sign.
         :type data: ``bytes``
+        :param low_r: Whether to grind the nonce until R is low, which makes the
+                      signature at most 70 bytes. Takes two signing operations
+                      on average.
+        :type low_r: ``bool``
         :returns: A signature compliant with BIP-62.
         :rtype: ``bytes``
         """
+        if low_r:
+            return sign_low_r(self._pk, data)
         return self._pk.sign(data)
 
     def verify(self, signature, data):
@@ -170,26 +246,40 @@ class PrivateKey(BaseKey):
         super().__init__(wif=wif)
 
         self._address = None
+        self._public_key_hash = None
         self._scriptcode = None
+        self._public_key_push = None
 
         self.balance = 0
         self.unspents = []
         self.transactions = []
+        self.history = None
         self.network = network
+        self.ancestor_limit = ANCESTOR_LIMIT
+        # (txid, txindex) of unconfirmed change -> number of unconfirmed transactions in its chain
+        self.chain_depths = {}
 
-        # Standard network_api_main/test/stn objects are instantiated at top of this file as globals.
-        # Avoids multiple unnecessary instances of these in the case of many Keys
+        # The NetworkAPI is shared by all keys of a network and only created once it is used.
+        self._network_api = None
         if network == 'main':
-            self.network_api = network_api_main
             self.prefix = 'main'
         elif network == 'test':
-            self.network_api = network_api_test
             self.prefix = 'test'
         elif network == 'stn':
-            self.network_api = network_api_stn
             # Scaling-testnet has the same "prefix" as testnet (https://bitcoinscaling.io/)
             self.prefix = 'test'
 
+    @property
+    def network_api(self):
+        """The :class:`~bitsv.network.NetworkAPI` used to query and broadcast."""
+        if self._network_api is None:
+            self._network_api = get_network_api(self.network)
+        return self._network_api
+
+    @network_api.setter
+    def network_api(self, network_api):
+        self._network_api = network_api
+
     @property
     def address(self):
         """The public address you share with others to receive funds."""
@@ -198,13 +288,37 @@ class PrivateKey(BaseKey):
 
         return self._address
 
+    @property
+    def public_key_hash(self):
+        """The hash160 of the public key."""
+        if self._public_key_hash is None:
+            self._public_key_hash = ripemd160_sha256(self._public_key)
+
+        return self._public_key_hash
+
     @property
     def scriptcode(self):
-        self._scriptcode = (OP_DUP + OP_HASH160 + OP_PUSH_20 +
-                            address_to_public_key_hash(self.address) +
-                            OP_EQUALVERIFY + OP_CHECKSIG)
+        """The P2PKH script of the key, used as the scriptCode when signing."""
+        if self._scriptcode is None:
+            self._scriptcode = (OP_DUP + OP_HASH160 + OP_PUSH_20 +
+                                self.public_key_hash +
+                                OP_EQUALVERIFY + OP_CHECKSIG)
+
         return self._scriptcode
 
+    @property
+    def scriptpubkey(self):
+        """The output script paying the key, the same script as :attr:`scriptcode`."""
+        return self.scriptcode
+
+    @property
+    def public_key_push(self):
+        """The public key pushed onto the stack, as it ends every scriptSig."""
+        if self._public_key_push is None:
+            self._public_key_push = len(self._public_key).to_bytes(1, byteorder='little') + self._public_key
+
+        return self._public_key_push
+
     def to_wif(self):
         return bytes_to_wif(
             self._pk.secret,
@@ -231,7 +345,6 @@ class PrivateKey(BaseKey):
         :rtype: ``str``
         """
         self.get_unspents()
-        self.balance = sum(unspent.amount for unspent in self.unspents)
         return self.balance_as(currency)
 
     def get_unspents(self):
@@ -244,17 +357,26 @@ class PrivateKey(BaseKey):
         :param sort: 'value:desc' or 'value:asc' to sort unspents by descending/ascending order respectively
         :rtype: ``list`` of :class:`~bitsv.network.meta.Unspent`
         """
-        self.unspents[:] = self.network_api.get_unspents(self.address)
-        self.balance = sum(unspent.amount for unspent in self.unspents)
+        unspents = self.network_api.get_unspents(self.address)
+        if isinstance(self.unspents, UTXOSet):
+            self.unspents.replace(unspents)
+            self.balance = self.unspents.total
+        else:
+            self.unspents[:] = unspents
+            self.balance = sum(unspent.amount for unspent in self.unspents)
         return self.unspents
 
     def get_transactions(self):
-        """Fetches transaction history.
-        :param from_index: First index from transactions list to start collecting from
-        :param to_index: Final index to finish collecting transactions from
+        """Fetches transaction history. If :attr:`history` is set to a
+        :class:`~bitsv.history.HistoryIndex`, only transactions that are new since
+        the last call are fetched and the history is read from the index.
         :rtype: ``list`` of ``str`` transaction IDs
         """
-        self.transactions = self.network_api.get_transactions(self.address)
+        if self.history is not None:
+            self.history.sync(self.address)
+            self.transactions = self.history.get_transactions(self.address)
+        else:
+            self.transactions = self.network_api.get_transactions(self.address)
         return self.transactions
 
     def get_transaction(self, txid):
@@ -265,8 +387,25 @@ class PrivateKey(BaseKey):
         transaction = self.network_api.get_transaction(txid)
         return transaction
 
+    def get_chain_depth(self, unspents):
+        """Returns the number of unconfirmed transactions in the chain that a
+        transaction spending ``unspents`` would end, including itself. The depth of
+        unconfirmed change returned with ``return_change=True`` is tracked, other
+        unconfirmed UTXOs count as one ancestor.
+
+        :param unspents: The UTXOs to spend.
+        :type unspents: ``list`` of :class:`~bitsv.network.meta.Unspent`
+        :rtype: ``int``
+        """
+        depth = 0
+        for unspent in unspents:
+            if unspent.confirmations == 0:
+                depth = max(depth, self.chain_depths.get((unspent.txid, unspent.txindex), 1))
+        return depth + 1
+
     def create_transaction(self, outputs, fee=None, leftover=None, combine=True,
-                           message=None, unspents=None, custom_pushdata=False):  # pragma: no cover
+                           message=None, unspents=None, custom_pushdata=False,
+                           low_r=False, return_change=False):  # pragma: no cover
         """Creates a signed P2PKH transaction.
 
         :param outputs: A sequence of outputs you wish to send in the form
@@ -276,7 +415,8 @@ class PrivateKey(BaseKey):
                         must be :ref:`supported <supported currencies>`.
         :type outputs: ``list`` of ``tuple``
         :param fee: The number of satoshi per byte to pay to miners. By default
-                    BitSV will use a fee of `~bitsv.network.fees.DEFAULT_FEE_MEDIUM`.
+                    BitSV will use the rates of
+                    :func:`~bitsv.network.get_fee_quote`.
         :type fee: ``float``
         :param leftover: The destination that will receive any change from the
                          transaction. By default BitSV will send any change to
@@ -298,30 +438,110 @@ class PrivateKey(BaseKey):
                                 :func:`~bitsv.PrivateKey.send` function and the
                                 :func:`~bitsv.PrivateKey.create_transaction` functions.
         :type custom_pushdata: ``bool``
-        :returns: The signed transaction as hex.
-        :rtype: ``str``
+        :param low_r: Whether to grind signatures to a low R value, which saves one
+                      byte per input at the cost of extra signing time.
+        :type low_r: ``bool``
+        :param return_change: Whether to also return the change, which can be spent
+                              straight away by passing it as ``unspents``. Change
+                              paid to a ``leftover`` of another key is not returned.
+        :type return_change: ``bool``
+        :raises UnconfirmedChainTooLong: If the transaction would exceed the key's
+                                         ``ancestor_limit`` of unconfirmed ancestors.
+        :returns: The signed transaction as hex, and the change
+                  :class:`~bitsv.network.meta.Unspent` (or ``None``) if
+                  ``return_change`` is set.
+        :rtype: ``str`` or ``tuple``
         """
 
+        fee, data_fee = get_fee_rates(fee)
+        n_outputs = len(outputs)
+
         unspents, outputs = sanitize_tx_data(
             unspents or self.unspents,
             outputs,
-            fee or get_fee(),
+            fee,
             leftover or self.address,
             combine=combine,
             message=message,
             compressed=self.is_compressed(),
-            custom_pushdata=custom_pushdata
+            custom_pushdata=custom_pushdata,
+            low_r=low_r,
+            data_fee=data_fee
         )
 
-        return create_p2pkh_transaction(self, unspents, outputs, custom_pushdata=custom_pushdata)
+        depth = self.get_chain_depth(unspents)
+        if depth > self.ancestor_limit:
+            raise UnconfirmedChainTooLong('Transaction would have {} unconfirmed ancestors, the '
+                                          'limit is {}.'.format(depth, self.ancestor_limit))
+
+        tx_hex = create_p2pkh_transaction(self, unspents, outputs, custom_pushdata=custom_pushdata,
+                                          low_r=low_r)
+        if not return_change:
+            return tx_hex
+
+        change = get_change_unspent(tx_hex, outputs, n_outputs, self.address)
+        for unspent in unspents:
+            self.chain_depths.pop((unspent.txid, unspent.txindex), None)
+        if change is not None:
+            self.chain_depths[(change.txid, change.txindex)] = depth
+        return tx_hex, change
+
+    def split_utxos(self, n, amount_each, fee=None, unspents=None, combine=True, low_r=False):
+        """Creates a signed transaction paying ``n`` outputs of ``amount_each``
+        satoshi back to this key. Each of the new UTXOs can then be spent by a
+        different transaction at the same time, see :class:`~bitsv.utxo.UnspentPool`.
+
+        :param n: The number of UTXOs to create.
+        :type n: ``int``
+        :param amount_each: The amount of each UTXO in satoshi.
+        :type amount_each: ``int``
+        :param fee: The number of satoshi per byte to pay to miners. By default
+                    BitSV will use the rates of
+                    :func:`~bitsv.network.get_fee_quote`.
+        :type fee: ``float``
+        :param unspents: The UTXOs to split. Defaults to the key's.
+        :type unspents: ``list`` of :class:`~bitsv.network.meta.Unspent`
+        :param combine: Whether or not BitSV should use all available UTXOs.
+        :type combine: ``bool``
+        :param low_r: Whether to grind signatures to a low R value.
+        :type low_r: ``bool``
+        :raises InsufficientFunds: If the UTXOs cannot fund ``n * amount_each`` and the fee.
+        :returns: The signed transaction as hex, the ``n`` new UTXOs and the change
+                  UTXO (``None`` if there is no change).
+        :rtype: ``tuple`` of (``str``, ``list`` of :class:`~bitsv.network.meta.Unspent`,
+                :class:`~bitsv.network.meta.Unspent`)
+        """
+        if n < 1:
+            raise ValueError('n must be at least 1.')
+        if amount_each <= DUST:
+            raise ValueError('amount_each must be more than {} satoshi.'.format(DUST))
+
+        fee, data_fee = get_fee_rates(fee)
 
-    def create_op_return_tx(self, list_of_pushdata, outputs=None, fee=fees.DEFAULT_FEE_MEDIUM, unspents=None, leftover=None, combine=False):
+        unspents, outputs = sanitize_tx_data(
+            unspents or self.unspents,
+            [(self.address, amount_each, 'satoshi')] * n,
+            fee,
+            self.address,
+            combine=combine,
+            compressed=self.is_compressed(),
+            low_r=low_r,
+            data_fee=data_fee
+        )
+
+        tx_hex = create_p2pkh_transaction(self, unspents, outputs, low_r=low_r)
+        txid = calc_txid(tx_hex)
+        new_unspents = [Unspent(amount, 0, txid, index) for index, (_, amount) in enumerate(outputs)]
+
+        return tx_hex, new_unspents[:n], new_unspents[n] if len(new_unspents) > n else None
+
+    def create_op_return_tx(self, list_of_pushdata, outputs=None, fee=None, unspents=None, leftover=None, combine=False):
         """Creates a rawtx with OP_RETURN metadata ready for broadcast.
 
         Parameters
         ----------
         list_of_pushdata : a list of tuples (pushdata, encoding) where encoding is either "hex" or "utf-8"
-        fee : sat/byte (defaults to `~bitsv.network.fees.DEFAULT_FEE_MEDIUM`)
+        fee : sat/byte (defaults to the rates of `~bitsv.network.get_fee_quote`)
 
         Returns
         -------
@@ -342,7 +562,8 @@ class PrivateKey(BaseKey):
                         must be :ref:`supported <supported currencies>`.
         :type outputs: ``list`` of ``tuple``
         :param fee: The number of satoshi per byte to pay to miners. By default
-                    BitSV will use a fee of `~bitsv.network.fees.DEFAULT_FEE_MEDIUM`
+                    BitSV will use the rates of
+                    :func:`~bitsv.network.get_fee_quote`.
         :type fee: ``float``
         :param leftover: The destination that will receive any change from the
                          transaction. By default BitSV will send any change to
@@ -358,6 +579,7 @@ class PrivateKey(BaseKey):
         :param list_of_pushdata: List indicating pushdata to be included in op_return as e.g.:
                                 [('6d01', 'hex'),
                                  ('hello', 'utf-8')]
+                                or a :class:`~bitsv.op_return.PushdataBuilder`.
         :type list_of_pushdata:`list` of `tuples`
         """
         if not outputs:
@@ -374,13 +596,13 @@ class PrivateKey(BaseKey):
 
         return rawtx
 
-    def send_op_return(self, list_of_pushdata, outputs=None, fee=fees.DEFAULT_FEE_MEDIUM, unspents=None, leftover=None, combine=False):
+    def send_op_return(self, list_of_pushdata, outputs=None, fee=None, unspents=None, leftover=None, combine=False):
         """Sends a rawtx with OP_RETURN metadata ready for broadcast.
 
         Parameters
         ----------
         list_of_pushdata : a list of tuples (pushdata, encoding) where encoding is either "hex" or "utf-8"
-        fee : sat/byte (defaults to `~bitsv.network.fees.DEFAULT_FEE_MEDIUM`)
+        fee : sat/byte (defaults to the rates of `~bitsv.network.get_fee_quote`)
 
         Returns
         -------
@@ -401,7 +623,8 @@ class PrivateKey(BaseKey):
                         must be :ref:`supported <supported currencies>`.
         :type outputs: ``list`` of ``tuple``
         :param fee: The number of satoshi per byte to pay to miners. By default
-                    BitSV will use a fee of `~bitsv.network.fees.DEFAULT_FEE_MEDIUM`
+                    BitSV will use the rates of
+                    :func:`~bitsv.network.get_fee_quote`.
         :type fee: ``float``
         :param leftover: The destination that will receive any change from the
                          transaction. By default BitSV will send any change to
@@ -417,12 +640,14 @@ class PrivateKey(BaseKey):
         :param list_of_pushdata: List indicating pushdata to be included in op_return as e.g.:
                                 [('6d01', 'hex'),
                                  ('hello', 'utf-8')]
+                                or a :class:`~bitsv.op_return.PushdataBuilder`.
         :type list_of_pushdata:`list` of `tuples`
         """
         if not outputs:
             outputs = []
 
-        self.get_unspents()
+        if unspents is None:
+            self.get_unspents()
         pushdata = op_return.create_pushdata(list_of_pushdata)
         tx_hex = self.create_transaction(outputs=outputs, fee=fee, message=pushdata, custom_pushdata=True,
                                          combine=combine, unspents=unspents, leftover=leftover
@@ -446,7 +671,8 @@ class PrivateKey(BaseKey):
                          unspents=unspents, custom_pushdata=False)
 
     def send(self, outputs, fee=None, leftover=None, combine=True,
-             message=None, unspents=None, custom_pushdata=False):  # pragma: no cover
+             message=None, unspents=None, custom_pushdata=False, low_r=False,
+             return_change=False):  # pragma: no cover
         """Creates a signed P2PKH transaction and attempts to broadcast it on
         the blockchain. This accepts the same arguments as
         :func:`~bitsv.PrivateKey.create_transaction`.
@@ -458,7 +684,8 @@ class PrivateKey(BaseKey):
                         must be :ref:`supported <supported currencies>`.
         :type outputs: ``list`` of ``tuple``
         :param fee: The number of satoshi per byte to pay to miners. By default
-                    BitSV will use a fee of `~bitsv.network.fees.DEFAULT_FEE_MEDIUM`.
+                    BitSV will use the rates of
+                    :func:`~bitsv.network.get_fee_quote`.
         :type fee: ``float``
         :param leftover: The destination that will receive any change from the
                          transaction. By default BitSV will send any change to
@@ -480,23 +707,40 @@ class PrivateKey(BaseKey):
                                 :func:`~bitsv.PrivateKey.send` function and the
                                 :func:`~bitsv.PrivateKey.create_transaction` functions.
         :type custom_pushdata: ``bool``
-        :returns: The transaction ID.
-        :rtype: ``str``
+        :param low_r: Whether to grind signatures to a low R value, which saves one
+                      byte per input at the cost of extra signing time.
+        :type low_r: ``bool``
+        :param return_change: Whether to also return the unconfirmed change, so the
+                              next transaction can spend it without waiting for the
+                              API services to see it.
+        :type return_change: ``bool``
+        :raises UnconfirmedChainTooLong: If the transaction would exceed the key's
+                                         ``ancestor_limit`` of unconfirmed ancestors.
+        :returns: The transaction ID, and the change
+                  :class:`~bitsv.network.meta.Unspent` (or ``None``) if
+                  ``return_change`` is set.
+        :rtype: ``str`` or ``tuple``
         """
-        self.get_unspents()
+        if unspents is None:
+            self.get_unspents()
         tx_hex = self.create_transaction(
             outputs, fee=fee, leftover=leftover, combine=combine,
-            message=message, unspents=unspents, custom_pushdata=custom_pushdata
+            message=message, unspents=unspents, custom_pushdata=custom_pushdata,
+            low_r=low_r, return_change=return_change
         )
+        if return_change:
+            tx_hex, change = tx_hex
 
         self.network_api.broadcast_tx(tx_hex)
 
+        if return_change:
+            return calc_txid(tx_hex), change
         return calc_txid(tx_hex)
 
     @classmethod
     def prepare_transaction(cls, sender_address, outputs, network, compressed=True, fee=None,
             leftover=None, combine=True, message=None, unspents=None,
-            custom_pushdata=False):  # pragma: no cover
+            custom_pushdata=False, low_r=False):  # pragma: no cover
         """Prepares a P2PKH transaction for offline signing.
 
         :param network: The network ('main', 'test', 'stn')
@@ -512,7 +756,8 @@ class PrivateKey(BaseKey):
                            compressed public key. This influences the fee.
         :type compressed: ``bool``
         :param fee: The number of satoshi per byte to pay to miners. By default
-                    BitSV will use a fee of `~bitsv.network.fees.DEFAULT_FEE_MEDIUM`
+                    BitSV will use the rates of
+                    :func:`~bitsv.network.get_fee_quote`.
         :type fee: ``float``
         :param leftover: The destination that will receive any change from the
                          transaction. By default BitSV will send any change to
@@ -535,23 +780,31 @@ class PrivateKey(BaseKey):
                                 "switch" to the :func:`~bitsv.PrivateKey.send` function and the
                                 :func:`~bitsv.PrivateKey.create_transaction` functions.
         :type custom_pushdata: ``bool``
+        :param low_r: Whether the offline signer will grind signatures to a low R
+                      value. This is recorded in the returned data.
+        :type low_r: ``bool``
         :returns: JSON storing data required to create an offline transaction.
         :rtype: ``str``
         """
+        fee, data_fee = get_fee_rates(fee)
+
         unspents, outputs = sanitize_tx_data(
-            unspents or NetworkAPI(network=network).get_unspents(sender_address),
+            unspents or get_network_api(network).get_unspents(sender_address),
             outputs,
-            fee or get_fee(),
+            fee,
             leftover or sender_address,
             combine=combine,
             message=message,
             compressed=compressed,
-            custom_pushdata=custom_pushdata
+            custom_pushdata=custom_pushdata,
+            low_r=low_r,
+            data_fee=data_fee
         )
 
         data = {
             'unspents': [unspent.to_dict() for unspent in unspents],
-            'outputs': outputs
+            'outputs': outputs,
+            'low_r': low_r
         }
 
         return json.dumps(data)
@@ -570,7 +823,86 @@ class PrivateKey(BaseKey):
         unspents = [Unspent.from_dict(unspent) for unspent in data['unspents']]
         outputs = data['outputs']
 
-        return create_p2pkh_transaction(self, unspents, outputs)
+        return create_p2pkh_transaction(self, unspents, outputs, low_r=data.get('low_r', False))
+
+    @classmethod
+    def prepare_transactions(cls, sender_address, transactions, network, compressed=True, fee=None,
+                             leftover=None, unspents=None, low_r=False):
+        """Prepares many P2PKH transactions for offline signing in one compact batch,
+        see :func:`~bitsv.PrivateKey.sign_transactions`. Each transaction spends its
+        own UTXOs, taken smallest first from ``unspents``, and its change goes to
+        ``leftover``.
+
+        :param sender_address: The address the funds will be sent from.
+        :type sender_address: ``str``
+        :param transactions: The outputs of each transaction in the form
+                             ``(destination, amount, currency)``, see
+                             :func:`~bitsv.PrivateKey.prepare_transaction`.
+        :type transactions: ``list`` of ``list`` of ``tuple``
+        :param network: The network ('main', 'test', 'stn')
+        :param compressed: Whether or not the ``address`` corresponds to a
+                           compressed public key. This influences the fee.
+        :type compressed: ``bool``
+        :param fee: The number of satoshi per byte to pay to miners. By default
+                    BitSV will use the rates of
+                    :func:`~bitsv.network.get_fee_quote`.
+        :type fee: ``float``
+        :param leftover: The destination that will receive any change. Defaults to
+                         ``sender_address``.
+        :type leftover: ``str``
+        :param unspents: The UTXOs funding the batch. By default BitSV will
+                         communicate with the blockchain itself.
+        :type unspents: ``list`` of :class:`~bitsv.network.meta.Unspent`
+        :param low_r: Whether the offline signer will grind signatures to a low R value.
+        :type low_r: ``bool``
+        :raises InsufficientFunds: If the UTXOs cannot fund every transaction.
+        :returns: The batch in the binary format of :mod:`bitsv.offline`.
+        :rtype: ``bytes``
+        """
+        fee, data_fee = get_fee_rates(fee)
+        if unspents is None:
+            unspents = get_network_api(network).get_unspents(sender_address)
+        # Kept sorted by amount as UTXOs are spent, instead of sorting for every transaction.
+        available = UTXOSet(unspents)
+
+        prepared = []
+        for outputs in transactions:
+            if not available:
+                raise InsufficientFunds('The UTXOs ran out after {} transactions.'.format(len(prepared)))
+            tx_unspents, tx_outputs = sanitize_tx_data(
+                available, outputs, fee, leftover or sender_address, combine=False,
+                compressed=compressed, low_r=low_r, data_fee=data_fee
+            )
+            available.spend(tx_unspents)
+            prepared.append(prepare_transaction_data(tx_unspents, tx_outputs, low_r=low_r))
+
+        return serialize_batch(prepared)
+
+    def sign_transactions(self, batch, max_workers=None):
+        """Signs a batch from :func:`~bitsv.PrivateKey.prepare_transactions` in one
+        pass. With ``max_workers`` above 1 the batch is split across that many
+        processes.
+
+        :param batch: The prepared transactions.
+        :type batch: ``bytes``
+        :param max_workers: The number of processes to sign with.
+        :type max_workers: ``int``
+        :raises ValueError: If ``batch`` is not a valid batch.
+        :returns: The signed transactions as hex, in the order of the batch.
+        :rtype: ``list`` of ``str``
+        """
+        transactions = deserialize_batch(batch)
+        if not max_workers or max_workers < 2 or len(transactions) < 2:
+            return sign_prepared_transactions(self, transactions)
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunk_size = -(-len(transactions) // max_workers)
+        chunks = [transactions[i:i + chunk_size] for i in range(0, len(transactions), chunk_size)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            results = executor.map(sign_prepared_transactions_with_wif, [self.to_wif()] * len(chunks),
+                                   [self.network] * len(chunks), chunks)
+            return [tx_hex for chunk in results for tx_hex in chunk]
 
     @classmethod
     def from_hex(cls, hexed, network='main'):
@@ -46,10 +46,13 @@ setup(
         'Programming Language :: Python :: Implementation :: PyPy'
     ],
 
-    install_requires=['coincurve>=4.3.0', 'requests', 'python-bitcoinrpc', 'whatsonchain'],
+    install_requires=['coincurve>=6.0.0,<22', 'requests', 'python-bitcoinrpc', 'whatsonchain'],
     extras_require={
         'cli': ('appdirs', 'click', 'privy', 'tinydb'),
         'cache': ('lmdb', ),
+        'zmq': ('pyzmq', ),
+        'prometheus': ('prometheus_client', ),
+        'opentelemetry': ('opentelemetry-api', ),
     },
     tests_require=['pytest'],
 
@@ -1,6 +1,55 @@
+import json
+
 import pytest
+import requests
+
+import bitsv.network.fees as fees
+from bitsv.network.fees import (
+    FeeQuote, MAPIFeeProvider, StaticFeeProvider, get_fee, get_fee_quote, set_fee_provider
+)
+from tests.utils import raise_connection_error
+
+FEE_QUOTE_PAYLOAD = {
+    'apiVersion': '1.4.0',
+    'fees': [
+        {'feeType': 'standard',
+         'miningFee': {'satoshis': 500, 'bytes': 1000},
+         'relayFee': {'satoshis': 250, 'bytes': 1000}},
+        {'feeType': 'data',
+         'miningFee': {'satoshis': 250, 'bytes': 1000},
+         'relayFee': {'satoshis': 250, 'bytes': 1000}},
+    ]
+}
+
+
+class MockResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'payload': json.dumps(self.payload), 'encoding': 'UTF-8'}
+
+
+class CountingProvider:
+    def __init__(self, *quotes):
+        self.quotes = list(quotes)
+        self.calls = 0
 
-from bitsv.network.fees import get_fee
+    def get_fee_quote(self):
+        self.calls += 1
+        quote = self.quotes.pop(0)
+        if isinstance(quote, Exception):
+            raise quote
+        return quote
+
+
+@pytest.fixture(autouse=True)
+def reset_fee_provider():
+    yield
+    set_fee_provider(None)
 
 
 def test_get_fee():
@@ -11,3 +60,82 @@ def test_get_fee():
 def test_get_fee_invalid_speed():
     with pytest.raises(ValueError):
         get_fee(speed='super fast')
+
+
+def test_fee_quote_defaults_data_to_standard():
+    assert FeeQuote(2).data == 2
+    assert FeeQuote(2, 0.5) == FeeQuote(2, 0.5)
+    assert repr(FeeQuote(2, 0.5)) == 'FeeQuote(standard=2, data=0.5)'
+
+
+def test_get_fee_quote_without_provider():
+    assert get_fee_quote() == FeeQuote(get_fee())
+
+
+def test_static_fee_provider():
+    set_fee_provider(StaticFeeProvider(0.5, 0.25))
+    assert get_fee_quote() == FeeQuote(0.5, 0.25)
+
+
+def test_mapi_fee_provider(monkeypatch):
+    requested = []
+
+    def mock_get(url, headers, timeout):
+        requested.append((url, headers))
+        return MockResponse(FEE_QUOTE_PAYLOAD)
+
+    monkeypatch.setattr(requests, 'get', mock_get)
+    provider = MAPIFeeProvider('https://mapi.example.com/', token='secret')
+
+    assert provider.get_fee_quote() == FeeQuote(0.5, 0.25)
+    assert requested[0][0] == 'https://mapi.example.com/mapi/feeQuote'
+    assert requested[0][1]['Authorization'] == 'Bearer secret'
+
+
+def test_get_fee_quote_cached(monkeypatch):
+    provider = CountingProvider(FeeQuote(0.5), FeeQuote(0.25))
+    set_fee_provider(provider)
+
+    monkeypatch.setattr(fees, 'time', lambda: 1000)
+    assert get_fee_quote() == FeeQuote(0.5)
+    assert get_fee_quote() == FeeQuote(0.5)
+    assert provider.calls == 1
+
+    monkeypatch.setattr(fees, 'time', lambda: 1000 + fees.DEFAULT_FEE_CACHE_TIME + 1)
+    assert get_fee_quote() == FeeQuote(0.25)
+    assert provider.calls == 2
+
+
+def test_get_fee_quote_provider_down(monkeypatch):
+    provider = CountingProvider(requests.ConnectionError(), FeeQuote(0.5), requests.ConnectionError(), FeeQuote(0.25))
+    set_fee_provider(provider)
+
+    monkeypatch.setattr(fees, 'time', lambda: 1000)
+    assert get_fee_quote() == FeeQuote(get_fee())
+    assert get_fee_quote() == FeeQuote(get_fee())
+    assert provider.calls == 1
+
+    monkeypatch.setattr(fees, 'time', lambda: 1000 + fees.FEE_RETRY_TIME)
+    assert get_fee_quote() == FeeQuote(0.5)
+
+    # A failed refresh keeps the last quote and is retried soon instead of after the cache time.
+    expired = 1000 + fees.FEE_RETRY_TIME + fees.DEFAULT_FEE_CACHE_TIME + 1
+    monkeypatch.setattr(fees, 'time', lambda: expired)
+    assert get_fee_quote() == FeeQuote(0.5)
+    monkeypatch.setattr(fees, 'time', lambda: expired + fees.FEE_RETRY_TIME)
+    assert get_fee_quote() == FeeQuote(0.25)
+    assert provider.calls == 4
+
+
+def test_mapi_fee_provider_zero_bytes(monkeypatch):
+    payload = json.loads(json.dumps(FEE_QUOTE_PAYLOAD))
+    payload['fees'][0]['miningFee']['bytes'] = 0
+    monkeypatch.setattr(requests, 'get', lambda url, headers, timeout: MockResponse(payload))
+    with pytest.raises(ValueError):
+        MAPIFeeProvider('https://mapi.example.com').get_fee_quote()
+
+
+def test_mapi_fee_provider_unreachable(monkeypatch):
+    monkeypatch.setattr(requests, 'get', raise_connection_error)
+    with pytest.raises(ConnectionError):
+        MAPIFeeProvider('https://mapi.example.com').get_fee_quote()
@@ -9,6 +9,22 @@ class TestUnspent:
         assert unspent.txid == 'txid'
         assert unspent.txindex == 0
 
+    def test_txid_bytes(self):
+        txid = 'f3ad23dac2a3546167b27a43ac3e370236caf93f75bfcf27c625ec839d397888'
+        txid_bytes = bytes.fromhex(txid)[::-1]
+        assert Unspent(10000, 7, txid, 0).txid_bytes == txid_bytes
+
+        unspent = Unspent(10000, 7, txid_bytes, 0)
+        assert unspent.txid_bytes is txid_bytes
+        assert unspent.txid == txid
+        assert unspent == Unspent(10000, 7, txid, 0)
+        assert Unspent(10000, 7, txid, 0) == Unspent(10000, 7, txid_bytes, 0)
+        assert unspent.to_dict()['txid'] == txid
+        assert Unspent.from_dict(unspent.to_dict()) == unspent
+
+        unspent.txid = 'ab' * 32
+        assert unspent.txid_bytes == b'\xab' * 32
+
     def test_dict_conversion(self):
         unspent = Unspent(10000, 7, 'txid', 0)
 
@@ -0,0 +1,165 @@
+import collections
+import threading
+from unittest import mock
+
+import pytest
+
+from bitsv.network import NetworkAPI
+from bitsv.network.services.bsvbookguarda import BSVBookGuardaAPI
+from bitsv.network.services.mattercloud import MatterCloud
+from bitsv.network.services.pagination import TransactionPager
+from bitsv.network.services.whatsonchain import WhatsonchainNormalised
+
+ADDRESS = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+PAGES = {
+    1: ([('a1', 100), ('a2', 101)], 2),
+    2: ([('b1', 102), ('b2', 103)], 3),
+    3: ([('c1', 0)], None),
+}
+
+
+class StubPages:
+    def __init__(self):
+        self.requested = []
+        self.second_page = threading.Event()
+
+    def get_page(self, page):
+        self.requested.append(page)
+        if page == 2:
+            self.second_page.set()
+        return PAGES[page]
+
+
+class StubStatic:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get_page(self, page):
+        return self.entries, None
+
+
+class StubService:
+    def iter_transactions(self, address, since=None, cursor=None, heights=False):
+        return TransactionPager(StubStatic([('a1', 100)]).get_page, 0, cursor, heights)
+
+
+class DownService:
+    def iter_transactions(self, address, since=None, cursor=None, heights=False):
+        return TransactionPager(raise_connection_error, 0, cursor, heights)
+
+
+def raise_connection_error(page):
+    raise ConnectionError('unreachable')
+
+
+class StubResponse:
+    def __init__(self, response):
+        self.response = response
+
+    def raise_for_status(self):
+        pass
+
+    def json(self, **kwargs):
+        return self.response
+
+
+class TestTransactionPager:
+    def test_iterates_all_pages(self):
+        pages = StubPages()
+        assert list(TransactionPager(pages.get_page, 1)) == ['a1', 'a2', 'b1', 'b2', 'c1']
+        assert pages.requested == [1, 2, 3]
+
+    def test_prefetches_next_page(self):
+        pages = StubPages()
+        txids = iter(TransactionPager(pages.get_page, 1))
+        assert next(txids) == 'a1'
+        # The second page is requested while the first is still being consumed.
+        assert pages.second_page.wait(5)
+
+    def test_heights(self):
+        pager = TransactionPager(StubStatic([('a1', 100), ('a2', 0)]).get_page, 0, heights=True)
+        assert list(pager) == [('a1', 100), ('a2', 0)]
+
+    def test_resume_from_cursor(self):
+        pager = TransactionPager(StubPages().get_page, 1)
+        for txid in pager:
+            if txid == 'b1':
+                break
+        assert pager.cursor == (2, 1)
+
+        pages = StubPages()
+        assert list(TransactionPager(pages.get_page, 1, cursor=pager.cursor)) == ['b2', 'c1']
+        assert pages.requested == [2, 3]
+
+
+def test_network_api_uses_first_service():
+    network_api = NetworkAPI('main')
+    network_api.list_of_apis = collections.deque([StubService(), BSVBookGuardaAPI])
+    assert list(network_api.iter_transactions(ADDRESS, heights=True)) == [('a1', 100)]
+
+
+def test_network_api_failover():
+    network_api = NetworkAPI('main')
+    down, service = DownService(), StubService()
+    network_api.list_of_apis = collections.deque([down, service])
+    with mock.patch('time.sleep'):
+        assert list(network_api.iter_transactions(ADDRESS)) == ['a1']
+    assert list(network_api.list_of_apis) == [service, down]
+
+    network_api.list_of_apis = collections.deque([down])
+    with mock.patch('time.sleep'), pytest.raises(ConnectionError):
+        network_api.iter_transactions(ADDRESS)
+
+
+def test_fetch_first():
+    pages = StubPages()
+    pager = TransactionPager(pages.get_page, 1)
+    pager.fetch_first()
+    assert pages.requested == [1]
+    assert list(pager) == ['a1', 'a2', 'b1', 'b2', 'c1']
+    assert pages.requested == [1, 2, 3]
+
+
+def test_guarda_pages(monkeypatch):
+    urls = []
+
+    def get(url, timeout):
+        urls.append(url)
+        page = len(urls)
+        return StubResponse({'page': page, 'totalPages': 2, 'txids': ['tx{}'.format(page)]})
+
+    monkeypatch.setattr('bitsv.network.services.bsvbookguarda.requests.get', get)
+
+    assert BSVBookGuardaAPI.get_transactions(ADDRESS) == ['tx1', 'tx2']
+    assert urls[0] == ('https://bsvbook.guarda.co/api/v2/address/{}?details=txids&page=1&pageSize=1000'
+                       .format(ADDRESS))
+
+    urls.clear()
+    list(BSVBookGuardaAPI.iter_transactions(ADDRESS, since=600000))
+    assert urls[1].endswith('&page=2&pageSize=1000&from=600000')
+
+
+def test_mattercloud_pages(monkeypatch):
+    api = MatterCloud('key')
+    requested = []
+
+    def get_transactions_detailed(address, from_index, to_index):
+        requested.append(from_index)
+        items = [{'txid': 'tx{}'.format(i), 'blockheight': 600000 + i} for i in range(from_index, 1500)][:1000]
+        return {'totalItems': 1500, 'from': from_index, 'to': from_index + len(items), 'items': items}
+
+    monkeypatch.setattr(api, 'get_transactions_detailed', get_transactions_detailed)
+
+    txids = list(api.iter_transactions(ADDRESS, since=601400))
+    assert txids == ['tx{}'.format(i) for i in range(1400, 1500)]
+    assert requested == [0, 1000]
+
+
+def test_whatsonchain_since(monkeypatch):
+    api = WhatsonchainNormalised('main')
+    history = [{'tx_hash': 'old', 'height': 500}, {'tx_hash': 'new', 'height': 700},
+               {'tx_hash': 'unconfirmed', 'height': 0}]
+    monkeypatch.setattr(api, 'get_history', lambda address: history)
+
+    assert list(api.iter_transactions(ADDRESS, since=600)) == ['new', 'unconfirmed']
+    assert list(api.iter_transactions(ADDRESS, heights=True))[0] == ('old', 500)
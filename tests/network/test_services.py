@@ -2,8 +2,13 @@ import pytest
 
 import bitsv
 import collections
+from unittest import mock
+from bitsv.network.meta import Unspent
 from bitsv.network.services import NetworkAPI
 from bitsv.network.services.network import set_service_timeout
+from bitsv.transaction import calc_txid
+from bitsv.wallet import PrivateKey
+from tests.samples import WALLET_FORMAT_COMPRESSED_MAIN
 from tests.utils import raise_connection_error
 
 MAIN_ADDRESS_USED1 = '1L2JsXHPMYuAa9ugvHGLwkdstCPUDemNCf'
@@ -187,3 +192,78 @@ class TestNetworkAPI:
         network = NetworkAPI("main")
         network.list_of_apis = collections.deque([MockApi])
         assert "" == network.get_transaction(TEST_TX)
+
+
+class MockBroadcastApi:
+    def __init__(self, reject=()):
+        self.reject = reject
+        self.broadcasts = []
+
+    def send_transaction(self, tx_hex):
+        txid = calc_txid(tx_hex)
+        if txid in self.reject:
+            raise ValueError('Rejected')
+        self.broadcasts.append(txid)
+        return txid
+
+
+class DownBroadcastApi:
+    @staticmethod
+    def send_transaction(tx_hex):
+        raise_connection_error()
+
+
+def create_chain(length, unspent):
+    key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+    chain = []
+    for _ in range(length):
+        tx_hex, unspent = key.create_transaction([(TEST_ADDRESS_USED1, 1000, 'satoshi')], fee=1,
+                                                 unspents=[unspent], return_change=True)
+        chain.append(tx_hex)
+    return chain
+
+
+class TestBroadcastMany:
+    def get_network_api(self, api):
+        network_api = NetworkAPI('test')
+        network_api.list_of_apis = collections.deque([api])
+        return network_api
+
+    def test_dependency_order(self):
+        chain = create_chain(4, Unspent(100000, 1, TEST_TX, 0))
+        independent = create_chain(3, Unspent(100000, 1, TEST_TX, 1))
+        batch = chain[::-1] + independent
+        api = MockBroadcastApi()
+
+        results = self.get_network_api(api).broadcast_many(batch, max_workers=4)
+
+        assert [result.txid for result in results] == [calc_txid(tx_hex) for tx_hex in batch]
+        assert all(result.error is None for result in results)
+        assert sorted(api.broadcasts) == sorted(calc_txid(tx_hex) for tx_hex in batch)
+        chain_txids = [calc_txid(tx_hex) for tx_hex in chain]
+        assert [txid for txid in api.broadcasts if txid in chain_txids] == chain_txids
+
+    def test_failed_parent(self):
+        chain = create_chain(3, Unspent(100000, 1, TEST_TX, 0))
+        other = create_chain(1, Unspent(100000, 1, TEST_TX, 1))
+        api = MockBroadcastApi(reject={calc_txid(chain[1])})
+
+        results = self.get_network_api(api).broadcast_many(chain + other)
+
+        assert results[0].error is None
+        assert results[1].error == 'Rejected'
+        assert calc_txid(chain[1]) in results[2].error
+        assert results[3].error is None
+        assert sorted(api.broadcasts) == sorted([calc_txid(chain[0]), calc_txid(other[0])])
+
+    def test_shared_providers_not_rotated(self):
+        batch = create_chain(1, Unspent(100000, 1, TEST_TX, 0)) + create_chain(1, Unspent(100000, 1, TEST_TX, 1))
+        api = MockBroadcastApi()
+        network_api = NetworkAPI('test')
+        network_api.list_of_apis = collections.deque([DownBroadcastApi, api])
+
+        with mock.patch('time.sleep'):
+            results = network_api.broadcast_many(batch, max_workers=2)
+
+        assert all(result.error is None for result in results)
+        assert list(network_api.list_of_apis) == [DownBroadcastApi, api]
@@ -0,0 +1,158 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from bitsv.exceptions import InvalidWebhookSecret
+from bitsv.format import address_to_public_key_hash
+from bitsv.network.meta import Unspent
+from bitsv.network.services.mattercloud import MatterCloud
+from bitsv.network.services.webhook import MatterCloudWebhook
+from bitsv.utxo import UnspentCache
+from tests.samples import TXID
+
+SECRET = 'hunter2'
+PAYMENT_TXID = '9c1e0b2d9a0f9a49b5b1ac8a9d0e0c5d6b6e5c2f4b7d8a1c3e5f7a9b1d3f5e7a'
+RECEIVER = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+OTHER = '1L2JsXHPMYuAa9ugvHGLwkdstCPUDemNCf'
+
+
+def p2pkh_script(address):
+    return '76a914' + address_to_public_key_hash(address).hex() + '88ac'
+
+
+def create_payload(secret=SECRET, confirmations=0):
+    return {
+        'secret': secret,
+        'txid': PAYMENT_TXID,
+        'confirmations': confirmations,
+        'vin': [{'txid': TXID, 'vout': 0}],
+        'vout': [
+            {'n': 0, 'valueSat': 5000, 'scriptPubKey': {'hex': p2pkh_script(RECEIVER)}},
+            {'n': 1, 'valueSat': 1000, 'scriptPubKey': {'hex': p2pkh_script(OTHER)}},
+            {'n': 2, 'valueSat': 0, 'scriptPubKey': {'hex': '006a0568656c6c6f'}},
+        ],
+    }
+
+
+def call_wsgi(app, body, method='POST', query_string=''):
+    statuses = []
+    environ = {
+        'REQUEST_METHOD': method,
+        'QUERY_STRING': query_string,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    response = b''.join(app(environ, lambda status, headers: statuses.append(status)))
+    return statuses[0], json.loads(response)
+
+
+def call_asgi(app, body, query_string=b''):
+    sent = []
+    chunks = [{'type': 'http.request', 'body': body[:10], 'more_body': True},
+              {'type': 'http.request', 'body': body[10:], 'more_body': False}]
+
+    async def receive():
+        return chunks.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'query_string': query_string}
+    asyncio.run(app.asgi(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+class TestMatterCloudWebhook:
+    def test_requires_secret(self):
+        with pytest.raises(ValueError):
+            MatterCloudWebhook('')
+
+    def test_check_secret(self):
+        webhook = MatterCloudWebhook(SECRET)
+        webhook.check_secret(SECRET)
+        with pytest.raises(InvalidWebhookSecret):
+            webhook.check_secret('hunter3')
+        with pytest.raises(InvalidWebhookSecret):
+            webhook.check_secret(None)
+
+    def test_handle_payload(self):
+        hash160 = address_to_public_key_hash(RECEIVER)
+        cache = UnspentCache()
+        cache.set_unspents(hash160, [Unspent(100000, 3, TXID, 0), Unspent(2000, 3, TXID, 1)])
+        received = []
+        webhook = MatterCloudWebhook(SECRET, watch=[RECEIVER], cache=cache,
+                                     on_transaction=lambda tx, unspents: received.append(tx.txid))
+
+        unspents = webhook.handle_payload(create_payload())
+
+        assert unspents == [Unspent(5000, 0, PAYMENT_TXID, 0)]
+        assert (TXID, 0) not in cache
+        assert cache.get_balance(hash160) == 2000 + 5000
+        assert cache.get_unspents(address_to_public_key_hash(OTHER)) == []
+        assert received == [PAYMENT_TXID]
+
+    def test_wsgi(self):
+        webhook = MatterCloudWebhook(SECRET, watch=[RECEIVER])
+        body = json.dumps(create_payload(confirmations=1)).encode('utf-8')
+
+        assert call_wsgi(webhook, body) == ('200 OK', {'status': 'ok'})
+        assert webhook.cache.get_unspents(address_to_public_key_hash(RECEIVER)) == [
+            Unspent(5000, 1, PAYMENT_TXID, 0)
+        ]
+
+    def test_wsgi_rejected(self):
+        webhook = MatterCloudWebhook(SECRET, watch=[RECEIVER])
+        forged = json.dumps(create_payload(secret='hunter3')).encode('utf-8')
+
+        assert call_wsgi(webhook, forged)[0] == '403 Forbidden'
+        assert call_wsgi(webhook, b'not json')[0] == '400 Bad Request'
+        assert call_wsgi(webhook, b'\xff{}')[0] == '400 Bad Request'
+        assert call_wsgi(webhook, b'', method='GET')[0] == '405 Method Not Allowed'
+        assert len(webhook.cache.get_unspents(address_to_public_key_hash(RECEIVER))) == 0
+
+    def test_secret_in_query_string(self):
+        webhook = MatterCloudWebhook(SECRET, watch=[RECEIVER])
+        payload = create_payload()
+        del payload['secret']
+        body = json.dumps(payload).encode('utf-8')
+
+        assert call_wsgi(webhook, body)[0] == '403 Forbidden'
+        assert call_wsgi(webhook, body, query_string='secret=' + SECRET)[0] == '200 OK'
+
+    def test_asgi(self):
+        webhook = MatterCloudWebhook(SECRET, watch=[RECEIVER])
+        body = json.dumps(create_payload()).encode('utf-8')
+
+        assert call_asgi(webhook, body) == (200, {'status': 'ok'})
+        assert call_asgi(webhook, b'{"secret": "hunter3"}')[0] == 403
+        assert webhook.cache.get_balance(address_to_public_key_hash(RECEIVER)) == 5000
+
+    def test_register_in_bulk(self, monkeypatch):
+        requests_sent = []
+
+        class StubSession:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def put(self, url, data, headers):
+                requests_sent.append(json.loads(data)['addr'])
+
+                class Response:
+                    def raise_for_status(self):
+                        pass
+
+                    def json(self):
+                        return {}
+                return Response()
+
+        monkeypatch.setattr('bitsv.network.services.mattercloud.requests.Session', StubSession)
+        webhook = MatterCloudWebhook(SECRET, watch=[RECEIVER, OTHER])
+        webhook.watch(['1BQCscSMaJhezQvX6hzCdcRVdsxJuMAdwt'])
+
+        assert len(webhook.register(MatterCloud('key'), batch_size=2)) == 2
+        assert requests_sent == [RECEIVER + ',' + OTHER, '1BQCscSMaJhezQvX6hzCdcRVdsxJuMAdwt']
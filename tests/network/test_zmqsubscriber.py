@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from bitsv.format import address_to_public_key_hash
+from bitsv.network.meta import Unspent
+from bitsv.network.services.zmqsubscriber import ZMQSubscriber, get_p2pkh_hash160
+from bitsv.transaction import calc_txid
+from bitsv.utils import hex_to_bytes
+from bitsv.utxo import UnspentCache
+from bitsv.wallet import PrivateKey
+from tests.samples import TXID, WALLET_FORMAT_COMPRESSED_MAIN
+
+RECEIVER = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+OTHER = '1L2JsXHPMYuAa9ugvHGLwkdstCPUDemNCf'
+
+
+def create_payment(unspent, amount=5000):
+    key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+    return key.create_transaction([(RECEIVER, amount, 'satoshi'), (OTHER, 1000, 'satoshi')], fee=1,
+                                  unspents=[unspent], leftover=OTHER)
+
+
+class StubNode:
+    def __init__(self, txids):
+        self.txids = txids
+
+    def getblock(self, block_hash, verbosity):
+        return {'hash': block_hash, 'tx': self.txids}
+
+
+def test_get_p2pkh_hash160():
+    hash160 = address_to_public_key_hash(RECEIVER)
+    assert get_p2pkh_hash160(b'\x76\xa9\x14' + hash160 + b'\x88\xac') == hash160
+    assert get_p2pkh_hash160(b'\x00\x6a\x05hello') is None
+
+
+class TestZMQSubscriber:
+    def test_rawtx(self):
+        received = []
+        subscriber = ZMQSubscriber('tcp://127.0.0.1:28332', watch=[RECEIVER],
+                                   on_transaction=lambda txid, unspents: received.append(txid))
+        tx_hex = create_payment(Unspent(100000, 1, TXID, 0))
+        txid = calc_txid(tx_hex)
+
+        unspents = subscriber.handle_message([b'rawtx', hex_to_bytes(tx_hex), b'\x00' * 4])
+
+        assert unspents == [Unspent(5000, 0, txid, 0)]
+        assert subscriber.cache.get_unspents(address_to_public_key_hash(RECEIVER)) == unspents
+        assert subscriber.cache.get_unspents(address_to_public_key_hash(OTHER)) == []
+        assert received == [txid]
+
+    def test_spend(self):
+        hash160 = address_to_public_key_hash(RECEIVER)
+        cache = UnspentCache()
+        cache.set_unspents(hash160, [Unspent(100000, 3, TXID, 0), Unspent(2000, 3, TXID, 1)])
+        subscriber = ZMQSubscriber('tcp://127.0.0.1:28332', watch=[hash160], cache=cache)
+
+        subscriber.handle_rawtx(hex_to_bytes(create_payment(Unspent(100000, 3, TXID, 0))))
+
+        assert (TXID, 0) not in cache
+        assert cache.get_balance(hash160) == 2000 + 5000
+
+    def test_hashblock(self):
+        tx_hex = create_payment(Unspent(100000, 1, TXID, 0))
+        blocks = []
+        subscriber = ZMQSubscriber('tcp://127.0.0.1:28332', watch=[RECEIVER],
+                                   node=StubNode([calc_txid(tx_hex)]), on_block=blocks.append)
+        subscriber.handle_rawtx(hex_to_bytes(tx_hex))
+        subscriber.handle_message([b'hashblock', b'\xab' * 32, b'\x00' * 4])
+
+        assert blocks == ['ab' * 32]
+        assert subscriber.cache.get_unspents(address_to_public_key_hash(RECEIVER))[0].confirmations == 1
+
+
+def test_publisher_stub():
+    zmq = pytest.importorskip('zmq')
+    publisher = zmq.Context.instance().socket(zmq.PUB)
+    port = publisher.bind_to_random_port('tcp://127.0.0.1')
+    received = []
+    tx_hex = create_payment(Unspent(100000, 1, TXID, 0))
+
+    try:
+        with ZMQSubscriber('tcp://127.0.0.1:{}'.format(port), watch=[RECEIVER],
+                           on_transaction=lambda txid, unspents: received.append(txid)):
+            # Subscriptions take a moment to reach the publisher.
+            deadline = time.time() + 10
+            while not received and time.time() < deadline:
+                publisher.send_multipart([b'rawtx', hex_to_bytes(tx_hex), b'\x00' * 4])
+                time.sleep(0.05)
+    finally:
+        publisher.close(linger=0)
+
+    assert received and received[0] == calc_txid(tx_hex)
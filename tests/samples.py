@@ -30,6 +30,7 @@ PUBLIC_KEY_UNCOMPRESSED = (b"\x04=\\(u\xc9\xbd\x11hu\xa7\x1a]\xb6L\xff\xcb\x139k
                            b"LQ[r\xeb\x10\xf1\xfd\x8f?\x03\xb4/J+%[\xfc\x9a\xa9\xe3")
 PUBLIC_KEY_X = 27753912938952041417634381842191885283234814940840273460372041880794577257268
 PUBLIC_KEY_Y = 53663045980837260634637807506183816949039230809110041985901491152185762425315
+TXID = 'f3ad23dac2a3546167b27a43ac3e370236caf93f75bfcf27c625ec839d397888'
 WALLET_FORMAT_COMPRESSED_MAIN = 'L3jsepcttyuJK3HKezD4qqRKGtwc8d2d1Nw6vsoPDX9cMcUxqqMv'
 WALLET_FORMAT_COMPRESSED_TEST = 'cU6s7jckL3bZUUkb3Q2CD9vNu8F1o58K5R5a3JFtidoccMbhEGKZ'
 WALLET_FORMAT_COMPRESSED_STN = 'cN43RtkHWd9bKvAj2qYmgqbjJFE5BTzWDdk73kPmKL55ygnpas3G'
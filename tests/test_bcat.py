@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from bitsv.bcat import BCAT_PART_PREFIX, BCAT_PREFIX, BcatUpload, upload_file
+from bitsv.transaction import DUST, calc_txid, calc_tx_size
+from bitsv.utils import bytes_to_hex, flip_hex_byte_order
+from .utils import get_key
+
+DATA = os.urandom(2500)
+
+
+class TestBcatUpload:
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            BcatUpload(get_key(10 ** 8), b'')
+
+    def test_part_size_too_large(self):
+        with pytest.raises(ValueError):
+            BcatUpload(get_key(10 ** 8), DATA, part_size=100000)
+
+    def test_create_transactions(self):
+        upload = BcatUpload(get_key(10 ** 8), DATA, mime_type='text/plain', filename='a.txt',
+                            fee=1, part_size=1000)
+        fan_out, *parts, bcat = upload.create_transactions(max_workers=2)
+
+        assert upload.n_parts == 3 == len(parts)
+        fan_out_txid = flip_hex_byte_order(calc_txid(fan_out))
+        for index, part in enumerate(parts):
+            start = index * 1000
+            assert fan_out_txid + (index).to_bytes(4, 'little').hex() in part
+            assert bytes_to_hex(BCAT_PART_PREFIX + b'\x4d') in part
+            assert bytes_to_hex(DATA[start:start + 1000]) in part
+            # Each part spends exactly the fee it needs (up to a shorter signature).
+            assert 0 <= upload.amounts[index] - calc_tx_size(part) <= 1
+
+        assert bytes_to_hex(BCAT_PREFIX) in bcat
+        assert bytes_to_hex(b'text/plain') in bcat
+        assert bytes_to_hex(b'a.txt') in bcat
+        assert ''.join('20' + calc_txid(part) for part in parts) in bcat
+        # Outputs are never below the dust limit.
+        assert calc_tx_size(bcat) < upload.amounts[-1] == DUST
+
+    def test_upload(self):
+        key = get_key(10 ** 8)
+
+        upload = BcatUpload(key, DATA, fee=1, part_size=1000, unspents=key.unspents)
+        txid = upload.upload(max_workers=3)
+
+        broadcasts = key.network_api.broadcasts
+        assert len(broadcasts) == 5
+        assert broadcasts[0] == upload.fan_out
+        assert calc_txid(broadcasts[-1]) == txid
+
+
+def test_upload_file(tmpdir):
+    key = get_key(10 ** 8)
+    path = tmpdir.join('file.bin')
+    path.write_binary(DATA)
+
+    txid = upload_file(key, str(path), fee=1, part_size=2000, unspents=key.unspents)
+
+    bcat = key.network_api.broadcasts[-1]
+    assert calc_txid(bcat) == txid
+    assert bytes_to_hex(b'file.bin') in bcat
+    assert len(key.network_api.broadcasts) == 4
@@ -0,0 +1,102 @@
+import pytest
+
+from bitsv.format import address_to_public_key_hash
+from bitsv.history import HistoryIndex
+from bitsv.network.transaction import Transaction, TxOutput
+from bitsv.wallet import PrivateKey
+from .samples import WALLET_FORMAT_COMPRESSED_MAIN
+
+ADDRESS = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+SCRIPT = '76a914' + address_to_public_key_hash(ADDRESS).hex() + '88ac'
+
+
+class StubNetworkAPI:
+    def __init__(self, history):
+        self.history = history
+        self.since = []
+        self.fetched = []
+
+    def iter_transactions(self, address, since=None, cursor=None, heights=False):
+        self.since.append(since)
+        return iter([(txid, height) for txid, height in self.history
+                     if since is None or height >= since or height == 0])
+
+    def get_transaction(self, txid):
+        self.fetched.append(txid)
+        amount = int(txid[2:])
+        return Transaction(txid, [], [TxOutput(SCRIPT, amount), TxOutput('006a', 0), TxOutput('51', 7)])
+
+
+class TestHistoryIndex:
+    def test_sync_fetches_only_new(self):
+        network_api = StubNetworkAPI([('tx100', 100), ('tx200', 200)])
+        index = HistoryIndex(network_api=network_api)
+
+        assert index.sync(ADDRESS) == 2
+        assert index.get_synced_height(ADDRESS) == 200
+
+        network_api.history += [('tx300', 300), ('tx0', 0)]
+        assert index.sync(ADDRESS) == 2
+        assert network_api.since == [None, 200 - 6]
+        assert index.get_transactions(ADDRESS) == ['tx100', 'tx200', 'tx300', 'tx0']
+        assert index.get_transactions(ADDRESS, since=250) == ['tx300', 'tx0']
+
+    def test_unconfirmed_replaced(self):
+        network_api = StubNetworkAPI([('tx100', 100), ('tx5', 0), ('tx6', 0)])
+        index = HistoryIndex(network_api=network_api)
+        index.sync(ADDRESS)
+
+        # tx5 was confirmed and tx6 dropped from the mempool.
+        network_api.history = [('tx100', 100), ('tx5', 101)]
+        assert index.sync(ADDRESS) == 0
+        assert index.get_transactions(ADDRESS) == ['tx100', 'tx5']
+
+    def test_reorg_removes_dropped(self):
+        network_api = StubNetworkAPI([('tx100', 100), ('tx198', 198), ('tx200', 200)])
+        index = HistoryIndex(network_api=network_api)
+        index.sync(ADDRESS)
+
+        # The blocks of tx198 and tx200 were reorganized away.
+        network_api.history = [('tx100', 100), ('tx199', 199)]
+        assert index.sync(ADDRESS) == 1
+        assert index.get_transactions(ADDRESS) == ['tx100', 'tx199']
+        assert index.get_synced_height(ADDRESS) == 199
+
+    def test_requires_network_api(self):
+        index = HistoryIndex()
+        index.add_transactions(ADDRESS, [('tx100', 100)])
+        with pytest.raises(ValueError):
+            index.sync(ADDRESS)
+        with pytest.raises(ValueError):
+            index.get_received(ADDRESS, 0)
+
+    def test_get_received(self):
+        network_api = StubNetworkAPI([('tx100', 100), ('tx200', 200), ('tx300', 300), ('tx0', 0)])
+        index = HistoryIndex(network_api=network_api)
+        index.sync(ADDRESS)
+
+        assert index.get_received(ADDRESS, 150) == 200 + 300
+        assert index.get_received(ADDRESS, 0, 200) == 100 + 200
+        # Amounts are looked up once.
+        assert sorted(network_api.fetched) == ['tx100', 'tx200', 'tx300']
+
+    def test_persistent(self, tmp_path):
+        path = str(tmp_path / 'history.db')
+        with HistoryIndex(path, StubNetworkAPI([('tx100', 100)])) as index:
+            index.sync(ADDRESS)
+
+        network_api = StubNetworkAPI([('tx100', 100)])
+        with HistoryIndex(path, network_api) as index:
+            assert index.get_transactions(ADDRESS) == ['tx100']
+            index.sync(ADDRESS)
+        assert network_api.since == [100 - 6]
+
+
+def test_private_key_uses_history():
+    key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+    network_api = StubNetworkAPI([('tx200', 200), ('tx100', 100)])
+    key.history = HistoryIndex(network_api=network_api)
+
+    assert key.get_transactions() == ['tx100', 'tx200']
+    assert key.get_transactions() == ['tx100', 'tx200']
+    assert len(network_api.since) == 2
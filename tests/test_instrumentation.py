@@ -0,0 +1,168 @@
+import collections
+import functools
+from unittest import mock
+
+import pytest
+
+from bitsv import instrumentation
+from bitsv.instrumentation import (
+    Instrumentation, OpenTelemetryInstrumentation, PrometheusInstrumentation, set_instrumentation
+)
+from bitsv.network.meta import Unspent
+from bitsv.network.rates import currency_to_satoshi_local_cache
+from bitsv.network.services import NetworkAPI
+from bitsv.transaction import UnsignedTransaction, calc_tx_size
+from bitsv.wallet import PrivateKey
+from .samples import TXID, WALLET_FORMAT_COMPRESSED_MAIN
+from .utils import raise_connection_error
+
+RECEIVER = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+
+
+class RecordingInstrumentation(Instrumentation):
+    def __init__(self):
+        self.calls = []
+
+    def provider_call(self, provider, method, outcome, seconds):
+        self.calls.append(('provider_call', provider, method, outcome))
+
+    def input_signed(self, seconds):
+        self.calls.append(('input_signed',))
+
+    def transaction_serialized(self, seconds, size):
+        self.calls.append(('transaction_serialized', size))
+
+    def rate_cache(self, currency, hit):
+        self.calls.append(('rate_cache', currency, hit))
+
+
+class FlakyApi:
+    failures = 0
+
+    @classmethod
+    def get_balance(cls, address):
+        if cls.failures:
+            cls.failures -= 1
+            raise_connection_error()
+        return 10
+
+
+class InheritedApi(FlakyApi):
+    pass
+
+
+class DownApi:
+    @staticmethod
+    def get_balance(address):
+        raise_connection_error()
+
+
+@pytest.fixture
+def hooks():
+    hooks = RecordingInstrumentation()
+    set_instrumentation(hooks)
+    yield hooks
+    set_instrumentation(None)
+
+
+def create_signed_transaction(n_inputs=2):
+    key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+    tx = UnsignedTransaction.from_unspents([Unspent(10000, 1, TXID, i) for i in range(n_inputs)],
+                                           [(RECEIVER, 5000)])
+    tx.sign(key)
+    return tx
+
+
+def test_disabled_by_default():
+    assert instrumentation.get_instrumentation() is None
+
+
+def test_set_instrumentation(hooks):
+    assert instrumentation.get_instrumentation() is hooks
+
+
+class TestProviderCalls:
+    def test_success(self, hooks):
+        network = NetworkAPI('main')
+        network.list_of_apis = collections.deque([FlakyApi])
+        assert network.get_balance(RECEIVER) == 10
+        assert hooks.calls == [('provider_call', 'FlakyApi', 'get_balance', 'success')]
+
+    def test_retry_and_failover(self, hooks):
+        FlakyApi.failures = 1
+        network = NetworkAPI('main')
+        network.list_of_apis = collections.deque([DownApi, FlakyApi])
+        with mock.patch('time.sleep'):
+            assert network.get_balance(RECEIVER) == 10
+        assert hooks.calls == [
+            ('provider_call', 'DownApi', 'get_balance', 'retry'),
+            ('provider_call', 'DownApi', 'get_balance', 'retry'),
+            ('provider_call', 'DownApi', 'get_balance', 'failure'),
+            ('provider_call', 'FlakyApi', 'get_balance', 'retry'),
+            ('provider_call', 'FlakyApi', 'get_balance', 'success'),
+        ]
+
+    def test_inherited_method(self, hooks):
+        network = NetworkAPI('main')
+        network.list_of_apis = collections.deque([InheritedApi])
+        assert network.get_balance(RECEIVER) == 10
+        assert hooks.calls == [('provider_call', 'InheritedApi', 'get_balance', 'success')]
+
+    def test_callable_without_qualname(self, hooks):
+        network = NetworkAPI('main')
+        get_balance = functools.partial(FlakyApi.get_balance)
+        assert network.invoke_api_call([get_balance], RECEIVER) == 10
+        assert hooks.calls == [('provider_call', '', repr(get_balance), 'success')]
+
+
+def test_signing_and_serialization(hooks):
+    tx_hex = create_signed_transaction(n_inputs=3).to_hex()
+    assert hooks.calls == [('input_signed',)] * 3 + [('transaction_serialized', calc_tx_size(tx_hex))]
+
+
+def test_rate_cache(hooks):
+    convert = currency_to_satoshi_local_cache(None)
+    assert convert(1, 'bsv') == convert(2, 'bsv') // 2
+    assert hooks.calls == [('rate_cache', 'bsv', False), ('rate_cache', 'bsv', True)]
+
+
+def test_prometheus():
+    prometheus_client = pytest.importorskip('prometheus_client')
+    registry = prometheus_client.CollectorRegistry()
+    set_instrumentation(PrometheusInstrumentation(registry=registry))
+    try:
+        create_signed_transaction().to_hex()
+        instrumentation.INSTRUMENTATION.rate_cache('usd', True)
+    finally:
+        set_instrumentation(None)
+
+    assert registry.get_sample_value('bitsv_input_signing_seconds_count') == 2
+    assert registry.get_sample_value('bitsv_serialization_seconds_count') == 1
+    assert registry.get_sample_value('bitsv_rate_cache_lookups_total', {'currency': 'usd', 'result': 'hit'}) == 1
+
+
+def test_opentelemetry():
+    pytest.importorskip('opentelemetry.sdk')
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter('bitsv')
+    set_instrumentation(OpenTelemetryInstrumentation(meter=meter))
+    try:
+        create_signed_transaction().to_hex()
+        instrumentation.INSTRUMENTATION.provider_call('FlakyApi', 'get_balance', 'success', 0.1)
+    finally:
+        set_instrumentation(None)
+
+    metrics = {
+        metric.name: metric.data.data_points
+        for resource in reader.get_metrics_data().resource_metrics
+        for scope in resource.scope_metrics
+        for metric in scope.metrics
+    }
+    assert metrics['bitsv.input.signing.duration'][0].count == 2
+    assert metrics['bitsv.serialization.duration'][0].count == 1
+    assert dict(metrics['bitsv.provider.call.duration'][0].attributes) == {
+        'provider': 'FlakyApi', 'method': 'get_balance', 'outcome': 'success'
+    }
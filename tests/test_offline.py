@@ -0,0 +1,78 @@
+import pytest
+
+from bitsv.exceptions import InsufficientFunds
+from bitsv.network.meta import Unspent
+from bitsv.offline import deserialize_batch, prepare_transaction_data, serialize_batch
+from bitsv.transaction import calc_txid, create_p2pkh_transaction, deserialize_tx
+from bitsv.wallet import PrivateKey
+from .samples import TXID, WALLET_FORMAT_COMPRESSED_MAIN
+
+RECEIVER = '1ELReFsTCUY2mfaDTy32qxYiT49z786eFg'
+UNSPENTS = [Unspent(20000 + i, 1, TXID, i) for i in range(6)]
+
+
+def create_batch(n=3, low_r=False):
+    key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+    return key, PrivateKey.prepare_transactions(
+        key.address, [[(RECEIVER, 10000 + i, 'satoshi')] for i in range(n)], 'main', fee=1,
+        unspents=UNSPENTS, low_r=low_r
+    )
+
+
+class TestBatchFormat:
+    def test_round_trip(self):
+        prepared = [
+            prepare_transaction_data(UNSPENTS[:2], [(RECEIVER, 30000)]),
+            prepare_transaction_data(UNSPENTS[2:3], [(b'\x01hi', 0), (RECEIVER, 1000)], custom_pushdata=True,
+                                     low_r=True),
+        ]
+        batch = serialize_batch(prepared)
+        assert batch[:4] == b'BSVB'
+
+        loaded = deserialize_batch(batch)
+        assert [tx.inputs for tx in loaded] == [tx.inputs for tx in prepared]
+        assert [tx.output_block for tx in loaded] == [tx.output_block for tx in prepared]
+        assert [(tx.output_count, tx.low_r) for tx in loaded] == [(1, False), (2, True)]
+
+    def test_invalid(self):
+        batch = serialize_batch([prepare_transaction_data(UNSPENTS[:2], [(RECEIVER, 30000)])])
+        with pytest.raises(ValueError):
+            deserialize_batch(b'{"unspents": []}')
+        with pytest.raises(ValueError):
+            deserialize_batch(batch[:20])
+        with pytest.raises(ValueError):
+            deserialize_batch(batch[:-3])
+        with pytest.raises(ValueError):
+            deserialize_batch(batch + b'\x00')
+
+
+class TestSignTransactions:
+    def test_matches_online_signing(self):
+        key, batch = create_batch()
+        signed = key.sign_transactions(batch)
+
+        assert len(signed) == 3
+        spent = set()
+        for i, tx_hex in enumerate(signed):
+            tx = deserialize_tx(tx_hex)
+            outpoints = set((txin.txid, txin.txindex) for txin in tx.inputs)
+            assert not outpoints & spent
+            spent |= outpoints
+            assert tx.outputs[0].amount == 10000 + i
+
+        # Signatures are deterministic, so the online path gives the same transaction.
+        tx_data = deserialize_batch(batch)[0]
+        unspents = [u for u in UNSPENTS if (bytes.fromhex(u.txid)[::-1], u.txindex.to_bytes(4, 'little'))
+                    in set((txin.txid, txin.txindex) for txin in tx_data.inputs)]
+        change = deserialize_tx(signed[0]).outputs[1].amount
+        assert signed[0] == create_p2pkh_transaction(key, unspents, [(RECEIVER, 10000), (key.address, change)])
+
+    def test_processes(self):
+        key, batch = create_batch(n=5, low_r=True)
+        signed = key.sign_transactions(batch, max_workers=2)
+        assert signed == key.sign_transactions(batch)
+        assert len(set(calc_txid(tx_hex) for tx_hex in signed)) == 5
+
+    def test_insufficient_funds(self):
+        with pytest.raises(InsufficientFunds):
+            create_batch(n=7)
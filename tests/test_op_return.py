@@ -0,0 +1,95 @@
+import pytest
+
+from bitsv.network.meta import Unspent
+from bitsv.op_return import (
+    MESSAGE_LIMIT, PushdataBuilder, create_pushdata, get_op_pushdata_code, get_pushdata_size
+)
+from bitsv.wallet import PrivateKey
+from .samples import WALLET_FORMAT_COMPRESSED_MAIN
+
+PUSHDATA = b'\x02\x6d\x01\x08New_Name'
+
+
+def test_get_op_pushdata_code():
+    assert get_op_pushdata_code(b'x' * 75) == b'\x4b'
+    assert get_op_pushdata_code(b'x' * 76) == b'\x4c\x4c'
+    assert get_op_pushdata_code(b'x' * 256) == b'\x4d\x00\x01'
+    assert get_op_pushdata_code(b'x' * 65536) == b'\x4e\x00\x00\x01\x00'
+
+
+def test_get_pushdata_size():
+    for length in (0, 75, 76, 255, 256, 65535, 65536):
+        assert get_pushdata_size(length) == len(get_op_pushdata_code(b'x' * length)) + length
+
+
+class TestCreatePushdata:
+    def test_bytes(self):
+        assert create_pushdata([bytes.fromhex('6d01'), b'New_Name']) == PUSHDATA
+
+    def test_tuples(self):
+        assert create_pushdata([('6d01', 'hex'), ('New_Name', 'utf-8')]) == PUSHDATA
+        assert create_pushdata([(b'\x6d\x01', 'bytes'), ('New_Name', 'utf-8')]) == PUSHDATA
+
+    def test_utf8_length_in_bytes(self):
+        assert create_pushdata([('é', 'utf-8')]) == b'\x02\xc3\xa9'
+
+    def test_odd_hex(self):
+        with pytest.raises(ValueError):
+            create_pushdata([('6d0', 'hex')])
+
+    def test_too_large(self):
+        with pytest.raises(ValueError):
+            create_pushdata([('00' * MESSAGE_LIMIT, 'hex')])
+
+    def test_builder(self):
+        builder = PushdataBuilder(bytes.fromhex('6d01'))
+        assert create_pushdata(builder) == b'\x02\x6d\x01'
+
+
+class TestPushdataBuilder:
+    def test_mixed(self):
+        builder = PushdataBuilder(b'\x6d\x01', limit=100)
+        builder.add('New_Name')
+        builder.add_hex('deadbeef')
+        builder.add(('ff', 'hex'))
+        assert builder.to_bytes() == PUSHDATA + b'\x04\xde\xad\xbe\xef\x01\xff'
+        assert builder.size == len(builder.to_bytes())
+
+    def test_generator(self):
+        builder = PushdataBuilder()
+        builder.extend(bytes([i % 256]) * i for i in range(300))
+        assert builder.to_bytes() == b''.join(get_op_pushdata_code(bytes([i % 256]) * i) + bytes([i % 256]) * i
+                                             for i in range(300))
+
+    def test_iterable_argument(self):
+        builder = PushdataBuilder(b'\x6d\x01', (data for data in ['New_Name']))
+        assert builder.to_bytes() == PUSHDATA
+
+    def test_empty_is_truthy(self):
+        builder = PushdataBuilder()
+        assert builder and builder.size == 0
+
+    def test_extend_hex(self):
+        builder = PushdataBuilder()
+        builder.extend(['6d01', 'ff'], encoding='hex')
+        assert builder.to_bytes() == b'\x02\x6d\x01\x01\xff'
+
+    def test_limit_checked_before_serializing(self):
+        builder = PushdataBuilder(limit=10)
+        builder.add(b'x' * 9)
+        with pytest.raises(ValueError):
+            builder.add(b'x')
+        assert builder.to_bytes() == b'\x09' + b'x' * 9
+
+    def test_invalid_type(self):
+        with pytest.raises(TypeError):
+            PushdataBuilder(1)
+        with pytest.raises(TypeError):
+            PushdataBuilder(('text', 'bytes'))
+
+    def test_create_op_return_tx(self):
+        key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+        unspents = [Unspent(100000, 1, 'f3ad23dac2a3546167b27a43ac3e370236caf93f75bfcf27c625ec839d397888', 0)]
+        builder = PushdataBuilder(b'\x6d\x01', 'New_Name')
+        tx_hex = key.create_op_return_tx(builder, fee=1, unspents=unspents)
+        assert '006a' + PUSHDATA.hex() in tx_hex
@@ -1,14 +1,18 @@
+import math
+
 import pytest
 
 from bitsv.exceptions import InsufficientFunds
+from bitsv.format import address_to_public_key_hash
 from bitsv.network.meta import Unspent
 from bitsv.transaction import (
-    TxIn, calc_txid, create_p2pkh_transaction, construct_input_block,
-    construct_output_block, estimate_tx_fee, sanitize_tx_data
+    TxIn, calc_fee, calc_tx_size, calc_txid, create_p2pkh_transaction, construct_input_block,
+    construct_output_block, deserialize_tx, estimate_tx_fee, get_dependency_order, estimate_tx_size, get_input_size,
+    get_op_return_size, get_p2pkh_script, get_parent_txids, sanitize_tx_data, LOW_R_SIGNATURE_SIZE, UnsignedTransaction
 )
 from bitsv.utils import hex_to_bytes
 from bitsv.wallet import PrivateKey
-from .samples import WALLET_FORMAT_MAIN, BITCOIN_ADDRESS_TEST_COMPRESSED
+from .samples import WALLET_FORMAT_COMPRESSED_MAIN, WALLET_FORMAT_MAIN, BITCOIN_ADDRESS_TEST_COMPRESSED
 
 
 RETURN_ADDRESS = 'n2eMqTT929pb1RDNuqEnxdaLau1rxy3efi'
@@ -251,6 +255,23 @@ class TestSanitizeTxData:
         assert outputs_single[1][0] == RETURN_ADDRESS
         assert outputs[1][1] == outputs_single[1][1]
 
+    def test_data_fee(self):
+        unspents_original = [Unspent(100000, 0, '', 0)]
+        outputs_original = [(BITCOIN_ADDRESS_TEST_COMPRESSED, 1000, 'satoshi')]
+        message = 'x' * 1000
+        data_size = 2 + 3 + 1000  # OP_FALSE OP_RETURN + OP_PUSHDATA2 + data
+
+        _, outputs = sanitize_tx_data(
+            unspents_original, outputs_original, fee=1, leftover=RETURN_ADDRESS,
+            message=message
+        )
+        _, outputs_data_fee = sanitize_tx_data(
+            unspents_original, outputs_original, fee=1, leftover=RETURN_ADDRESS,
+            message=message, data_fee=0.25
+        )
+
+        assert outputs_data_fee[-1][1] - outputs[-1][1] == math.floor(data_size * 0.75)
+
     def test_no_combine_insufficient_funds(self):
         unspents_original = [Unspent(1000, 0, '', 0),
                              Unspent(1000, 0, '', 0)]
@@ -271,6 +292,79 @@ class TestCreateSignedTransaction:
         assert tx[-288:] == FINAL_TX_1[-288:]
 
 
+class TestUnsignedTransaction:
+    def test_matches_create_p2pkh_transaction(self):
+        private_key = PrivateKey(WALLET_FORMAT_MAIN)
+        tx = UnsignedTransaction.from_unspents(UNSPENTS, OUTPUTS)
+        tx.sign(private_key)
+        assert tx.to_hex() == create_p2pkh_transaction(private_key, UNSPENTS, OUTPUTS)
+
+    def test_incremental_signing(self):
+        key1 = PrivateKey(WALLET_FORMAT_MAIN)
+        key2 = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+        unspents = [Unspent(10000, 1, UNSPENTS[0].txid, i) for i in range(3)]
+        tx = UnsignedTransaction.from_unspents(unspents, OUTPUTS)
+
+        # Another process signs input 2 from a serialized copy.
+        copy = UnsignedTransaction.from_bytes(tx.to_bytes())
+        copy.sign(key2, indices=[2], low_r=True)
+
+        tx.sign(key1, indices=[0, 1])
+        assert tx.get_unsigned() == [2]
+        with pytest.raises(ValueError):
+            tx.to_hex()
+
+        tx.combine(UnsignedTransaction.from_bytes(copy.to_bytes()))
+        tx_hex = tx.to_hex()
+        parsed = deserialize_tx(tx_hex)
+        assert parsed.inputs[2].script.endswith(key2.public_key)
+        assert parsed.inputs[0].script.endswith(key1.public_key)
+        assert construct_output_block(OUTPUTS) in hex_to_bytes(tx_hex)
+
+    def test_add_signature(self):
+        private_key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+        tx = UnsignedTransaction.from_unspents(UNSPENTS, OUTPUTS)
+        sighash = tx.sighash(0, private_key.scriptcode)
+
+        with pytest.raises(ValueError):
+            tx.add_signature(0, private_key.sign(b'other data'), private_key.public_key)
+        tx.add_signature(0, private_key.sign(sighash), private_key.public_key)
+        assert tx.to_hex() == create_p2pkh_transaction(private_key, UNSPENTS, OUTPUTS)
+
+    def test_combine_verifies_signatures(self):
+        key1 = PrivateKey(WALLET_FORMAT_MAIN)
+        key2 = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+        unspents = [Unspent(10000, 1, UNSPENTS[0].txid, i) for i in range(2)]
+        tx = UnsignedTransaction.from_unspents(unspents, OUTPUTS)
+        copy = UnsignedTransaction.from_unspents(unspents, OUTPUTS)
+        copy.sign(key1, indices=[0])
+        copy.sign(key2, indices=[1])
+
+        # The signature of input 1 was made for input 0.
+        forged = UnsignedTransaction.from_unspents(unspents, OUTPUTS)
+        forged.scripts = [copy.scripts[0], copy.scripts[0]]
+        with pytest.raises(ValueError):
+            tx.combine(forged)
+        forged.scripts = [copy.scripts[0], b'\x01']
+        with pytest.raises(ValueError):
+            tx.combine(forged)
+        assert tx.get_unsigned() == [0, 1]
+
+        tx.combine(copy)
+        assert tx.get_unsigned() == []
+
+    def test_invalid(self):
+        data = UnsignedTransaction.from_unspents(UNSPENTS, OUTPUTS).to_bytes()
+        with pytest.raises(ValueError):
+            UnsignedTransaction.from_bytes(data[:-1])
+        with pytest.raises(ValueError):
+            UnsignedTransaction.from_bytes(b'BSVB' + data[4:])
+        with pytest.raises(ValueError):
+            UnsignedTransaction.from_unspents(UNSPENTS, OUTPUTS).combine(
+                UnsignedTransaction.from_unspents(UNSPENTS, OUTPUTS[:1])
+            )
+
+
 class TestEstimateTxFee:
     def test_accurate_compressed(self):
         assert estimate_tx_fee(1, 2, 70, True) == 15820
@@ -281,6 +375,73 @@ class TestEstimateTxFee:
     def test_none(self):
         assert estimate_tx_fee(5, 5, 0, True) == 0
 
+    def test_fractional_fee_rounds_up(self):
+        assert estimate_tx_fee(1, 2, 0.3, True) == 68
+
+    def test_fractional_fee_exact(self):
+        # 226 * 0.1 as a float is 22.6000000000000014
+        assert estimate_tx_fee(1, 2, 0.1, True) == 23
+        # 100 * 0.07 as a float is 7.000000000000001
+        assert calc_fee(100, 0.07) == 7
+
+
+class TestEstimateTxSize:
+    def test_input_size(self):
+        assert get_input_size(compressed=True) == 148
+        assert get_input_size(compressed=False) == 180
+        assert get_input_size(compressed=True, signature_size=71) == 147
+
+    def test_output_count_includes_op_return(self):
+        # 252 P2PKH outputs alone fit a single byte varint but 253 outputs do not.
+        assert (estimate_tx_size(1, 252, True, get_op_return_size(b'hello'), 1) ==
+                estimate_tx_size(1, 252, True) + get_op_return_size(b'hello') + 2)
+
+    def test_op_return_size(self):
+        # 8 byte amount + 1 byte script length + OP_FALSE OP_RETURN + 1 byte push + data
+        assert get_op_return_size(b'hello') == 8 + 1 + 2 + 1 + 5
+        # OP_PUSHDATA1 needed from 76 bytes of data
+        assert get_op_return_size(b'x' * 75) == 8 + 1 + 2 + 1 + 75
+        assert get_op_return_size(b'x' * 76) == 8 + 1 + 2 + 2 + 76
+        # Script length varint is three bytes once the script exceeds 252 bytes
+        assert get_op_return_size(b'x' * 250) == 8 + 3 + 2 + 2 + 250
+        assert get_op_return_size(b'\x05hello', custom_pushdata=True) == 8 + 1 + 2 + 6
+
+    def test_op_return_size_matches_output_block(self):
+        for message in (b'hello', b'x' * 76, b'x' * 300, b'x' * 70000):
+            assert get_op_return_size(message) == len(construct_output_block([(message, 0)]))
+
+    def test_estimate_bounds_signed_size(self):
+        private_key = PrivateKey(WALLET_FORMAT_MAIN)
+        unspents = UNSPENTS * 3
+        _, outputs = sanitize_tx_data(
+            unspents, [(out[0], out[1], 'satoshi') for out in OUTPUTS], 0, RETURN_ADDRESS,
+            message='hello' * 100
+        )
+        tx_size = calc_tx_size(create_p2pkh_transaction(private_key, unspents, outputs))
+        estimated_size = estimate_tx_size(
+            len(unspents), len(outputs) - 1, False, get_op_return_size(b'hello' * 100), 1
+        )
+        # Only the signature lengths may differ, by at most one byte per input.
+        assert estimated_size - len(unspents) <= tx_size <= estimated_size
+
+    def test_estimate_low_r(self):
+        private_key = PrivateKey(WALLET_FORMAT_MAIN)
+        unspents = UNSPENTS * 10
+        outputs = [(out[0], out[1], 'satoshi') for out in OUTPUTS]
+        _, outputs = sanitize_tx_data(unspents, outputs, 0, RETURN_ADDRESS, low_r=True)
+        tx_size = calc_tx_size(create_p2pkh_transaction(private_key, unspents, outputs, low_r=True))
+        assert tx_size <= estimate_tx_size(len(unspents), len(outputs), False,
+                                           signature_size=LOW_R_SIGNATURE_SIZE)
+        assert tx_size < estimate_tx_size(len(unspents), len(outputs), False)
+
+    def test_low_r_fee(self):
+        unspents = [Unspent(10000, 0, '', 0)] * 4
+        outputs = [(BITCOIN_ADDRESS_TEST_COMPRESSED, 1000, 'satoshi')]
+        _, outputs_high = sanitize_tx_data(unspents, outputs, 1, RETURN_ADDRESS)
+        _, outputs_low = sanitize_tx_data(unspents, outputs, 1, RETURN_ADDRESS, low_r=True)
+        # One satoshi saved for each input at 1 sat/byte
+        assert outputs_low[-1][1] - outputs_high[-1][1] == 4
+
 
 class TestConstructOutputBlock:
     def test_no_message(self):
@@ -313,9 +474,57 @@ class TestConstructOutputBlock:
             construct_output_block(OUTPUTS + [('hello', 0)], custom_pushdata=True)
 
 
+class TestDeserializeTx:
+    def test_final_tx(self):
+        tx = deserialize_tx(FINAL_TX_1)
+        assert tx.version == 1
+        assert tx.lock_time == 0
+        assert len(tx.inputs) == 1
+        assert tx.inputs[0].txid == hex_to_bytes(UNSPENTS[0].txid)[::-1]
+        assert tx.inputs[0].txindex == b'\x01\x00\x00\x00'
+        assert tx.inputs[0].script_len == b'\x8a'
+        assert [(out.amount, len(out.script)) for out in tx.outputs] == [(50000, 25), (83658760, 25)]
+        assert construct_output_block(OUTPUTS) == b''.join(
+            out.amount.to_bytes(8, 'little') + bytes([len(out.script)]) + out.script for out in tx.outputs
+        )
+
+    def test_input_block_round_trip(self):
+        tx = deserialize_tx(hex_to_bytes(FINAL_TX_1))
+        assert construct_input_block(tx.inputs) in hex_to_bytes(FINAL_TX_1)
+
+    def test_created_tx(self):
+        private_key = PrivateKey(WALLET_FORMAT_MAIN)
+        tx_hex = create_p2pkh_transaction(private_key, UNSPENTS * 300, OUTPUTS + MESSAGES)
+        tx = deserialize_tx(tx_hex)
+        assert len(tx.inputs) == 300
+        assert [out.amount for out in tx.outputs] == [50000, 83658760, 0, 0]
+        assert tx.outputs[2].script == b'\x00\x6a\x05hello'
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            deserialize_tx(FINAL_TX_1[:-10])
+        with pytest.raises(ValueError):
+            deserialize_tx(FINAL_TX_1 + '00')
+
+    def test_get_parent_txids(self):
+        assert get_parent_txids(FINAL_TX_1) == {UNSPENTS[0].txid}
+
+
+def test_get_dependency_order():
+    assert get_dependency_order([set(), set(), set()]) == [0, 1, 2]
+    assert get_dependency_order([{1}, {2}, set()]) == [2, 1, 0]
+    assert get_dependency_order([{2}, set(), set(), {0, 1}]) == [2, 0, 1, 3]
+
+
 def test_construct_input_block():
     assert construct_input_block(INPUTS) == hex_to_bytes(INPUT_BLOCK)
 
 
 def test_calc_txid():
     assert calc_txid(FINAL_TX_1) == '64637ffb0d36003eccbb0317dee000ac8a2744cbea3b8a4c3a477c132bb8ca69'
+
+
+def test_get_p2pkh_script():
+    script = get_p2pkh_script(RETURN_ADDRESS)
+    assert script == b'\x76\xa9\x14' + address_to_public_key_hash(RETURN_ADDRESS) + b'\x88\xac'
+    assert get_p2pkh_script(RETURN_ADDRESS) is script
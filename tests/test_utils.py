@@ -1,6 +1,6 @@
 from bitsv.utils import (
     Decimal, bytes_to_hex, chunk_data, flip_hex_byte_order, hex_to_bytes,
-    hex_to_int, int_to_hex, int_to_unknown_bytes
+    hex_to_int, int_to_hex, int_to_unknown_bytes, int_to_varint, varint_to_int
 )
 
 BIG_INT = 123456789 ** 5
@@ -66,3 +66,9 @@ def test_chunk_data():
         '8a', '78', '1a', 'a6', 'b9', '67', '79', '84', 'd3', 'e0', 'bd',
         '0b', 'fc', '52', 'b9', 'f3', 'b0', '38', '85', 'a0', '0'
     ]
+
+
+def test_varint_to_int():
+    for value in (0, 252, 253, 65535, 65536, 4294967295, 4294967296):
+        data = b'\x01' + int_to_varint(value) + b'\x02'
+        assert varint_to_int(data, 1) == (value, len(data) - 1)
@@ -0,0 +1,201 @@
+import threading
+
+import pytest
+
+from bitsv.exceptions import InsufficientFunds
+from bitsv.network.meta import Unspent
+from bitsv.transaction import calc_txid, sanitize_tx_data
+from bitsv.utxo import UTXOSet, UnspentCache, UnspentPool
+from .samples import TXID
+from .utils import get_key
+
+
+class TestSplitUtxos:
+    def test_split(self):
+        key = get_key()
+        tx_hex, unspents, change = key.split_utxos(10, 1000, fee=1)
+        txid = calc_txid(tx_hex)
+
+        assert unspents == [Unspent(1000, 0, txid, i) for i in range(10)]
+        assert change.txid == txid and change.txindex == 10
+        assert 0 <= 10 ** 6 - 10 * 1000 - change.amount - len(tx_hex) // 2 <= 2
+
+    def test_no_change(self):
+        key = get_key(2 * 1000 + 300)
+        tx_hex, unspents, change = key.split_utxos(2, 1000, fee=1)
+        assert len(unspents) == 2
+        assert change is None
+
+    def test_insufficient_funds(self):
+        with pytest.raises(InsufficientFunds):
+            get_key(5000).split_utxos(10, 1000, fee=1)
+
+    def test_invalid(self):
+        key = get_key()
+        with pytest.raises(ValueError):
+            key.split_utxos(0, 1000, fee=1)
+        with pytest.raises(ValueError):
+            key.split_utxos(2, 500, fee=1)
+
+
+class TestUnspentPool:
+    def test_concurrent_acquire_unique(self):
+        key = get_key()
+        pool = UnspentPool(key, 1000, size=20, unspents=key.unspents, fee=1)
+        acquired = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(10):
+                unspent = pool.acquire(timeout=10)
+                with lock:
+                    acquired.append((unspent.txid, unspent.txindex))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(acquired) == 80
+        assert len(set(acquired)) == 80
+        # Refills were funded by the change of the previous refill.
+        assert len(key.network_api.broadcasts) >= 4
+        assert len(pool.reserve) == 1
+
+    def test_refill(self):
+        key = get_key()
+        pool = UnspentPool(key, 1000, size=5, unspents=key.unspents, fee=1)
+        pool.refill()
+        assert len(pool) == 5
+        pool.refill()
+        assert len(key.network_api.broadcasts) == 1
+
+    def test_release(self):
+        key = get_key()
+        pool = UnspentPool(key, 1000, size=5, unspents=key.unspents, fee=1)
+        unspent = pool.acquire(timeout=10)
+        pool.release(unspent)
+        assert pool.acquire(timeout=10) == unspent
+
+    def test_partial_refill(self):
+        key = get_key(3500)
+        pool = UnspentPool(key, 1000, size=10, unspents=key.unspents, fee=1)
+        pool.refill()
+        assert 1 <= len(pool) <= 3
+
+    def test_reserve_spent(self):
+        key = get_key(3500)
+        pool = UnspentPool(key, 1000, size=10, unspents=key.unspents, fee=1)
+        with pytest.raises(InsufficientFunds):
+            for _ in range(5):
+                pool.acquire(timeout=10)
+
+    def test_broadcast_failure(self):
+        key = get_key(fail=True)
+        pool = UnspentPool(key, 1000, size=5, unspents=key.unspents, fee=1)
+        with pytest.raises(ConnectionError):
+            pool.acquire(timeout=10)
+        assert pool.reserve == key.unspents
+
+
+class TestUnspentCache:
+    def test_add_spend(self):
+        cache = UnspentCache()
+        cache.add(b'a', Unspent(1000, 0, TXID, 0))
+        cache.add(b'a', Unspent(2000, 0, TXID, 1))
+        assert cache.get_balance(b'a') == 3000
+        assert cache.spend(TXID, 0) == Unspent(1000, 0, TXID, 0)
+        assert cache.spend(TXID, 0) is None
+        assert cache.get_unspents(b'a') == [Unspent(2000, 0, TXID, 1)]
+
+    def test_set_unspents(self):
+        cache = UnspentCache()
+        cache.add(b'a', Unspent(1000, 0, TXID, 0))
+        cache.set_unspents(b'a', [Unspent(5000, 2, TXID, 2)])
+        assert (TXID, 0) not in cache
+        assert cache.get_balance(b'a') == 5000
+
+    def test_add_block(self):
+        cache = UnspentCache()
+        cache.set_unspents(b'a', [Unspent(1000, 0, TXID, 0), Unspent(1000, 0, 'ab' * 32, 0),
+                                  Unspent(1000, 5, 'cd' * 32, 0)])
+        cache.add_block([TXID])
+        assert [u.confirmations for u in cache.get_unspents(b'a')] == [1, 0, 6]
+
+
+def check_sorted_view(utxos):
+    unspents = list(utxos.iter_by_amount())
+    assert len(unspents) == len(utxos)
+    assert [unspent.amount for unspent in unspents] == sorted(unspent.amount for unspent in utxos)
+    assert utxos.total == sum(unspent.amount for unspent in utxos)
+
+
+class TestUTXOSet:
+    def test_add_discard(self):
+        utxos = UTXOSet([Unspent(3000, 1, TXID, 0), Unspent(1000, 1, TXID, 1)])
+        utxos.add(Unspent(2000, 0, TXID, 2))
+        assert len(utxos) == 3
+        assert utxos.total == 6000
+        assert (TXID, 2) in utxos
+        assert utxos.get(TXID, 1) == Unspent(1000, 1, TXID, 1)
+        assert [unspent.amount for unspent in utxos.iter_by_amount()] == [1000, 2000, 3000]
+        assert [unspent.amount for unspent in utxos.iter_by_amount(reverse=True)] == [3000, 2000, 1000]
+
+        assert utxos.discard(TXID, 1)
+        assert not utxos.discard(TXID, 1)
+        assert utxos.get(TXID, 1) is None
+        assert utxos.total == 5000
+        check_sorted_view(utxos)
+
+        assert utxos.discard(TXID, 0)
+        assert (TXID, 0) not in utxos
+        assert list(utxos) == [Unspent(2000, 0, TXID, 2)]
+
+    def test_replace_outpoint(self):
+        utxos = UTXOSet([Unspent(3000, 0, TXID, 0)])
+        utxos.add(Unspent(3000, 1, TXID, 0))
+        assert list(utxos) == [Unspent(3000, 1, TXID, 0)]
+        utxos.update([Unspent(3000, 2, TXID, 0)])
+        assert list(utxos.iter_by_amount()) == [Unspent(3000, 2, TXID, 0)]
+        assert utxos.total == 3000
+
+    def test_churn(self):
+        utxos = UTXOSet(Unspent(546 + i % 7, 1, '{:064x}'.format(i), 0) for i in range(200))
+        for i in range(0, 200, 3):
+            utxos.spend([Unspent(0, 0, '{:064x}'.format(i), 0)])
+        for i in range(50):
+            utxos.add(Unspent(600 - i, 0, '{:064x}'.format(1000 + i), 1))
+        assert len(utxos) == 200 - 67 + 50
+        check_sorted_view(utxos)
+
+        utxos.replace([Unspent(10, 1, TXID, 0)])
+        assert list(utxos) == [Unspent(10, 1, TXID, 0)]
+        assert utxos.total == 10
+
+    def test_shared_txids(self):
+        utxos = UTXOSet([Unspent(1000, 1, TXID, 0)])
+        utxos.add(Unspent(2000, 1, TXID, 1))
+        first, second = utxos
+        assert first.txid_bytes is second.txid_bytes
+        assert first.txid == TXID
+        assert (first.txid_bytes, 1) in utxos
+        assert utxos.get(first.txid_bytes, 1) == Unspent(2000, 1, TXID, 1)
+
+    def test_to_dict(self):
+        utxos = UTXOSet([Unspent(3000, 1, TXID, 0), Unspent(1000, 0, TXID, 1)])
+        d = utxos.to_dict()
+        assert d == {'amount': [3000, 1000], 'confirmations': [1, 0], 'txid': [TXID, TXID], 'txindex': [0, 1]}
+        assert list(UTXOSet.from_dict(d)) == list(utxos)
+
+    def test_select(self):
+        key = get_key()
+        key.unspents = UTXOSet(Unspent(1000 + i, 1, '{:064x}'.format(i), 0) for i in range(100))
+        outputs = [(key.address, 2500, 'satoshi')]
+        unspents, _ = sanitize_tx_data(key.unspents, outputs, 1, key.address, combine=False)
+        assert [unspent.amount for unspent in unspents] == [1000, 1001, 1002, 1003]
+        assert sanitize_tx_data(list(key.unspents), outputs, 1, key.address, combine=False)[0] == unspents
+
+        key.unspents.spend(unspents)
+        assert key.unspents.total == sum(range(1004, 1100))
+        check_sorted_view(key.unspents)
@@ -4,7 +4,11 @@ import pytest
 
 from bitsv.crypto import ECPrivateKey
 from bitsv.curve import Point
-from bitsv.format import verify_sig
+from bitsv.exceptions import UnconfirmedChainTooLong
+from bitsv.format import address_to_public_key_hash, verify_sig
+from bitsv.network.meta import Unspent
+from bitsv.transaction import calc_txid
+from bitsv import wallet
 from bitsv.wallet import BaseKey, Key, PrivateKey, wif_to_key
 from .samples import (
     PRIVATE_KEY_BYTES, PRIVATE_KEY_DER,
@@ -14,8 +18,9 @@ from .samples import (
     WALLET_FORMAT_COMPRESSED_MAIN, WALLET_FORMAT_MAIN,
     WALLET_FORMAT_COMPRESSED_TEST, WALLET_FORMAT_TEST,
     WALLET_FORMAT_COMPRESSED_STN, WALLET_FORMAT_STN,
-    BITCOIN_ADDRESS, BITCOIN_ADDRESS_TEST, BITCOIN_ADDRESS_STN
+    BITCOIN_ADDRESS, BITCOIN_ADDRESS_TEST, BITCOIN_ADDRESS_STN, TXID
 )
+from .utils import MockNetworkAPI, get_key
 
 TRAVIS = 'TRAVIS' in os.environ
 
@@ -91,6 +96,19 @@ class TestBaseKey:
         signature = base_key.sign(data)
         assert verify_sig(signature, data, base_key.public_key)
 
+    def test_sign_low_r(self):
+        base_key = BaseKey()
+        for _ in range(20):
+            data = os.urandom(200)
+            signature = base_key.sign(data, low_r=True)
+            assert len(signature) <= 70
+            assert verify_sig(signature, data, base_key.public_key)
+
+    def test_sign_low_r_deterministic(self):
+        base_key = BaseKey(WALLET_FORMAT_MAIN)
+        data = b'data'
+        assert base_key.sign(data, low_r=True) == base_key.sign(data, low_r=True)
+
     def test_verify_success(self):
         base_key = BaseKey()
         data = os.urandom(200)
@@ -143,6 +161,17 @@ class TestPrivateKey:
         assert private_key.unspents == []
         assert private_key.transactions == []
 
+    def test_network_api(self):
+        private_key = PrivateKey(WALLET_FORMAT_MAIN)
+        assert private_key._network_api is None
+        assert private_key.network_api is wallet.network_api_main
+        assert PrivateKey(WALLET_FORMAT_TEST, network='test').network_api is wallet.network_api_test
+        assert wallet.network_api_test.network == 'test'
+
+        network_api = MockNetworkAPI()
+        private_key.network_api = network_api
+        assert private_key.network_api is network_api
+
     def test_address(self):
         private_key = PrivateKey(WALLET_FORMAT_MAIN)
         assert private_key.address == BITCOIN_ADDRESS
@@ -151,6 +180,14 @@ class TestPrivateKey:
         private_key = PrivateKey(WALLET_FORMAT_STN, network='stn')
         assert private_key.address == BITCOIN_ADDRESS_STN
 
+    def test_scripts(self):
+        private_key = PrivateKey(WALLET_FORMAT_MAIN)
+        hash160 = address_to_public_key_hash(BITCOIN_ADDRESS)
+        assert private_key.public_key_hash == hash160
+        assert private_key.scriptcode == b'\x76\xa9\x14' + hash160 + b'\x88\xac'
+        assert private_key.scriptpubkey is private_key.scriptcode
+        assert private_key.public_key_push == b'\x41' + private_key.public_key
+
     def test_to_wif(self):
         private_key = PrivateKey(WALLET_FORMAT_MAIN)
         assert private_key.to_wif() == WALLET_FORMAT_MAIN
@@ -221,3 +258,56 @@ class TestPrivateKey:
 
     def test_repr(self):
         assert repr(PrivateKey(WALLET_FORMAT_MAIN)) == '<PrivateKey: 1ELReFsTCUY2mfaDTy32qxYiT49z786eFg>'
+
+
+class TestChaining:
+    def test_create_transaction_return_change(self):
+        key = get_key()
+        tx_hex, change = key.create_transaction([(BITCOIN_ADDRESS, 1000, 'satoshi')], fee=1,
+                                                unspents=[Unspent(10000, 1, TXID, 0)],
+                                                return_change=True)
+        assert change.txid == calc_txid(tx_hex)
+        assert change.txindex == 1
+        assert change.confirmations == 0
+        assert 0 <= 10000 - 1000 - change.amount - len(tx_hex) // 2 <= 2
+
+    def test_return_change_with_message(self):
+        key = get_key()
+        tx_hex, change = key.create_transaction([(BITCOIN_ADDRESS, 1000, 'satoshi')], fee=1,
+                                                message='hello', unspents=[Unspent(10000, 1, TXID, 0)],
+                                                return_change=True)
+        assert change.txindex == 2
+
+    def test_no_change(self):
+        key = get_key()
+        tx_hex, change = key.create_transaction([], fee=1, leftover=BITCOIN_ADDRESS,
+                                                unspents=[Unspent(10000, 1, TXID, 0)],
+                                                return_change=True)
+        assert change is None
+        tx_hex, change = key.create_transaction([(BITCOIN_ADDRESS, 9700, 'satoshi')], fee=1,
+                                                unspents=[Unspent(10000, 1, TXID, 0)],
+                                                return_change=True)
+        assert change is None
+
+    def test_send_chain(self):
+        key = get_key()
+        change = Unspent(100000, 1, TXID, 0)
+        for depth in range(1, 6):
+            txid, change = key.send([(BITCOIN_ADDRESS, 1000, 'satoshi')], fee=1,
+                                    unspents=[change], return_change=True)
+            assert txid == calc_txid(key.network_api.broadcasts[-1])
+            assert change.txid == txid
+            assert key.get_chain_depth([change]) == depth + 1
+        assert len(key.chain_depths) == 1
+
+    def test_ancestor_limit(self):
+        key = get_key()
+        key.ancestor_limit = 3
+        change = Unspent(100000, 0, TXID, 0)
+        for _ in range(2):
+            _, change = key.send([(BITCOIN_ADDRESS, 1000, 'satoshi')], fee=1,
+                                 unspents=[change], return_change=True)
+        with pytest.raises(UnconfirmedChainTooLong):
+            key.send([(BITCOIN_ADDRESS, 1000, 'satoshi')], fee=1, unspents=[change])
+        assert len(key.network_api.broadcasts) == 2
+        assert key.get_chain_depth([Unspent(100000, 1, TXID, 1)]) == 1
@@ -1,7 +1,13 @@
+import threading
 import warnings
 
 import requests
 
+from bitsv.network.meta import Unspent
+from bitsv.transaction import calc_txid
+from bitsv.wallet import PrivateKey
+from .samples import TXID, WALLET_FORMAT_COMPRESSED_MAIN
+
 
 def raise_connection_error(*args, **kwargs):
     raise requests.ConnectionError
@@ -24,3 +30,30 @@ def catch_errors_raise_warnings(f, ignored_errors):  # pragma: no cover
             warnings.warn('Unreachable API from '.format(f.__name__), Warning)
             assert True
     return wrapper
+
+
+class MockNetworkAPI:
+    """Records broadcast transactions instead of sending them."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.broadcasts = []
+
+    def get_unspents(self, address):
+        raise AssertionError('UTXOs should not be fetched.')
+
+    def broadcast_tx(self, tx_hex):
+        if self.fail:
+            raise ConnectionError('All APIs are unreachable.')
+        with self.lock:
+            self.broadcasts.append(tx_hex)
+        return calc_txid(tx_hex)
+
+
+def get_key(amount=10 ** 6, fail=False):
+    """A key with one UTXO of ``amount`` and a :class:`MockNetworkAPI`."""
+    key = PrivateKey(WALLET_FORMAT_COMPRESSED_MAIN)
+    key.unspents = [Unspent(amount, 1, TXID, 0)]
+    key.network_api = MockNetworkAPI(fail)
+    return key